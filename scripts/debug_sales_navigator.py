@@ -4,7 +4,6 @@ Debug version of Sales Navigator Scraper to analyze page structure
 """
 
 import os
-import json
 import time
 import asyncio
 from typing import Dict, List, Optional
@@ -12,6 +11,9 @@ from urllib.parse import urlencode, quote_plus, unquote
 from parsel import Selector
 from loguru import logger as log
 from scrapfly import ScrapeConfig, ScrapflyClient, ScrapeApiResponse
+from sales_nav_layout_cache import class_inventory, layout_fingerprint
+from sales_nav_page_state import classify_page
+from sales_nav_debug_capture import DEBUG_CAPTURE
 
 # Initialize ScrapFly client
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
@@ -65,33 +67,27 @@ async def debug_sales_navigator_page(url: str):
         response = await SCRAPFLY.async_scrape(config)
         selector = response.selector
         
-        # Save the full HTML for analysis
-        os.makedirs("tmp/debug", exist_ok=True)
-        
-        with open("tmp/debug/sales_navigator_page.html", "w", encoding="utf-8") as f:
-            f.write(response.content)
-        
-        log.info(f"✅ HTML saved to tmp/debug/sales_navigator_page.html")
         log.info(f"📊 Response status: {response.status_code}")
         log.info(f"📄 Response size: {len(response.content)} bytes")
         
         # Analyze page structure
         analysis = analyze_page_structure(selector)
         
-        with open("tmp/debug/page_analysis.json", "w", encoding="utf-8") as f:
-            json.dump(analysis, f, indent=2, ensure_ascii=False)
-        
-        log.info(f"📋 Page analysis saved to tmp/debug/page_analysis.json")
+        # Save the full HTML and the analysis; this is a debugging run, so always
+        path = DEBUG_CAPTURE.capture("debug", response.content, meta={"url": url, "analysis": analysis}, force=True)
+        log.info(f"✅ HTML and page analysis saved to {path} (decompress with scripts/sales_nav_debug_capture.py)")
         
         # Print key findings
         print("\n🔍 KEY FINDINGS:")
         print(f"   Title: {analysis['title']}")
+        print(f"   Page state: {analysis['page_state']}")
         print(f"   Is LinkedIn page: {analysis['is_linkedin']}")
         print(f"   Has sales navigator elements: {analysis['has_sales_nav_elements']}")
         print(f"   Has search results: {analysis['has_search_results']}")
         print(f"   Total elements with 'result': {analysis['result_element_count']}")
         print(f"   Total elements with 'person': {analysis['person_element_count']}")
         print(f"   Total elements with 'profile': {analysis['profile_element_count']}")
+        print(f"   Layout fingerprint: {analysis['layout_fingerprint']}")
         
         print("\n📝 FOUND CLASSES:")
         for class_name in analysis['interesting_classes'][:10]:
@@ -109,12 +105,17 @@ def analyze_page_structure(selector: Selector) -> Dict:
     # Basic page info
     title = selector.css("title::text").get() or ""
     
+    # Serialize and lowercase the DOM once; every text check below works on this copy
+    html = selector.get()
+    lowered = html.lower()
+    page = classify_page(html)
+    
     # Check if it's a LinkedIn page
-    is_linkedin = "linkedin" in title.lower() or "linkedin" in selector.get()
+    is_linkedin = "linkedin" in title.lower() or "linkedin" in html
     
     # Look for Sales Navigator specific elements
     sales_nav_keywords = ["sales", "navigator", "search", "people", "lead"]
-    has_sales_nav_elements = any(keyword in selector.get().lower() for keyword in sales_nav_keywords)
+    has_sales_nav_elements = page.has("sales_nav") or any(keyword in lowered for keyword in sales_nav_keywords)
     
     # Count different types of elements
     result_elements = selector.css("*").xpath(".//*[contains(@class, 'result') or contains(@data-test-id, 'result') or contains(@id, 'result')]")
@@ -122,16 +123,12 @@ def analyze_page_structure(selector: Selector) -> Dict:
     profile_elements = selector.css("*").xpath(".//*[contains(@class, 'profile') or contains(@data-test-id, 'profile') or contains(@id, 'profile')]")
     
     # Get all class names for analysis
-    all_classes = []
-    for element in selector.css("*[class]"):
-        classes = element.css("::attr(class)").get()
-        if classes:
-            all_classes.extend(classes.split())
+    all_classes = class_inventory(selector)
     
     # Find interesting classes (containing keywords)
     interesting_keywords = ["result", "search", "person", "profile", "card", "item", "list", "lead"]
     interesting_classes = []
-    for class_name in set(all_classes):
+    for class_name in all_classes:
         if any(keyword in class_name.lower() for keyword in interesting_keywords):
             interesting_classes.append(class_name)
     
@@ -149,13 +146,15 @@ def analyze_page_structure(selector: Selector) -> Dict:
     # Check for login/access issues
     access_issues = {
         "has_login_form": len(selector.css("form[data-test-id='login-form']")) > 0,
-        "has_premium_upsell": "premium" in selector.get().lower() and "upgrade" in selector.get().lower(),
-        "has_access_denied": "access denied" in selector.get().lower() or "unauthorized" in selector.get().lower(),
-        "has_sales_nav_subscription": "sales navigator" in selector.get().lower() and "subscription" in selector.get().lower(),
+        "has_premium_upsell": page.has("upsell") or ("premium" in page.phrases and "upgrade" in page.phrases),
+        "has_access_denied": page.has("access_denied"),
+        "has_sales_nav_subscription": page.has("sales_nav") and page.has("subscription"),
     }
     
     return {
         "title": title,
+        "page_state": page.state.value,
+        "page_signals": sorted(page.signals),
         "is_linkedin": is_linkedin,
         "has_sales_nav_elements": has_sales_nav_elements,
         "has_search_results": len(result_elements) > 0,
@@ -163,10 +162,11 @@ def analyze_page_structure(selector: Selector) -> Dict:
         "person_element_count": len(person_elements),
         "profile_element_count": len(profile_elements),
         "interesting_classes": sorted(list(set(interesting_classes))),
+        "layout_fingerprint": layout_fingerprint(selector, all_classes),
         "specific_selectors": specific_selectors,
         "access_issues": access_issues,
         "total_elements": len(selector.css("*")),
-        "has_javascript_content": "window." in selector.get() or "document." in selector.get(),
+        "has_javascript_content": "window." in html or "document." in html,
     }
 
 async def main():
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Early abort for renders that can never produce results
+
+With a stale `li_at` cookie or an account without Sales Navigator, the wait
+scripts used to poll for result containers until their full timeout (30 s in
+the advanced scraper, two minutes in the 40-attempt loop) and the extractors
+then ran over a login page. This module stops that at three points:
+
+- ACCESS_GUARD_JS is prepended to the render-time wait scripts. It checks
+  the URL and DOM for login walls, checkpoints and upsell pages, resolves
+  the wait immediately and marks the page with `data-b2b-page-state`
+- `detect_access_block` reads that marker (or classifies the HTML with
+  `sales_nav_page_state` when the marker is missing) before any extraction
+- `AccountCircuitBreaker` remembers, per account, that access is blocked so
+  the remaining URLs for that account fail fast without a scrape
+
+The guard script and `detect_access_block` only block a page that has no
+result cards: login links, recaptcha scripts and upgrade banners also appear
+on working result pages, and a false block opens the account's circuit for
+hours.
+
+Accounts are keyed by a hash of the `li_at` cookie, so refreshing the cookie
+closes the circuit automatically.
+
+Usage:
+    from sales_nav_access_guard import ACCOUNT_BREAKER, ACCESS_GUARD_JS, account_key, detect_access_block
+
+    python scripts/sales_nav_access_guard.py            # show open circuits
+    python scripts/sales_nav_access_guard.py --reset    # close all circuits
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from loguru import logger as log
+
+from sales_nav_page_state import PageState, classify_page
+
+DEFAULT_CIRCUIT_PATH = os.environ.get("ACCOUNT_CIRCUIT_PATH", "tmp/account_circuits.json")
+
+PAGE_STATE_ATTR = "data-b2b-page-state"
+
+# Page states that mean no amount of waiting will produce results
+BLOCKING_STATES = (PageState.LOGIN_WALL, PageState.CHALLENGE, PageState.SUBSCRIPTION_UPSELL)
+
+# How long a circuit stays open per blocking state, in seconds
+COOLDOWNS = {
+    PageState.LOGIN_WALL: 6 * 3600,           # only a new cookie fixes this
+    PageState.SUBSCRIPTION_UPSELL: 24 * 3600,
+    PageState.CHALLENGE: 30 * 60,             # checkpoints sometimes clear on their own
+}
+
+# Redirect targets for sessions LinkedIn will not serve, as in the JS guard's href checks
+BLOCKED_PATHS = (
+    (re.compile(r"/checkpoint/challenge|captcha", re.I), PageState.CHALLENGE),
+    (re.compile(r"/(authwall|login|uas/login|checkpoint/lg)", re.I), PageState.LOGIN_WALL),
+)
+
+# The marker is set on <html>, so it is always within the first bytes
+_MARKER_RE = re.compile(PAGE_STATE_ATTR + r'=["\']([a-z_]+)["\']')
+_MARKER_WINDOW = 4096
+
+# Defines `b2bAccessGuard(resolve)`: returns true (after resolving the wait and
+# marking the page) when the page is a login wall, checkpoint or upsell
+ACCESS_GUARD_JS = """
+const b2bDetectAccessBlock = () => {
+    if (document.querySelector('[data-x-search-result], .search-results__result-item, .result-lockup')) {
+        return null;
+    }
+    const href = window.location.href;
+    if (/\\/checkpoint\\/challenge|captcha/i.test(href) ||
+        document.querySelector('#captcha-internal, form[action*="checkpoint/challenge"]')) {
+        return 'challenge';
+    }
+    if (/\\/(authwall|login|uas\\/login|checkpoint\\/lg)/i.test(href) ||
+        document.querySelector('form.login-form, form[data-test-id="login-form"], input[name="session_key"]')) {
+        return 'login_wall';
+    }
+    const text = (document.body && document.body.innerText || '').slice(0, 20000).toLowerCase();
+    if (text.includes('start your free trial') || text.includes('upgrade to sales navigator') ||
+        text.includes('your subscription has expired') || text.includes('try sales navigator')) {
+        return 'subscription_upsell';
+    }
+    return null;
+};
+
+const b2bAccessGuard = (resolve) => {
+    const state = b2bDetectAccessBlock();
+    if (!state) {
+        return false;
+    }
+    console.log(`Access blocked (${state}), resolving early`);
+    document.documentElement.setAttribute('data-b2b-page-state', state);
+    resolve(state);
+    return true;
+};
+"""
+
+def account_key(cookies: Dict[str, str]) -> str:
+    """Stable, non-reversible account id derived from the li_at cookie"""
+    li_at = cookies.get("li_at", "")
+    if not li_at:
+        return "anonymous"
+    return hashlib.sha256(li_at.encode("utf-8")).hexdigest()[:12]
+
+def blocked_url_state(url: str) -> Optional[PageState]:
+    """Blocking state implied by the URL a request ended up on, None for any other page"""
+    path = urlsplit(url or "").path
+    return next((state for pattern, state in BLOCKED_PATHS if pattern.search(path)), None)
+
+def detect_access_block(content: str) -> Optional[PageState]:
+    """Blocking page state of a response, None when the page may have results"""
+    marker = _MARKER_RE.search(content[:_MARKER_WINDOW])
+    if marker:
+        try:
+            state = PageState(marker.group(1))
+        except ValueError:
+            state = None
+        if state in BLOCKING_STATES:
+            return state
+
+    page = classify_page(content)
+    # Result cards mean the account has access, whatever hints the page also carries
+    if page.has("results"):
+        return None
+    return page.state if page.state in BLOCKING_STATES else None
+
+def access_failure(url: str, state: PageState, account: str, from_circuit: bool = False) -> Dict:
+    """Typed failure result for a blocked account, shaped like the scrapers' error dicts"""
+    reason = "circuit open for account" if from_circuit else "access blocked"
+    return {
+        "success": False,
+        "results": [],
+        "profiles": [],
+        "total_found": 0,
+        "error": f"{reason}: {state.value}",
+        "error_type": "access_blocked",
+        "page_state": state.value,
+        "account": account,
+        "circuit_open": True,
+        "url": url
+    }
+
+class AccountCircuitBreaker:
+    """Persistent per-account circuits opened by blocking page states"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CIRCUIT_PATH):
+        self.path = path
+        # account -> {"state", "opened_at", "until", "url"}
+        self.circuits: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_CIRCUIT_PATH) -> "AccountCircuitBreaker":
+        """Load open circuits from disk, starting empty if missing or unreadable"""
+        breaker = cls(path=path)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    breaker.circuits = json.load(f).get("circuits", {})
+            except Exception as e:
+                log.warning(f"Could not load account circuits from {path}: {e}")
+        return breaker
+
+    def save(self) -> None:
+        """Write circuits to disk atomically"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "circuits": self.circuits}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def open(self, account: str, state: PageState, url: str = "") -> None:
+        """Open the circuit for an account after a blocking page"""
+        now = time.time()
+        self.circuits[account] = {
+            "state": state.value,
+            "opened_at": now,
+            "until": now + COOLDOWNS.get(state, 3600),
+            "url": url
+        }
+        log.warning(f"🔌 Circuit opened for account {account}: {state.value}")
+
+    def blocked_state(self, account: str) -> Optional[PageState]:
+        """State that opened the account's circuit, None when closed or expired"""
+        circuit = self.circuits.get(account)
+        if not circuit:
+            return None
+        if circuit["until"] <= time.time():
+            del self.circuits[account]
+            return None
+        return PageState(circuit["state"])
+
+    def close(self, account: str) -> None:
+        self.circuits.pop(account, None)
+
+# Shared instance used by the scraper scripts
+ACCOUNT_BREAKER = AccountCircuitBreaker.load()
+
+if __name__ == "__main__":
+    if "--reset" in sys.argv[1:]:
+        ACCOUNT_BREAKER.circuits.clear()
+        ACCOUNT_BREAKER.save()
+        print("✅ All account circuits closed")
+        sys.exit(0)
+
+    now = time.time()
+    print(f"🔌 Account circuits ({ACCOUNT_BREAKER.path})")
+    for account, circuit in ACCOUNT_BREAKER.circuits.items():
+        remaining = max(0, circuit["until"] - now)
+        print(f"  {account}: {circuit['state']} for another {remaining / 60:.0f} min ({circuit.get('url', '')})")
+    if not ACCOUNT_BREAKER.circuits:
+        print("  none open")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Compiled single-pass extractor for Sales Navigator result containers
+
+`extract_profile_from_container` issues up to eight parsel CSS queries per
+field and `extract_profiles_comprehensive` repeats that for every container
+selector, so the same result node is processed several times per page.
+
+This module compiles the same selector chains once into lxml XPath objects:
+
+- all field rules for a container are folded into a single XPath expression
+  that returns the first match of every rule in one evaluation, and the
+  first non-empty rule per field wins (the same first-match semantics as
+  the parsel cascade)
+- every container node is extracted once, even when several container
+  selectors match it
+
+The output is the same list of profile dicts that
+`extract_profiles_comprehensive` returns.
+
+Usage (benchmark against the parsel cascade):
+    python scripts/sales_nav_compiled_extractor.py --corpus tmp/debug
+"""
+
+import sys
+import argparse
+from typing import Dict, List, Optional, Tuple, Union
+from lxml import etree
+from parsel import Selector
+from parsel.csstranslator import HTMLTranslator
+from loguru import logger as log
+
+from sales_nav_selector_stats import SELECTOR_STATS, SelectorStats
+from sales_navigator_advanced import (
+    CONTAINER_SELECTORS,
+    EXPECTED_PAGE_SIZE,
+    FIELD_CHAINS,
+    RESULT_CARD_SELECTORS,
+    extract_profiles_comprehensive,
+    extract_profiles_fallback,
+)
+from sales_nav_identity import dedupe_leads
+
+# Private-use code point separating rule values in the combined expression
+_SEPARATOR = "\ue000"
+
+_TRANSLATOR = HTMLTranslator()
+
+def css_to_xpath(css: str) -> str:
+    """Translate a parsel CSS selector (including ::text / ::attr) to XPath"""
+    return _TRANSLATOR.css_to_xpath(css)
+
+class CompiledContainerExtractor:
+    """Field rules for a result container compiled into one XPath expression"""
+
+    def __init__(self, field_chains: List[Tuple[str, str, List[str]]] = None):
+        self.field_chains = field_chains or FIELD_CHAINS
+
+        # (field, selector) for every value returned by the expression
+        self._slots: List[Tuple[str, str]] = []
+        parts = []
+        for field, _, selectors in self.field_chains:
+            for css in selectors:
+                parts.append(f"string(({css_to_xpath(css)})[1])")
+                self._slots.append((field, css))
+
+        joined = f", '{_SEPARATOR}', ".join(parts)
+        self.expression = f"concat({joined}, '')"
+        self._xpath = etree.XPath(self.expression)
+
+    def extract_fields(self, element, stats: SelectorStats) -> Dict[str, str]:
+        """Evaluate every rule once, then pick the first non-empty value per field"""
+        values = dict(zip(self._slots, self._xpath(element).split(_SEPARATOR)))
+        fields = {}
+
+        for field, chain, selectors in self.field_chains:
+            # Same first-match semantics and adaptive order as the parsel cascade
+            order = stats.ordered(chain, selectors)
+            fields[field] = ""
+            winner = None
+            for position, css in enumerate(order):
+                value = values[(field, css)]
+                if field == "profile_url":
+                    # URLs are taken as-is, like the parsel cascade does
+                    if value:
+                        fields[field], winner = value, position
+                        break
+                elif value.strip():
+                    fields[field], winner = value.strip(), position
+                    break
+            stats.record_cascade(chain, order, winner)
+
+        url = fields.get("profile_url", "")
+        if url and not url.startswith('http'):
+            fields["profile_url"] = 'https://www.linkedin.com' + url
+
+        return fields
+
+class CompiledProfileExtractor:
+    """Drop-in replacement for `extract_profiles_comprehensive`"""
+
+    def __init__(self, container_selectors: List[str] = None, field_chains: List[Tuple[str, str, List[str]]] = None,
+                 stats: Optional[SelectorStats] = None):
+        self.container_selectors = container_selectors or CONTAINER_SELECTORS
+        self._container_xpaths = {
+            css: etree.XPath(css_to_xpath(css)) for css in self.container_selectors
+        }
+        self.container = CompiledContainerExtractor(field_chains)
+        self.stats = stats
+
+    def extract(self, selector: Union[Selector, str]) -> List[Dict]:
+        """Extract and dedupe profiles, visiting each container node once"""
+        if isinstance(selector, str):
+            selector = Selector(text=selector)
+
+        stats = self.stats or SELECTOR_STATS
+        root = selector.root
+        extracted: Dict[object, Optional[Dict[str, str]]] = {}
+        profiles = []
+
+        order = stats.ordered("advanced.container", self.container_selectors)
+        tried, yields = [], []
+        for container_selector in order:
+            found = 0
+            for idx, container in enumerate(self._container_xpaths[container_selector](root)):
+                if container not in extracted:
+                    fields = self.container.extract_fields(container, stats)
+                    extracted[container] = fields if fields.get("name") else None
+
+                fields = extracted[container]
+                if fields:
+                    profiles.append({
+                        "name": fields["name"],
+                        "title": fields.get("title", ""),
+                        "company": fields.get("company", ""),
+                        "location": fields.get("location", ""),
+                        "profile_url": fields.get("profile_url", ""),
+                        "extraction_method": f"container_{container_selector}",
+                        "result_index": idx
+                    })
+                    found += 1
+            tried.append(container_selector)
+            yields.append(found)
+
+            # Same stopping rule as extract_profiles_comprehensive
+            if found and (container_selector in RESULT_CARD_SELECTORS or len(dedupe_leads(profiles)) >= EXPECTED_PAGE_SIZE):
+                break
+
+        stats.record_scan("advanced.container", tried, yields)
+        stats.finish_run()
+
+        if not profiles:
+            profiles = extract_profiles_fallback(selector)
+
+        return dedupe_leads(profiles)
+
+_DEFAULT_EXTRACTOR = None
+
+def extract_profiles_compiled(selector: Union[Selector, str]) -> List[Dict]:
+    """Module-level entry point using a lazily compiled default extractor"""
+    global _DEFAULT_EXTRACTOR
+    if _DEFAULT_EXTRACTOR is None:
+        _DEFAULT_EXTRACTOR = CompiledProfileExtractor()
+    return _DEFAULT_EXTRACTOR.extract(selector)
+
+def main() -> int:
+    from sales_nav_corpus import (
+        DEFAULT_CORPUS,
+        load_corpus,
+        quiet_extractors,
+        benchmark_extractor,
+        print_report,
+        benchmark_dom_build,
+    )
+
+    parser = argparse.ArgumentParser(description="Benchmark the compiled extractor against the parsel cascade")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, limit=args.limit)
+    if not pages:
+        log.error(f"❌ No HTML pages found in {args.corpus}")
+        return 1
+
+    # Verify both paths return identical profiles before comparing speed; each
+    # path gets its own in-memory stats so they see the same selector order
+    cascade_stats = SelectorStats(path=None)
+    compiled = CompiledProfileExtractor(stats=SelectorStats(path=None))
+    mismatches = 0
+    with quiet_extractors():
+        for page in pages:
+            if extract_profiles_comprehensive(page.selector, cascade_stats) != compiled.extract(page.selector):
+                mismatches += 1
+                log.warning(f"⚠️ Output differs on {page.name}")
+
+    report = {
+        "corpus_pages": len(pages),
+        "corpus_bytes": sum(len(p.content) for p in pages),
+        "dom_build": benchmark_dom_build(pages),
+        "extractors": {
+            "parsel_cascade": benchmark_extractor(
+                "parsel_cascade", lambda page: extract_profiles_comprehensive(page.selector, cascade_stats), pages, repeat=args.repeat
+            ),
+            "compiled_lxml": benchmark_extractor(
+                "compiled_lxml", lambda page: compiled.extract(page.selector), pages, repeat=args.repeat
+            ),
+        },
+    }
+    print_report(report)
+
+    cascade_ms = report["extractors"]["parsel_cascade"]["ms_per_page"]
+    compiled_ms = report["extractors"]["compiled_lxml"]["ms_per_page"]
+    if compiled_ms:
+        print(f"\n🚀 Speedup: {cascade_ms / compiled_ms:.1f}x")
+    print(f"{'✅' if not mismatches else '❌'} Output mismatches: {mismatches}/{len(pages)}")
+
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
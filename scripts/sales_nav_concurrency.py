@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+AIMD concurrency control for Scrapfly calls
+
+Concurrency used to be 1 (sequential loops) or the client's fixed
+`max_concurrency`, whatever Scrapfly answered. `AIMDLimiter` adapts the
+number of requests in flight the way TCP adapts its window:
+
+- every successful call raises the limit additively, by `increase` per full
+  window of successes (so +1 per round trip at the current limit)
+- a throttling or error signal cuts the limit multiplicatively (`decrease`)
+  - throttling: TooManyConcurrentRequest, TooManyRequest, ScrapflyThrottleError,
+    an upstream 429 or LinkedIn's 999
+  - errors: ScrapflyAspError, ScrapflyProxyError, Scrapfly 5xx, upstream 5xx,
+    network timeouts
+  - slow calls: latency above `slow_ms` (renders stuck behind a saturated plan)
+- one cut per congestion window: calls that started before the last cut
+  cannot cut again, so a burst of 429s halves the limit once, not ten times
+- a Scrapfly `retry_delay` pauses new calls until it has passed
+- the limit stays within [`min_limit`, `max_limit`]
+
+Other errors (404, bad config, quota exhausted) are neutral. The current
+limit, in-flight count, decision counters and a history of limit changes
+are exposed through `metrics()`; the last limit is persisted so the next run
+starts near what the account plan allowed.
+
+Usage:
+    from sales_nav_concurrency import SCRAPFLY_LIMITER, limited_scrape
+
+    response = await limited_scrape(SCRAPFLY, config)
+    async with SCRAPFLY_LIMITER.acquire():
+        response = await SCRAPFLY.async_scrape(config)
+    SCRAPFLY_LIMITER.save()
+
+    python scripts/sales_nav_concurrency.py   # print the persisted limit and decisions
+"""
+
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from loguru import logger as log
+from scrapfly import ScrapeConfig, ScrapflyClient
+from scrapfly.errors import (
+    ApiHttpServerError,
+    QuotaLimitReached,
+    ScrapflyAspError,
+    ScrapflyError,
+    ScrapflyProxyError,
+    ScrapflyThrottleError,
+    TooManyConcurrentRequest,
+    TooManyRequest,
+    UpstreamHttpClientError,
+    UpstreamHttpServerError,
+)
+
+DEFAULT_LIMITER_PATH = os.environ.get("SCRAPFLY_LIMITER_PATH", "tmp/scrapfly_concurrency.json")
+
+THROTTLE = "throttle"
+ERROR = "error"
+SLOW = "slow"
+SUCCESS = "success"
+NEUTRAL = "neutral"
+
+# Upstream status codes that mean "slow down": 429, and LinkedIn's 999
+UPSTREAM_THROTTLE_STATUSES = (429, 999)
+
+# Limit changes kept for metrics
+HISTORY_SIZE = 500
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception from a Scrapfly call to a congestion signal"""
+    if isinstance(error, (TooManyConcurrentRequest, TooManyRequest, ScrapflyThrottleError)):
+        return THROTTLE
+    if isinstance(error, QuotaLimitReached):
+        # The plan is used up; fewer requests in flight would not help
+        return NEUTRAL
+    if isinstance(error, UpstreamHttpServerError):
+        return ERROR
+    if isinstance(error, UpstreamHttpClientError):
+        status = getattr(error, "http_status_code", None)
+        api_response = getattr(error, "api_response", None)
+        if api_response is not None:
+            status = (api_response.scrape_result or {}).get("status_code", status)
+        return THROTTLE if status in UPSTREAM_THROTTLE_STATUSES else NEUTRAL
+    if isinstance(error, (ScrapflyAspError, ScrapflyProxyError, ApiHttpServerError)):
+        return ERROR
+    if isinstance(error, ScrapflyError):
+        return NEUTRAL
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return ERROR
+    return NEUTRAL
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease limit on calls in flight"""
+
+    def __init__(self, initial: int = 2, min_limit: int = 1, max_limit: int = 32, increase: float = 1.0,
+                 decrease: float = 0.5, slow_ms: Optional[float] = None, path: Optional[str] = DEFAULT_LIMITER_PATH):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_ms = slow_ms
+        self.path = path
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.last_cut_at = 0.0
+        self.paused_until = 0.0
+        self.decisions = {"increase": 0, "decrease": 0, "suppressed": 0, "neutral": 0}
+        self.signals = {THROTTLE: 0, ERROR: 0, SLOW: 0, SUCCESS: 0, NEUTRAL: 0}
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_LIMITER_PATH, **kwargs) -> "AIMDLimiter":
+        """Start from the limit reached by the previous run, if any"""
+        limiter = cls(path=path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                limiter._limit = float(min(max(saved.get("limit", limiter._limit), limiter.min_limit), limiter.max_limit))
+            except Exception as e:
+                log.warning(f"Could not load concurrency state from {path}: {e}")
+        return limiter
+
+    def save(self) -> None:
+        """Write the current limit and counters to disk atomically"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), **self.metrics()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _cond(self) -> asyncio.Condition:
+        # Created lazily so the condition binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _set_limit(self, value: float, decision: str, reason: str) -> None:
+        previous = self.limit
+        self._limit = min(max(value, float(self.min_limit)), float(self.max_limit))
+        self.decisions[decision] += 1
+        if self.limit != previous:
+            self.history.append({"at": round(time.time(), 3), "limit": self.limit, "decision": decision, "reason": reason})
+            log.debug(f"🎚️ Concurrency {previous} -> {self.limit} ({decision}: {reason})")
+
+    def record(self, signal: str, started_at: float, reason: str = "", retry_delay: Optional[float] = None) -> None:
+        """Apply one call's outcome to the limit"""
+        self.signals[signal] += 1
+        if signal == SUCCESS:
+            # +increase per full window of successes
+            self._set_limit(self._limit + self.increase / max(self._limit, 1.0), "increase", reason or "success")
+        elif signal in (THROTTLE, ERROR, SLOW):
+            if retry_delay:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_delay)
+            if started_at < self.last_cut_at:
+                # Started under the old limit: already accounted for by the last cut
+                self.decisions["suppressed"] += 1
+                return
+            self.last_cut_at = time.monotonic()
+            self._set_limit(self._limit * self.decrease, "decrease", reason or signal)
+            # Persist cuts right away; a run that dies on throttling should not restart at the old limit
+            self.save()
+        else:
+            self.decisions["neutral"] += 1
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Hold one in-flight slot for the duration of a call, classifying its outcome"""
+        condition = self._cond()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            if not isinstance(e, asyncio.CancelledError):
+                retry_delay = getattr(e, "retry_delay", None) if isinstance(e, ScrapflyError) else None
+                self.record(classify_error(e), started, type(e).__name__, retry_delay)
+            raise
+        else:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            if self.slow_ms and elapsed_ms > self.slow_ms:
+                self.record(SLOW, started, f"{elapsed_ms:.0f} ms")
+            else:
+                self.record(SUCCESS, started)
+        finally:
+            async with condition:
+                self.in_flight -= 1
+                condition.notify_all()
+
+    def metrics(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "decisions": dict(self.decisions),
+            "signals": dict(self.signals),
+            "history": list(self.history),
+        }
+
+# Shared limiter used by the scraper scripts
+SCRAPFLY_LIMITER = AIMDLimiter.load(
+    max_limit=int(os.environ.get("SCRAPFLY_MAX_CONCURRENCY", 32)),
+    slow_ms=float(os.environ.get("SCRAPFLY_SLOW_MS", 60000))
+)
+
+def size_executor(client: ScrapflyClient, workers: int) -> None:
+    """`async_scrape` runs on the client's thread pool; make sure it cannot cap the limit"""
+    executor = client.async_executor
+    if getattr(executor, "_max_workers", 0) < workers:
+        client.async_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrapfly")
+        executor.shutdown(wait=False)
+
+async def limited_scrape(client: ScrapflyClient, config: ScrapeConfig, limiter: Optional[AIMDLimiter] = None):
+    """`client.async_scrape` under the adaptive concurrency limit"""
+    limiter = limiter or SCRAPFLY_LIMITER
+    size_executor(client, limiter.max_limit)
+    async with limiter.acquire():
+        return await client.async_scrape(config)
+
+if __name__ == "__main__":
+    if not os.path.exists(DEFAULT_LIMITER_PATH):
+        print(f"No concurrency state at {DEFAULT_LIMITER_PATH}")
+    else:
+        with open(DEFAULT_LIMITER_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        print(f"🎚️ Scrapfly concurrency ({DEFAULT_LIMITER_PATH})")
+        print(f"  limit {state['limit']} (bounds {state['min_limit']}-{state['max_limit']}), peak in flight {state['peak_in_flight']}")
+        print(f"  decisions: {state['decisions']}")
+        print(f"  signals:   {state['signals']}")
+        for change in state["history"][-10:]:
+            print(f"  {time.strftime('%H:%M:%S', time.localtime(change['at']))} -> {change['limit']} ({change['decision']}: {change['reason']})")
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Offline replay and parse benchmark for captured Sales Navigator pages
+
+Re-runs the extractors from the scraper scripts over HTML pages that were
+saved to tmp/debug (*.html, or compressed *.html.zst / *.html.gz debug
+captures), any other directory or a page pack (*.pack, see
+sales_nav_corpus_pack.py), without calling ScrapFly. For every
+extractor it reports pages/sec, ms per page, profiles found and peak Python
+memory, so it can be used as a regression benchmark whenever extraction code
+changes.
+
+Usage:
+    python scripts/sales_nav_corpus.py
+    python scripts/sales_nav_corpus.py --corpus tmp/debug --repeat 3
+    python scripts/sales_nav_corpus.py --corpus tmp/corpus.pack
+    python scripts/sales_nav_corpus.py --output tmp/corpus_benchmark.json
+    python scripts/sales_nav_corpus.py --baseline tmp/corpus_benchmark.json
+"""
+
+import os
+import io
+import sys
+import json
+import glob
+import time
+import argparse
+import tracemalloc
+import contextlib
+from typing import Callable, Dict, List, Optional
+from parsel import Selector
+from loguru import logger as log
+
+from sales_nav_debug_capture import CAPTURE_SUFFIXES, read_capture
+from sales_nav_corpus_pack import PackReader, is_pack
+from sales_nav_response import PageResponse
+
+# Extractor modules log through loguru; silence them while benchmarking
+EXTRACTOR_MODULES = [
+    "sales_navigator_advanced",
+    "sales_nav_working",
+    "sales_nav_simple",
+    "sales_navigator_scrapfly",
+    "sales_nav_compiled_extractor",
+]
+
+DEFAULT_CORPUS = "tmp/debug"
+
+def _page_name(file_path: str) -> str:
+    name = os.path.basename(file_path)
+    for suffix in CAPTURE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)] + ".html"
+    return name
+
+def _load_pack(path: str, limit: Optional[int] = None) -> List[PageResponse]:
+    reader = PackReader(path)
+    pages = []
+    try:
+        for key, meta, content in reader.iter_records():
+            if limit and len(pages) >= limit:
+                break
+            pages.append(PageResponse(content, url=meta.get("url") or f"pack://{key}", name=_page_name(key)))
+    finally:
+        reader.close()
+    return pages
+
+def load_corpus(path: str = DEFAULT_CORPUS, limit: Optional[int] = None) -> List[PageResponse]:
+    """Load saved HTML pages and compressed debug captures from a directory (recursively), a single file or a pack"""
+    if is_pack(path):
+        return _load_pack(path, limit)
+    if os.path.isfile(path):
+        files = [path]
+    else:
+        files = sorted(
+            file_path
+            for pattern in ("*.html",) + tuple(f"*{suffix}" for suffix in CAPTURE_SUFFIXES)
+            for file_path in glob.glob(os.path.join(path, "**", pattern), recursive=True)
+        )
+
+    if limit:
+        files = files[:limit]
+
+    pages = []
+    for file_path in files:
+        try:
+            content = read_capture(file_path)
+        except Exception as e:
+            log.warning(f"Skipping {file_path}: {e}")
+            continue
+        pages.append(PageResponse(content, url=f"file://{os.path.abspath(file_path)}", name=_page_name(file_path)))
+
+    return pages
+
+def _extract_comprehensive(page: PageResponse) -> List[Dict]:
+    from sales_navigator_advanced import extract_profiles_comprehensive
+    return extract_profiles_comprehensive(page.selector)
+
+def _extract_sales_nav(page: PageResponse) -> List[Dict]:
+    from sales_nav_working import extract_sales_nav_profiles
+    return extract_sales_nav_profiles(page.selector)
+
+def _extract_any(page: PageResponse) -> List[Dict]:
+    from sales_nav_simple import extract_any_profiles
+    return extract_any_profiles(page.content, page.selector)
+
+def _parse_search(page: PageResponse) -> List[Dict]:
+    from sales_navigator_scrapfly import parse_sales_navigator_search
+    return parse_sales_navigator_search(page)["results"]
+
+def _extract_compiled(page: PageResponse) -> List[Dict]:
+    from sales_nav_compiled_extractor import extract_profiles_compiled
+    return extract_profiles_compiled(page.selector)
+
+_PLAN_CACHE = None
+
+def _extract_planned(page: PageResponse) -> List[Dict]:
+    # In-memory plan cache shared across the corpus, never written to disk
+    global _PLAN_CACHE
+    from sales_navigator_advanced import extract_profiles_planned
+    from sales_nav_layout_cache import PlanCache
+    if _PLAN_CACHE is None:
+        _PLAN_CACHE = PlanCache(path=None)
+    return extract_profiles_planned(page.selector, _PLAN_CACHE)[0]
+
+# name -> callable(page) returning a list of profile dicts
+EXTRACTORS: Dict[str, Callable[[PageResponse], List[Dict]]] = {
+    "extract_profiles_comprehensive": _extract_comprehensive,
+    "extract_sales_nav_profiles": _extract_sales_nav,
+    "extract_any_profiles": _extract_any,
+    "parse_sales_navigator_search": _parse_search,
+    "extract_profiles_compiled": _extract_compiled,
+    "extract_profiles_planned": _extract_planned,
+}
+
+def register_extractor(name: str, func: Callable[[PageResponse], List[Dict]]) -> None:
+    """Register an additional extractor to be included in the benchmark"""
+    EXTRACTORS[name] = func
+
+@contextlib.contextmanager
+def quiet_extractors():
+    """Suppress print() and loguru output from the extractor modules"""
+    for module in EXTRACTOR_MODULES:
+        log.disable(module)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        for module in EXTRACTOR_MODULES:
+            log.enable(module)
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _fresh_pages(pages: List[PageResponse]) -> List[PageResponse]:
+    """Copy pages so every extractor pays for its own DOM construction"""
+    return [PageResponse(p.content, url=p.url, name=p.name, status_code=p.status_code) for p in pages]
+
+def benchmark_dom_build(pages: List[PageResponse], repeat: int = 1) -> Dict:
+    """Measure the cost of building the parsel/lxml tree on its own"""
+    timings = []
+    for _ in range(repeat):
+        for page in pages:
+            started = time.perf_counter()
+            Selector(text=page.content)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    total_s = sum(timings) / 1000
+    return {
+        "pages": len(pages),
+        "pages_per_sec": round(len(timings) / total_s, 2) if total_s else 0.0,
+        "ms_per_page": round(sum(timings) / len(timings), 3) if timings else 0.0,
+        "p95_ms": round(_percentile(timings, 95), 3),
+    }
+
+def benchmark_extractor(name: str, func: Callable, pages: List[PageResponse], repeat: int = 1) -> Dict:
+    """Run one extractor over the corpus and collect timing and memory stats"""
+    timings = []
+    profiles_found = 0
+    errors = 0
+    per_page = {}
+
+    # Timing pass: selectors are built up front so only extraction is measured
+    with quiet_extractors():
+        for run in range(repeat):
+            run_pages = _fresh_pages(pages)
+            for page in run_pages:
+                page.selector
+            for page in run_pages:
+                started = time.perf_counter()
+                try:
+                    profiles = func(page)
+                except Exception as e:
+                    errors += 1
+                    profiles = []
+                    log.debug(f"{name} failed on {page.name}: {e}")
+                timings.append((time.perf_counter() - started) * 1000)
+
+                if run == 0:
+                    profiles_found += len(profiles)
+                    per_page[page.name] = len(profiles)
+
+    # Memory pass: tracked separately because tracemalloc skews timings
+    with quiet_extractors():
+        tracemalloc.start()
+        try:
+            for page in _fresh_pages(pages):
+                try:
+                    func(page)
+                except Exception:
+                    pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    total_s = sum(timings) / 1000
+    return {
+        "extractor": name,
+        "pages": len(pages),
+        "pages_per_sec": round(len(timings) / total_s, 2) if total_s else 0.0,
+        "ms_per_page": round(sum(timings) / len(timings), 3) if timings else 0.0,
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "profiles_found": profiles_found,
+        "errors": errors,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "profiles_per_page": per_page,
+    }
+
+def run_corpus_benchmark(pages: List[PageResponse], extractors: Optional[List[str]] = None, repeat: int = 1) -> Dict:
+    """Benchmark every registered (or selected) extractor over the corpus"""
+    selected = extractors or list(EXTRACTORS.keys())
+    results = {}
+
+    for name in selected:
+        log.info(f"⏱️ Benchmarking {name} over {len(pages)} pages...")
+        results[name] = benchmark_extractor(name, EXTRACTORS[name], pages, repeat=repeat)
+
+    return {
+        "corpus_pages": len(pages),
+        "corpus_bytes": sum(len(p.content) for p in pages),
+        "repeat": repeat,
+        "benchmarked_at": time.time(),
+        "dom_build": benchmark_dom_build(pages, repeat=repeat),
+        "extractors": results,
+    }
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float = 0.15) -> List[str]:
+    """List regressions against a previous report (fewer profiles or slower pages)"""
+    regressions = []
+
+    for name, current in report["extractors"].items():
+        previous = baseline.get("extractors", {}).get(name)
+        if not previous:
+            continue
+
+        if current["profiles_found"] < previous["profiles_found"]:
+            regressions.append(
+                f"{name}: profiles_found dropped {previous['profiles_found']} -> {current['profiles_found']}"
+            )
+
+        for page_name, count in previous.get("profiles_per_page", {}).items():
+            now = current.get("profiles_per_page", {}).get(page_name)
+            if now is not None and now < count:
+                regressions.append(f"{name}: {page_name} dropped {count} -> {now} profiles")
+
+        if previous["ms_per_page"] and current["ms_per_page"] > previous["ms_per_page"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: ms_per_page rose {previous['ms_per_page']} -> {current['ms_per_page']}"
+            )
+
+    return regressions
+
+def print_report(report: Dict) -> None:
+    """Print a compact table of the benchmark report"""
+    dom = report["dom_build"]
+    print(f"\n📚 Corpus: {report['corpus_pages']} pages, {report['corpus_bytes'] / 1024 / 1024:.1f} MB")
+    print(f"🌳 DOM build: {dom['ms_per_page']} ms/page ({dom['pages_per_sec']} pages/sec)")
+    print(f"\n{'extractor':<34}{'pages/s':>10}{'ms/page':>10}{'p95 ms':>10}{'profiles':>10}{'peak KB':>12}")
+    for name, stats in report["extractors"].items():
+        print(
+            f"{name:<34}{stats['pages_per_sec']:>10}{stats['ms_per_page']:>10}"
+            f"{stats['p95_ms']:>10}{stats['profiles_found']:>10}{stats['peak_memory_kb']:>12}"
+        )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay extractors over a captured HTML corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of saved *.html pages, or a *.pack")
+    parser.add_argument("--limit", type=int, default=None, help="Only load the first N pages")
+    parser.add_argument("--repeat", type=int, default=1, help="Timing passes over the corpus")
+    parser.add_argument("--extractor", action="append", help="Only run the named extractor(s)")
+    parser.add_argument("--output", default="tmp/corpus_benchmark.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed ms/page slowdown vs baseline")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, limit=args.limit)
+    if not pages:
+        log.error(f"❌ No HTML pages found in {args.corpus}")
+        return 1
+
+    unknown = [name for name in (args.extractor or []) if name not in EXTRACTORS]
+    if unknown:
+        log.error(f"❌ Unknown extractor(s): {unknown}. Available: {list(EXTRACTORS)}")
+        return 1
+
+    report = run_corpus_benchmark(pages, extractors=args.extractor, repeat=args.repeat)
+    print_report(report)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, tolerance=args.tolerance)
+        if regressions:
+            print("\n❌ REGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            exit_code = 1
+        else:
+            print("\n✅ No regressions against baseline")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        log.info(f"💾 Report saved to: {args.output}")
+
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
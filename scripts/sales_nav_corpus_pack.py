@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Append-only pack file for captured Sales Navigator pages
+
+Replaying thousands of loose files under tmp/debug costs an open, a stat and
+a full read per page before any parsing starts. A pack keeps every page in
+one file instead:
+
+    corpus.pack      records appended back to back:
+                     header (magic, codec, meta length, data length),
+                     metadata JSON, compressed page
+    corpus.pack.idx  one JSON line per record: key, offset, lengths, codec and
+                     the metadata (url, captured_at, sha1, layout fingerprint,
+                     extraction outcome)
+
+Each record is compressed on its own (zstd when installed, else zlib), so
+any page can be read without touching its neighbours. `PackReader` maps the
+pack with mmap and decompresses straight from the mapped memory, giving
+random access by key and sequential iteration in file order. The index is
+appended after its record is on disk; readers rebuild a missing or short
+index by scanning the pack and ignore a torn record at the end, and the next
+writer truncates the torn record and saves the rebuilt index.
+
+Usage:
+    with PackWriter("tmp/corpus.pack") as pack:
+        pack.append(key, html, {"url": url, "total_found": 25})
+
+    reader = PackReader("tmp/corpus.pack")
+    html = reader.get(key)
+    for key, meta, html in reader.iter_records():
+        ...
+
+    python scripts/sales_nav_corpus_pack.py build tmp/debug tmp/corpus.pack
+    python scripts/sales_nav_corpus_pack.py ls tmp/corpus.pack
+    python scripts/sales_nav_corpus_pack.py get tmp/corpus.pack <key>
+    python scripts/sales_nav_corpus.py --corpus tmp/corpus.pack
+"""
+
+import os
+import sys
+import glob
+import json
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import argparse
+from typing import Dict, Iterator, List, Optional, Tuple
+from loguru import logger as log
+
+from sales_nav_debug_capture import CAPTURE_SUFFIXES, read_capture
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+
+MAGIC = b"SNPK"
+# magic, codec, metadata length, data length
+HEADER = struct.Struct("<4sBIQ")
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {CODEC_RAW: "raw", CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+
+def default_codec() -> int:
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+def encode(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, 6)
+    return data
+
+def decode(data, codec: int) -> bytes:
+    """Decompress a record body; `data` may be a memoryview into the mapped pack"""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd records")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    return data
+
+class PackWriter:
+    """Appends compressed pages and their index entries"""
+
+    def __init__(self, path: str, codec: Optional[int] = None, fsync: bool = False):
+        self.path = path
+        self.codec = default_codec() if codec is None else codec
+        self.fsync = fsync
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path):
+            self._repair()
+        self._pack = open(path, "ab")
+        self._index = open(path + INDEX_SUFFIX, "a", encoding="utf-8")
+        self.records = 0
+
+    def _repair(self) -> None:
+        """Drop a torn record at the end and persist an index the reader had to rebuild"""
+        reader = PackReader(self.path)
+        entries = sorted(reader.index.values(), key=lambda e: e["offset"])
+        end, size, rebuilt = reader.end, len(reader._view), reader.rebuilt
+        reader.close()
+
+        if end < size:
+            log.warning(f"Truncating {size - end} bytes of a torn record from {self.path}")
+            os.truncate(self.path, end)
+        if rebuilt:
+            tmp_path = f"{self.path}{INDEX_SUFFIX}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            os.replace(tmp_path, self.path + INDEX_SUFFIX)
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, key: str, content: str, meta: Optional[Dict] = None) -> Dict:
+        """Append one page; a later record with the same key replaces it for readers"""
+        raw = content.encode("utf-8")
+        meta = {"key": key, "sha1": hashlib.sha1(raw).hexdigest(), "content_bytes": len(raw), **(meta or {})}
+        meta.setdefault("captured_at", time.time())
+        meta_bytes = json.dumps(meta, ensure_ascii=False, default=str).encode("utf-8")
+        data = encode(raw, self.codec)
+
+        offset = self._pack.seek(0, os.SEEK_END)
+        self._pack.write(HEADER.pack(MAGIC, self.codec, len(meta_bytes), len(data)))
+        self._pack.write(meta_bytes)
+        self._pack.write(data)
+        self._pack.flush()
+        if self.fsync:
+            os.fsync(self._pack.fileno())
+
+        # Index only after the record is written, so it never points past the data
+        entry = {**meta, "offset": offset, "meta_len": len(meta_bytes), "data_len": len(data), "codec": self.codec}
+        self._index.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._index.flush()
+        self.records += 1
+        return entry
+
+    def close(self) -> None:
+        self._pack.close()
+        self._index.close()
+
+def scan_pack(buffer) -> Iterator[Dict]:
+    """Index entries for every complete record in a pack buffer"""
+    offset = 0
+    size = len(buffer)
+    while offset + HEADER.size <= size:
+        magic, codec, meta_len, data_len = HEADER.unpack_from(buffer, offset)
+        end = offset + HEADER.size + meta_len + data_len
+        if magic != MAGIC or end > size:
+            # Torn write at the tail (or garbage): stop at the last good record
+            break
+        meta = json.loads(bytes(buffer[offset + HEADER.size:offset + HEADER.size + meta_len]))
+        yield {**meta, "offset": offset, "meta_len": meta_len, "data_len": data_len, "codec": codec}
+        offset = end
+
+class PackReader:
+    """Memory-mapped random and sequential access to a pack"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._view = memoryview(self._map)
+        self.index: Dict[str, Dict] = {}
+        # End of the last complete record, and whether the index file missed any
+        self.end = 0
+        self.rebuilt = False
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries: List[Dict] = []
+        index_path = self.path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break
+
+        # Drop entries past the end of the pack, then pick up records the index missed
+        entries = [e for e in entries if e["offset"] + HEADER.size + e["meta_len"] + e["data_len"] <= len(self._view)]
+        indexed_end = max((e["offset"] + HEADER.size + e["meta_len"] + e["data_len"] for e in entries), default=0)
+        if indexed_end < len(self._view):
+            missing = list(scan_pack(self._view[indexed_end:]))
+            for entry in missing:
+                entry["offset"] += indexed_end
+            if missing:
+                log.info(f"Rebuilt {len(missing)} index entries for {self.path}")
+                self.rebuilt = True
+            entries.extend(missing)
+
+        self.end = max((e["offset"] + HEADER.size + e["meta_len"] + e["data_len"] for e in entries), default=0)
+        for entry in entries:
+            self.index[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def keys(self) -> List[str]:
+        return list(self.index)
+
+    def meta(self, key: str) -> Dict:
+        return self.index[key]
+
+    def get_bytes(self, key: str) -> bytes:
+        entry = self.index[key]
+        start = entry["offset"] + HEADER.size + entry["meta_len"]
+        return decode(self._view[start:start + entry["data_len"]], entry["codec"])
+
+    def get(self, key: str) -> str:
+        """Decompressed page by key"""
+        return str(self.get_bytes(key), "utf-8", "replace")
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict, str]]:
+        """(key, meta, html) for the live record of every key, in file order"""
+        for entry in sorted(self.index.values(), key=lambda e: e["offset"]):
+            yield entry["key"], entry, self.get(entry["key"])
+
+    def close(self) -> None:
+        self._view.release()
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+def is_pack(path: str) -> bool:
+    return path.endswith(PACK_SUFFIX) and os.path.isfile(path)
+
+def _sidecar_meta(file_path: str) -> Dict:
+    """Metadata from a debug capture's <key>.json, if there is one"""
+    base = os.path.basename(file_path).split(".", 1)[0]
+    meta_path = os.path.join(os.path.dirname(file_path), base + ".json")
+    if not os.path.exists(meta_path):
+        return {}
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return {}
+    return {
+        "url": meta.get("url"),
+        "captured_at": meta.get("captured_at"),
+        "layout_fingerprint": meta.get("layout_fingerprint"),
+        "total_found": meta.get("total_found"),
+        "failed": meta.get("failed"),
+    }
+
+def pack_directory(source: str, pack_path: str, layout: bool = False, codec: Optional[int] = None) -> int:
+    """Append every *.html page and debug capture under `source` that the pack does not hold yet"""
+    patterns = ("*.html",) + tuple(f"*{suffix}" for suffix in CAPTURE_SUFFIXES)
+    files = sorted(f for pattern in patterns for f in glob.glob(os.path.join(source, "**", pattern), recursive=True))
+
+    existing = set()
+    if os.path.exists(pack_path):
+        reader = PackReader(pack_path)
+        existing = set(reader.keys())
+        reader.close()
+
+    added = 0
+    with PackWriter(pack_path, codec=codec) as writer:
+        for file_path in files:
+            key = os.path.relpath(file_path, source)
+            if key in existing:
+                continue
+            content = read_capture(file_path)
+            meta = {"source_file": key, "captured_at": os.path.getmtime(file_path), **{
+                k: v for k, v in _sidecar_meta(file_path).items() if v is not None
+            }}
+            if layout and "layout_fingerprint" not in meta:
+                from parsel import Selector
+                from sales_nav_layout_cache import layout_fingerprint
+                meta["layout_fingerprint"] = layout_fingerprint(Selector(text=content))
+            writer.append(key, content, meta)
+            added += 1
+    return added
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build and inspect Sales Navigator page packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Append the pages of a directory to a pack")
+    build.add_argument("source")
+    build.add_argument("pack")
+    build.add_argument("--layout", action="store_true", help="Also compute layout fingerprints (parses every page)")
+    build.add_argument("--codec", choices=[name for name in CODEC_NAMES.values()], default=None,
+                       help="Record compression (default zstd, or zlib without zstandard; raw skips decompression on read)")
+
+    ls = commands.add_parser("ls", help="List the records of a pack")
+    ls.add_argument("pack")
+
+    get = commands.add_parser("get", help="Print one page")
+    get.add_argument("pack")
+    get.add_argument("key")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        codec = None if args.codec is None else {name: code for code, name in CODEC_NAMES.items()}[args.codec]
+        added = pack_directory(args.source, args.pack, layout=args.layout, codec=codec)
+        print(f"📦 Added {added} pages to {args.pack} in {time.perf_counter() - started:.1f} s")
+        return 0
+
+    reader = PackReader(args.pack)
+    if args.command == "ls":
+        raw = sum(e["content_bytes"] for e in reader.index.values())
+        packed = sum(e["data_len"] for e in reader.index.values())
+        print(f"📦 {args.pack}: {len(reader)} pages, {raw / 1024 / 1024:.1f} MB -> {packed / 1024 / 1024:.1f} MB")
+        for key, entry in sorted(reader.index.items(), key=lambda item: item[1]["offset"]):
+            outcome = "" if entry.get("total_found") is None else f" {entry['total_found']} profiles"
+            print(f"  {key}  {CODEC_NAMES.get(entry['codec'], '?')} {entry['data_len'] / 1024:.0f} KB{outcome}  {entry.get('url') or ''}")
+    else:
+        if args.key not in reader:
+            print(f"❌ No record {args.key} in {args.pack}")
+            return 1
+        sys.stdout.write(reader.get(args.key))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
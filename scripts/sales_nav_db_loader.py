@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Bulk loader for scraped leads into the app's `people` table
+
+Rails ingested scraper output one `Person.find_or_initialize_by(profile_url:)`
+/ `save` at a time. `LeadLoader` buffers leads and writes them in batches:
+
+- Postgres: each batch is COPYed into a temporary staging table, then one
+  INSERT ... SELECT ... ON CONFLICT (profile_url) DO UPDATE upserts it into
+  `people`, against the partial unique index on profile_url
+- SQLite (stand-in for tests and local runs): the same staging table and
+  upsert, filled with executemany
+
+A batch is written every `batch_size` leads, or once `flush_interval` seconds
+have passed since the last write (checked as leads arrive), and on close.
+Bulk SQL skips the model's before_validation callback, so profile URLs are
+normalized here exactly like `Person.normalize_linkedin_url`; leads without a
+LinkedIn URL are skipped, as are leads a crawl flagged `known_lead` (seen in
+an earlier run, see sales_nav_identity) unless `include_known` is set. On
+conflict, scraped fields only overwrite existing values when the new value is
+present. The `query` column gets the canonical search URL (sales_nav_query),
+so leads from the same search share it across sessions.
+
+Postgres needs psycopg2 (`pip install psycopg2-binary`). The default database
+is the Rails development database from the PG* environment variables
+(config/database.yml); SALES_NAV_DB_URL or DATABASE_URL override it.
+
+Usage:
+    with LeadLoader("sqlite:///tmp/leads.sqlite3") as loader:
+        loader.write_result(result)         # same interface as NDJSONSink
+
+    python scripts/sales_nav_db_loader.py load tmp/advanced_scraper_results.ndjson
+    python scripts/sales_nav_db_loader.py load tmp/leads.ndjson.gz --db sqlite:///tmp/leads.sqlite3
+    python scripts/sales_nav_db_loader.py bench --rows 200000 --db sqlite:///tmp/bench_leads.sqlite3
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import functools
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from loguru import logger as log
+
+from sales_nav_leads import leads_in_result
+from sales_nav_sink import read_ndjson
+from sales_nav_query import canonical_url
+
+# Every lead of a page carries the same search URL: parse it once
+_canonical_query = functools.lru_cache(maxsize=1024)(canonical_url)
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+DEFAULT_BATCH_SIZE = int(os.environ.get("SALES_NAV_DB_BATCH_SIZE", 5000))
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("SALES_NAV_DB_FLUSH_S", 2.0))
+
+TARGET_TABLE = "people"
+STAGING_TABLE = "people_lead_staging"
+
+# Staging columns, in COPY order; `seq` keeps the last of several leads with one URL
+STAGING_COLUMNS = (
+    "seq", "profile_url", "name", "title", "company_name", "location",
+    "query", "linkedin_data", "profile_extracted_at", "source", "import_tag",
+)
+
+# people columns set from a lead; the rest are left to Rails
+UPSERT_COLUMNS = STAGING_COLUMNS[1:]
+
+# Conflict target matching index_people_on_profile_url (partial unique index)
+CONFLICT_TARGET = "(profile_url) WHERE profile_url IS NOT NULL AND profile_url <> ''"
+
+# Stand-in for the Rails people table, with the columns the loader writes
+SQLITE_PEOPLE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {TARGET_TABLE} (
+    id INTEGER PRIMARY KEY,
+    name TEXT, title TEXT, company_name TEXT, location TEXT, profile_url TEXT,
+    query TEXT, linkedin_data TEXT, profile_extracted_at TEXT, source TEXT, import_tag TEXT,
+    created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS index_people_on_profile_url ON {TARGET_TABLE} (profile_url)
+    WHERE profile_url IS NOT NULL AND profile_url <> '';
+"""
+
+# COPY text format escapes
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def default_dsn() -> str:
+    """SALES_NAV_DB_URL / DATABASE_URL, else the Rails development database"""
+    dsn = os.environ.get("SALES_NAV_DB_URL") or os.environ.get("DATABASE_URL")
+    if dsn:
+        return dsn
+    user = os.environ.get("PGUSER", "")
+    password = f":{os.environ['PGPASSWORD']}" if os.environ.get("PGPASSWORD") else ""
+    auth = f"{user}{password}@" if user else ""
+    host = os.environ.get("PGHOST", "localhost")
+    port = os.environ.get("PGPORT", "5432")
+    return f"postgresql://{auth}{host}:{port}/b2b_development"
+
+def is_sqlite(dsn: str) -> bool:
+    return dsn.startswith("sqlite:") or dsn.endswith((".sqlite3", ".sqlite", ".db"))
+
+def connect(dsn: str):
+    """DB-API connection for a postgresql:// URL, sqlite:///path or *.sqlite3 path"""
+    if is_sqlite(dsn):
+        path = dsn[len("sqlite:///"):] if dsn.startswith("sqlite:///") else dsn
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.executescript(SQLITE_PEOPLE_DDL)
+        return conn
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 is required to load into Postgres (pip install psycopg2-binary)")
+    return psycopg2.connect(dsn)
+
+def normalize_profile_url(url: Optional[str]) -> Optional[str]:
+    """Same result as Person.normalize_linkedin_url: https, www host, no query, fragment or trailing slash"""
+    if not url:
+        return None
+    url = str(url).strip()
+    if "linkedin.com" not in url:
+        return None
+    url = url.split(",", 1)[0].strip()
+    if not url.startswith("http"):
+        url = f"https://{url}"
+    if url.startswith("http:"):
+        url = "https:" + url[len("http:"):]
+    try:
+        scheme, netloc, path, _, _ = urlsplit(url)
+    except ValueError:
+        return re.sub(r"#.*$", "", re.sub(r"\?.*$", "", url)).removesuffix("/")
+    if netloc == "linkedin.com":
+        netloc = "www.linkedin.com"
+    return urlunsplit((scheme, netloc, path.removesuffix("/"), "", ""))
+
+def _timestamp(value) -> Optional[str]:
+    """Epoch seconds or ISO string -> UTC 'YYYY-MM-DD HH:MM:SS.ffffff', as Rails stores datetimes"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        moment = datetime.fromtimestamp(value, tz=timezone.utc)
+    else:
+        try:
+            moment = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def _copy_text(value) -> str:
+    return "\\N" if value is None else str(value).translate(_COPY_ESCAPES)
+
+class LeadLoader:
+    """Buffers leads and upserts them into `people` in batches"""
+
+    def __init__(self, dsn: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, source: str = "sales_navigator",
+                 import_tag: Optional[str] = None, include_known: bool = False, conn=None):
+        self.dsn = dsn or default_dsn()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.source = source
+        self.import_tag = import_tag
+        self.include_known = include_known
+        self.conn = conn or connect(self.dsn)
+        self.sqlite = isinstance(self.conn, sqlite3.Connection)
+        self.stats = {"leads": 0, "skipped": 0, "known": 0, "batches": 0, "upserted": 0, "flush_ms": 0.0}
+        self._rows: List[Tuple] = []
+        self._seq = 0
+        self._flushed_at = time.monotonic()
+        self._create_staging()
+
+    def __enter__(self) -> "LeadLoader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _create_staging(self) -> None:
+        if self.sqlite:
+            columns = ", ".join(f"{column} {'INTEGER' if column == 'seq' else 'TEXT'}" for column in STAGING_COLUMNS)
+        else:
+            types = {"seq": "bigint", "linkedin_data": "jsonb", "profile_extracted_at": "timestamp"}
+            columns = ", ".join(f"{column} {types.get(column, 'text')}" for column in STAGING_COLUMNS)
+        cursor = self.conn.cursor()
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ({columns})")
+        self.conn.commit()
+
+    def write_leads(self, leads: Iterable[Dict], search_url: Optional[str] = None,
+                    scraped_at=None) -> int:
+        """Buffer leads; writes a batch when it is full or the flush interval has passed"""
+        count = 0
+        extracted_at = _timestamp(scraped_at if scraped_at is not None else time.time())
+        for lead in leads:
+            count += 1
+            if lead.get("known_lead") and not self.include_known:
+                self.stats["known"] += 1
+                continue
+            profile_url = normalize_profile_url(lead.get("profile_url"))
+            if profile_url is None:
+                self.stats["skipped"] += 1
+                continue
+            lead_url = lead.get("search_url") or search_url
+            if lead_url:
+                # Without sessionId and the like, so one search is one query value
+                lead_url = _canonical_query(lead_url)
+            lead_at = _timestamp(lead["scraped_at"]) if lead.get("scraped_at") is not None else extracted_at
+            self._seq += 1
+            self._rows.append((
+                self._seq, profile_url, lead.get("name"), lead.get("title"), lead.get("company"),
+                lead.get("location"), lead_url, json.dumps(lead, ensure_ascii=False, default=str),
+                lead_at, self.source, self.import_tag,
+            ))
+        self.stats["leads"] += count
+        if len(self._rows) >= self.batch_size or time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+        return count
+
+    def write_result(self, result: Dict) -> int:
+        """Buffer the leads of a scraper result"""
+        return self.write_leads(leads_in_result(result), search_url=result.get("url"),
+                                scraped_at=result.get("scraped_at"))
+
+    def flush(self) -> int:
+        """Stage and upsert the buffered leads in one transaction; returns rows written"""
+        self._flushed_at = time.monotonic()
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+        started = time.perf_counter()
+        try:
+            upserted = self._flush_sqlite(rows) if self.sqlite else self._flush_postgres(rows)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.stats["batches"] += 1
+        self.stats["upserted"] += upserted
+        self.stats["flush_ms"] += (time.perf_counter() - started) * 1000
+        return upserted
+
+    def _upsert_sql(self, select: str, now: str) -> str:
+        columns = ", ".join(UPSERT_COLUMNS)
+        # A sparse lead never blanks a value Rails (or an earlier scrape) already has
+        updates = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, {TARGET_TABLE}.{column})" for column in UPSERT_COLUMNS
+            if column != "profile_url"
+        )
+        return (
+            f"INSERT INTO {TARGET_TABLE} ({columns}, created_at, updated_at) "
+            f"{select} "
+            f"ON CONFLICT {CONFLICT_TARGET} DO UPDATE SET {updates}, updated_at = {now}"
+        )
+
+    def _flush_postgres(self, rows: List[Tuple]) -> int:
+        buffer = io.StringIO()
+        buffer.writelines("\t".join(_copy_text(value) for value in row) + "\n" for row in rows)
+        buffer.seek(0)
+        now = "(now() AT TIME ZONE 'utc')"
+        # ON CONFLICT cannot touch one row twice per statement: keep the last lead per URL
+        select = (
+            f"SELECT DISTINCT ON (profile_url) {', '.join(UPSERT_COLUMNS)}, {now}, {now} "
+            f"FROM {STAGING_TABLE} ORDER BY profile_url, seq DESC"
+        )
+        cursor = self.conn.cursor()
+        cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+        cursor.copy_expert(f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN", buffer)
+        cursor.execute(self._upsert_sql(select, now))
+        return cursor.rowcount
+
+    def _flush_sqlite(self, rows: List[Tuple]) -> int:
+        now = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+        # Rows are applied in seq order, so the last lead per URL wins; "WHERE true"
+        # keeps SQLite from reading ON CONFLICT as a join constraint
+        select = f"SELECT {', '.join(UPSERT_COLUMNS)}, {now}, {now} FROM {STAGING_TABLE} WHERE true ORDER BY seq"
+        cursor = self.conn.cursor()
+        cursor.execute(f"DELETE FROM {STAGING_TABLE}")
+        cursor.executemany(
+            f"INSERT INTO {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) VALUES ({', '.join('?' * len(STAGING_COLUMNS))})",
+            rows,
+        )
+        cursor.execute(self._upsert_sql(select, now))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+        log.debug(f"🗄️ {self.stats['upserted']} leads upserted in {self.stats['batches']} batches ({self.stats['skipped']} skipped)")
+
+def iter_lead_file(path: str) -> Iterator[Tuple[Dict, Optional[str], object]]:
+    """(lead, search_url, scraped_at) from sink NDJSON, LeadTable NDJSON or a scraper's JSON result"""
+    if path.endswith((".ndjson", ".ndjson.gz", ".jsonl", ".jsonl.gz")):
+        for record in read_ndjson(path):
+            kind = record.get("type")
+            if kind is None or kind == "lead":
+                yield record, record.get("search_url"), record.get("scraped_at", record.get("at"))
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    for lead in leads_in_result(result):
+        yield lead, result.get("url"), result.get("scraped_at")
+
+def _load(args) -> int:
+    if not os.path.exists(args.path):
+        print(f"❌ No such file: {args.path}")
+        return 1
+
+    started = time.perf_counter()
+    with LeadLoader(args.db, batch_size=args.batch_size, flush_interval=args.flush_interval,
+                    import_tag=args.import_tag, include_known=args.include_known) as loader:
+        for lead, search_url, scraped_at in iter_lead_file(args.path):
+            loader.write_leads([lead], search_url=search_url, scraped_at=scraped_at)
+    elapsed = time.perf_counter() - started
+    stats = loader.stats
+    print(f"🗄️ {stats['leads']} leads -> {stats['upserted']} rows upserted in {stats['batches']} batches "
+          f"({stats['skipped']} without a LinkedIn URL, {stats['known']} known) in {elapsed:.1f} s, {stats['leads'] / elapsed:,.0f} leads/s")
+    return 0
+
+def _fake_lead(i: int, distinct: int) -> Dict:
+    member = random.randrange(distinct)
+    return {
+        "name": f"Person {member}",
+        "title": random.choice(["CEO", "CTO", "Head of Sales", "Software Engineer", "Account Executive"]),
+        "company": f"Company {member % 500}",
+        "location": random.choice(["Oslo, Norway", "Bergen, Norway", "Stockholm, Sweden"]),
+        "profile_url": f"https://www.linkedin.com/in/person-{member}/",
+        "extraction_method": "container",
+        "result_index": i % 25,
+    }
+
+def _bench(args) -> int:
+    """Batched staging + upsert against one Person-style upsert per lead"""
+    args.db = args.db or default_dsn()
+    random.seed(7)
+    # About a fifth of the leads repeat a URL already seen, as re-scraped searches do
+    distinct = int(args.rows * 0.8)
+    leads = [_fake_lead(i, distinct) for i in range(args.rows)]
+
+    started = time.perf_counter()
+    with LeadLoader(args.db, batch_size=args.batch_size, flush_interval=args.flush_interval) as loader:
+        for offset in range(0, len(leads), 25):
+            loader.write_leads(leads[offset:offset + 25], search_url="https://www.linkedin.com/sales/search/people")
+    batched = time.perf_counter() - started
+
+    # Baseline: SELECT by URL, then UPDATE or INSERT, one statement pair per lead
+    sample = leads[:min(len(leads), args.baseline_rows)]
+    conn = connect(args.db)
+    cursor = conn.cursor()
+    marker = "%s" if not isinstance(conn, sqlite3.Connection) else "?"
+    started = time.perf_counter()
+    for lead in sample:
+        url = normalize_profile_url(lead["profile_url"])
+        cursor.execute(f"SELECT id FROM {TARGET_TABLE} WHERE profile_url = {marker}", (url,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(f"UPDATE {TARGET_TABLE} SET name = {marker}, title = {marker} WHERE id = {marker}",
+                           (lead["name"], lead["title"], row[0]))
+        else:
+            cursor.execute(f"INSERT INTO {TARGET_TABLE} (profile_url, name, title, created_at, updated_at) "
+                           f"VALUES ({marker}, {marker}, {marker}, {marker}, {marker})",
+                           (url, lead["name"], lead["title"], _timestamp(time.time()), _timestamp(time.time())))
+        conn.commit()
+    single = time.perf_counter() - started
+    conn.close()
+
+    print(f"🗄️ {args.rows} leads ({distinct} distinct URLs) into {args.db}")
+    print(f"  batched upsert   {args.rows / batched:>12,.0f} leads/s  ({loader.stats['batches']} batches of <= {args.batch_size}, "
+          f"{loader.stats['flush_ms'] / max(1, loader.stats['batches']):.0f} ms each)")
+    print(f"  row by row       {len(sample) / single:>12,.0f} leads/s  (first {len(sample)} leads)")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load scraped leads into the people table")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="Load leads from a results .ndjson(.gz) or .json file")
+    load.add_argument("path")
+    load.add_argument("--import-tag", default=None, help="Stored in people.import_tag")
+    load.add_argument("--include-known", action="store_true", help="Also load leads seen in an earlier crawl")
+
+    bench = commands.add_parser("bench", help="Measure batched upserts against row-by-row upserts")
+    bench.add_argument("--rows", type=int, default=100000)
+    bench.add_argument("--baseline-rows", type=int, default=1000)
+
+    for command in (load, bench):
+        command.add_argument("--db", default=None, help="postgresql:// URL or sqlite:///path (default: Rails development DB)")
+        command.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        command.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL)
+    args = parser.parse_args()
+
+    return {"load": _load, "bench": _bench}[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
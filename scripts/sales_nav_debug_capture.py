@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Sampled, compressed debug captures of scraped pages
+
+The scrapers wrote every response to a fixed file (tmp/debug/final_page.html,
+final_analysis.json, ...) with a blocking write on the event loop, so
+concurrent scrapes overwrote each other and every scrape paid for a multi-MB
+write. `DebugCapture` replaces those writes:
+
+- failures are always captured (zero profiles, access blocked, errors);
+  successful pages only at `sample_rate`
+- every capture gets a unique key (timestamp, name, random suffix), so
+  concurrent scrapes never collide
+- compression and the write happen on a background thread; `capture()`
+  returns immediately with the path the page will be written to
+- pages are zstd-compressed (`*.html.zst`), or gzip (`*.html.gz`) when the
+  zstandard package is not installed; metadata goes to `<key>.json`
+- once the captures exceed `max_bytes` the oldest are deleted
+
+`read_capture` decompresses a capture; `sales_nav_corpus.load_corpus` uses it
+so the replay benchmark reads captured pages directly.
+
+Usage:
+    from sales_nav_debug_capture import DEBUG_CAPTURE
+
+    path = DEBUG_CAPTURE.capture("advanced", response.content, meta={"url": url}, failed=not profiles)
+
+    SALES_NAV_DEBUG_SAMPLE_RATE=1 python scripts/sales_navigator_advanced.py   # capture every page
+    python scripts/sales_nav_debug_capture.py                     # list recent captures
+    python scripts/sales_nav_debug_capture.py <key> -o page.html  # decompress one
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import uuid
+import atexit
+import random
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from loguru import logger as log
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_DEBUG_DIR = os.environ.get("SALES_NAV_DEBUG_DIR", "tmp/debug")
+DEFAULT_SAMPLE_RATE = float(os.environ.get("SALES_NAV_DEBUG_SAMPLE_RATE", 0.05))
+DEFAULT_MAX_MB = float(os.environ.get("SALES_NAV_DEBUG_MAX_MB", 512))
+
+CAPTURE_SUFFIXES = (".html.zst", ".html.gz")
+
+# Only files with this name shape are rotated; hand-saved pages are left alone
+_CAPTURE_RE = re.compile(r"^\d{8}-\d{6}-[\w-]+-[0-9a-f]{8}(\.html\.zst|\.html\.gz|\.json)$")
+
+# Rotation deletes down to this share of max_bytes, so it does not run on every write
+_ROTATE_TO = 0.9
+
+def compress(data: bytes) -> Tuple[bytes, str]:
+    """zstd when available, else gzip; returns the compressed bytes and file suffix"""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data), ".html.zst"
+    return gzip.compress(data, compresslevel=6), ".html.gz"
+
+def read_capture(path: str) -> str:
+    """Decompressed HTML of a capture (plain .html files are read as-is)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    elif path.endswith(".gz"):
+        data = gzip.decompress(data)
+    return data.decode("utf-8", errors="replace")
+
+def is_failure(result: Dict) -> bool:
+    """Results that are always captured: errors, access blocks and zero profiles"""
+    if not result.get("success", True) or result.get("error") or result.get("access_blocked"):
+        return True
+    found = result.get("total_found")
+    return found is not None and found == 0
+
+class DebugCapture:
+    """Background writer for sampled, compressed page captures"""
+
+    def __init__(self, root: str = DEFAULT_DEBUG_DIR, sample_rate: float = DEFAULT_SAMPLE_RATE,
+                 max_bytes: int = int(DEFAULT_MAX_MB * 1024 * 1024), enabled: bool = True):
+        self.root = root
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.stats = {"captured": 0, "failures": 0, "sampled_out": 0, "bytes_written": 0, "rotated": 0, "errors": 0}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # One writer thread: writes stay ordered and never compete with each other
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug-capture")
+            atexit.register(self.flush)
+        return self._executor
+
+    def should_capture(self, failed: bool = False, force: bool = False) -> bool:
+        if not self.enabled:
+            return False
+        return force or failed or random.random() < self.sample_rate
+
+    def capture(self, name: str, content: str, meta: Optional[Dict] = None, failed: bool = False,
+                force: bool = False) -> Optional[str]:
+        """Queue a page (and its metadata) for writing; returns its path, or None when sampled out"""
+        if not self.should_capture(failed, force):
+            self.stats["sampled_out"] += 1
+            return None
+
+        # No dots in keys: everything after the first dot is the file suffix
+        safe_name = re.sub(r"[^\w-]+", "_", name)[:60] or "page"
+        key = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{uuid.uuid4().hex[:8]}"
+        suffix = ".html.zst" if zstandard is not None else ".html.gz"
+        record = {
+            "key": key,
+            "name": name,
+            "failed": failed,
+            "captured_at": time.time(),
+            "content_bytes": len(content),
+            **(meta or {}),
+        }
+
+        self.stats["captured"] += 1
+        if failed:
+            self.stats["failures"] += 1
+
+        future = self._pool().submit(self._write, key, content, record)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+        return os.path.join(self.root, key + suffix)
+
+    def _write(self, key: str, content: str, record: Dict) -> None:
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            data, suffix = compress(content.encode("utf-8"))
+            record["compressed_bytes"] = len(data)
+            record["compression"] = suffix.rsplit(".", 1)[-1]
+
+            html_path = os.path.join(self.root, key + suffix)
+            tmp_path = f"{html_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, html_path)
+
+            meta = json.dumps(record, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+            with open(os.path.join(self.root, key + ".json"), "wb") as f:
+                f.write(meta)
+
+            written = len(data) + len(meta)
+            self.stats["bytes_written"] += written
+            self._rotate(written)
+        except Exception as e:
+            self.stats["errors"] += 1
+            log.warning(f"Debug capture {key} failed: {e}")
+
+    def _captures(self) -> List[os.DirEntry]:
+        if not os.path.isdir(self.root):
+            return []
+        return [entry for entry in os.scandir(self.root) if entry.is_file() and _CAPTURE_RE.match(entry.name)]
+
+    def _rotate(self, written: int) -> None:
+        """Delete the oldest captures (page and metadata together) once the total exceeds max_bytes"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in self._captures())
+        else:
+            self._total_bytes += written
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        # key -> [oldest mtime, size, paths]
+        groups: Dict[str, list] = {}
+        for entry in self._captures():
+            stat = entry.stat()
+            key = entry.name.split(".", 1)[0]
+            group = groups.setdefault(key, [stat.st_mtime, 0, []])
+            group[0] = min(group[0], stat.st_mtime)
+            group[1] += stat.st_size
+            group[2].append(entry.path)
+
+        self._total_bytes = sum(group[1] for group in groups.values())
+        for _, size, paths in sorted(groups.values(), key=lambda group: group[0]):
+            if self._total_bytes <= self.max_bytes * _ROTATE_TO:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._total_bytes -= size
+            self.stats["rotated"] += 1
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for queued captures to be written"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def list(self, limit: int = 20) -> List[Dict]:
+        """Metadata of the most recent captures"""
+        metas = sorted((e for e in self._captures() if e.name.endswith(".json")), key=lambda e: e.name, reverse=True)
+        records = []
+        for entry in metas[:limit]:
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except Exception:
+                continue
+        return records
+
+    def path_for(self, key: str) -> Optional[str]:
+        for suffix in CAPTURE_SUFFIXES:
+            path = os.path.join(self.root, key + suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+# Shared instance used by the scraper scripts
+DEBUG_CAPTURE = DebugCapture()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or decompress debug captures")
+    parser.add_argument("key", nargs="?", help="Capture key to decompress")
+    parser.add_argument("-o", "--output", help="Write the HTML here instead of stdout")
+    parser.add_argument("--root", default=DEFAULT_DEBUG_DIR)
+    args = parser.parse_args()
+
+    capture = DebugCapture(root=args.root)
+    if not args.key:
+        records = capture.list()
+        print(f"🗂️ {len(records)} recent captures in {args.root}")
+        for record in records:
+            status = "❌" if record.get("failed") else "✅"
+            print(f"  {status} {record['key']}  {record.get('url', '')}  "
+                  f"{record.get('content_bytes', 0) / 1024:.0f} KB -> {record.get('compressed_bytes', 0) / 1024:.0f} KB")
+        sys.exit(0)
+
+    path = capture.path_for(args.key)
+    if not path:
+        print(f"❌ No capture {args.key} in {args.root}")
+        sys.exit(1)
+    html = read_capture(path)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"💾 {path} -> {args.output}")
+    else:
+        sys.stdout.write(html)
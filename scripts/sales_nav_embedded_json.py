@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Embedded JSON (Voyager / Sales API payload) extractor for LinkedIn pages
+
+LinkedIn ships the data behind a page as JSON inside hidden `<code>` blocks
+(HTML-escaped) and `<script type="application/json">` tags. The payloads
+are normalized: entities live in an `included` list keyed by `entityUrn`,
+and fields prefixed with `*` reference other entities by URN.
+
+Instead of scanning the whole document with regexes that can only match
+flat `{...}` objects, this module:
+
+- locates the data blocks (from the parsed DOM or the raw HTML string)
+- parses them with orjson when it is installed, falling back to json
+  (each block is already a string cut out of the page, so a streaming
+  parser would not save memory; orjson is the fastest way through it)
+- resolves entity references and merges the records that describe the same
+  person (search hit, mini profile, member URN) into one complete lead
+
+Usage:
+    python scripts/sales_nav_embedded_json.py tmp/debug/final_page.html
+"""
+
+import re
+import sys
+import json
+import html as html_lib
+from typing import Dict, Iterator, List, Optional
+from loguru import logger as log
+
+from sales_nav_identity import lead_identities, merge_lead
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Blocks must mention one of these to be worth parsing
+PERSON_HINTS = ('firstName', 'fullName', 'publicIdentifier')
+
+CODE_BLOCK_RE = re.compile(r'<code\b[^>]*>(.*?)</code>', re.DOTALL | re.IGNORECASE)
+JSON_SCRIPT_RE = re.compile(
+    r'<script\b[^>]*type=["\']application/json["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+PROFILE_ID_RE = re.compile(r'urn:li:[A-Za-z_]+:\(?([A-Za-z0-9_-]{20,})')
+MEMBER_URN_RE = re.compile(r'^urn:li:member:(\d+)$')
+SALES_PROFILE_URN_RE = re.compile(r'^urn:li:fs_salesProfile:\(([^,]+),([^,]+),([^)]+)\)$')
+
+def loads(blob: str):
+    """Parse JSON with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(blob)
+    return json.loads(blob)
+
+def find_data_blocks(selector) -> List[str]:
+    """JSON data blocks from a parsed page (text nodes are already unescaped)"""
+    blocks = []
+    texts = selector.root.xpath('//code/text() | //script[@type="application/json"]/text()')
+    for text in texts:
+        text = text.strip()
+        if text.startswith(('{', '[')) and any(hint in text for hint in PERSON_HINTS):
+            blocks.append(text)
+    return blocks
+
+def find_data_blocks_in_html(html_content: str) -> List[str]:
+    """JSON data blocks located in a raw HTML string without building a DOM"""
+    blocks = []
+    for pattern in (CODE_BLOCK_RE, JSON_SCRIPT_RE):
+        for match in pattern.finditer(html_content):
+            text = match.group(1).strip()
+            if not any(hint in text for hint in PERSON_HINTS):
+                continue
+            if '&quot;' in text or '&#' in text:
+                text = html_lib.unescape(text)
+            if text.startswith(('{', '[')):
+                blocks.append(text)
+    return blocks
+
+def iter_documents(blocks: List[str]) -> Iterator:
+    """Parse blocks one at a time, skipping the ones that are not valid JSON"""
+    for block in blocks:
+        try:
+            yield loads(block)
+        except ValueError as e:
+            log.debug(f"Skipping unparseable data block ({len(block)} chars): {e}")
+
+def _walk(node, entities: Dict[str, Dict], people: List[Dict]) -> None:
+    """Index entities by URN and collect person-like objects in document order"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            urn = current.get("entityUrn")
+            if isinstance(urn, str):
+                entities.setdefault(urn, current)
+            if ("firstName" in current and "lastName" in current) or "fullName" in current:
+                people.append(current)
+            stack.extend(reversed([v for v in current.values() if isinstance(v, (dict, list))]))
+        elif isinstance(current, list):
+            stack.extend(reversed([v for v in current if isinstance(v, (dict, list))]))
+
+def _resolve(entity: Dict, entities: Dict[str, Dict], depth: int = 2) -> Dict:
+    """Inline `*field` URN references (one or two levels deep)"""
+    resolved = {}
+    for key, value in entity.items():
+        if key.startswith('*') and depth > 0:
+            name = key[1:]
+            if isinstance(value, str) and value in entities:
+                resolved[name] = _resolve(entities[value], entities, depth - 1)
+            elif isinstance(value, list):
+                resolved[name] = [
+                    _resolve(entities[v], entities, depth - 1) if isinstance(v, str) and v in entities else v
+                    for v in value
+                ]
+            else:
+                resolved[name] = value
+        else:
+            resolved.setdefault(key, value)
+    return resolved
+
+def _text(value) -> str:
+    """LinkedIn text fields are plain strings or {"text": ...} objects"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return str(value.get("text") or value.get("defaultLocalizedName") or "").strip()
+    return ""
+
+def _first(*values) -> str:
+    for value in values:
+        text = _text(value)
+        if text:
+            return text
+    return ""
+
+def build_lead(person: Dict, entities: Dict[str, Dict]) -> Optional[Dict]:
+    """Turn a resolved person entity into a flat lead record"""
+    data = _resolve(person, entities)
+
+    # Referenced profile/member entities fill in what the hit itself lacks
+    linked = [v for k, v in data.items() if isinstance(v, dict) and k in ("profile", "miniProfile", "member", "lead")]
+
+    first_name = _first(data.get("firstName"), *[l.get("firstName") for l in linked])
+    last_name = _first(data.get("lastName"), *[l.get("lastName") for l in linked])
+    name = _first(data.get("fullName"), f"{first_name} {last_name}".strip())
+    if not name:
+        return None
+
+    positions = data.get("currentPositions") or data.get("positions") or []
+    position = next((p for p in positions if isinstance(p, dict)), {})
+    company = position.get("companyUrnResolutionResult") or {}
+
+    public_identifier = _first(data.get("publicIdentifier"), *[l.get("publicIdentifier") for l in linked])
+
+    urns = [data.get("entityUrn"), data.get("objectUrn")] + [l.get("entityUrn") for l in linked] + [l.get("objectUrn") for l in linked]
+    urns = [u for u in urns if isinstance(u, str)]
+    member_urn = next((u for u in urns if MEMBER_URN_RE.match(u)), "")
+    profile_id = next((m.group(1) for m in map(PROFILE_ID_RE.match, urns) if m), "")
+
+    if public_identifier:
+        profile_url = f"https://www.linkedin.com/in/{public_identifier}"
+    else:
+        sales_urn = next((m for m in map(SALES_PROFILE_URN_RE.match, urns) if m), None)
+        profile_url = f"https://www.linkedin.com/sales/lead/{','.join(sales_urn.groups())}" if sales_urn else ""
+
+    return {
+        "name": name,
+        "title": _first(position.get("title"), data.get("headline"), data.get("occupation"),
+                        *[l.get("headline") or l.get("occupation") for l in linked]),
+        "company": _first(position.get("companyName"), company.get("name"), data.get("companyName")),
+        "location": _first(data.get("geoRegion"), data.get("location"), data.get("locationName")),
+        "profile_url": profile_url,
+        "public_identifier": public_identifier,
+        "member_urn": member_urn,
+        "entity_urn": data.get("entityUrn", ""),
+        "profile_id": profile_id,
+        "source": "embedded_json"
+    }
+
+def extract_leads_from_blocks(blocks: List[str]) -> List[Dict]:
+    """Parse data blocks and return one merged lead per person"""
+    entities: Dict[str, Dict] = {}
+    people: List[Dict] = []
+    for document in iter_documents(blocks):
+        _walk(document, entities, people)
+
+    leads: List[Dict] = []
+    by_key: Dict[str, Dict] = {}
+    for person in people:
+        lead = build_lead(person, entities)
+        if not lead:
+            continue
+
+        keys = lead_identities(lead)
+        existing = next((by_key[k] for k in keys if k in by_key), None)
+        if existing is not None:
+            merge_lead(existing, lead)
+            target = existing
+        else:
+            leads.append(lead)
+            target = lead
+        for key in lead_identities(target):
+            by_key[key] = target
+
+    return leads
+
+def extract_embedded_leads(selector) -> List[Dict]:
+    """Leads from the embedded JSON of an already parsed page"""
+    return extract_leads_from_blocks(find_data_blocks(selector))
+
+def extract_embedded_leads_from_html(html_content: str) -> List[Dict]:
+    """Leads from the embedded JSON of a raw HTML string"""
+    return extract_leads_from_blocks(find_data_blocks_in_html(html_content))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/sales_nav_embedded_json.py <page.html> [...]")
+        sys.exit(1)
+
+    print(f"JSON parser: {'orjson' if orjson else 'json'}")
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            leads = extract_embedded_leads_from_html(f.read())
+        print(f"\n{path}: {len(leads)} leads")
+        for lead in leads[:10]:
+            print(f"  {lead['name']} - {lead['title']} @ {lead['company']} ({lead['profile_url']})")
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Pluggable fetch backends for the Sales Navigator scripts
+
+Fetching used to be hard-wired to `ScrapflyClient.async_scrape`, so nothing
+could be load-tested locally and pages that need no anti-bot handling still
+went through the most expensive path. Every backend here implements the same
+`FetchBackend.fetch(url, **options)` coroutine and returns a `FetchResponse`
+(content, status_code, a lazy parsel `selector`, `context["url"]`), which is
+what the parse functions in the scraper scripts already consume. Options are
+Scrapfly config keys; each backend uses the ones it supports:
+
+- ScrapflyBackend   wraps `async_scrape` (under the adaptive limiter when given
+                    one) with a base config (ASP, JS, proxies)
+- HttpBackend       pooled keep-alive client: httpx with HTTP/2 when installed,
+                    otherwise a pooled requests session on a thread pool. It
+                    sends `headers` and cannot render JS
+- ReplayServer      stdlib HTTP server that serves a saved corpus with
+                    configurable latency, as a local stand-in for LinkedIn
+
+The tiered fetch in `sales_nav_fetch_tiers` goes through these backends:
+renders always use Scrapfly, and `FETCH_BACKEND=http` sends the plain tier
+over `HttpBackend` instead.
+
+Usage:
+    backend = create_backend(os.environ.get("FETCH_BACKEND", "scrapfly"))
+    response = await backend.fetch(url)
+    await backend.close()
+
+    plain = plain_tier_backend(ScrapflyBackend(SCRAPFLY))   # follows FETCH_BACKEND
+    pipeline = tiered_pipeline(SCRAPFLY, parse_company, BASE_CONFIG, plain_backend=plain)
+
+    python scripts/sales_nav_fetch_backends.py --corpus tmp/debug --port 8765   # run the replay server
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from loguru import logger as log
+
+from sales_nav_response import PageResponse
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+DEFAULT_FETCH_BACKEND = os.environ.get("FETCH_BACKEND", "scrapfly")
+
+class FetchResponse(PageResponse):
+    """Backend-independent response with timing and the raw backend result"""
+
+    def __init__(self, content: str, url: str, status_code: int, backend: str, elapsed_ms: float,
+                 headers: Optional[Dict[str, str]] = None, scrape_result: Optional[Dict] = None):
+        super().__init__(content, url=url, name=url, status_code=status_code)
+        self.backend = backend
+        self.elapsed_ms = elapsed_ms
+        self.headers = headers or {}
+        # Scrapfly's result payload (browser_data etc.); empty for other backends
+        self.scrape_result = scrape_result or {}
+
+class FetchBackend:
+    """Interface every fetch backend implements"""
+
+    name = "base"
+
+    async def fetch(self, url: str, **options) -> FetchResponse:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class ScrapflyBackend(FetchBackend):
+    """Scrapfly API: anti-bot bypass, proxies and JS rendering"""
+
+    name = "scrapfly"
+
+    def __init__(self, client=None, base_config: Optional[Dict] = None, limiter=None):
+        from scrapfly import ScrapflyClient
+        self.client = client or ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
+        self.base_config = base_config or {}
+        # Adaptive concurrency limiter from sales_nav_concurrency; None calls Scrapfly directly
+        self.limiter = limiter
+
+    async def fetch(self, url: str, **options) -> FetchResponse:
+        from scrapfly import ScrapeConfig
+        config = ScrapeConfig(url, **{**self.base_config, **options})
+        started = time.perf_counter()
+        if self.limiter is not None:
+            from sales_nav_concurrency import limited_scrape
+            response = await limited_scrape(self.client, config, self.limiter)
+        else:
+            response = await self.client.async_scrape(config)
+        return FetchResponse(
+            response.content,
+            url=url,
+            status_code=response.status_code,
+            backend=self.name,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            headers=dict(response.headers or {}),
+            scrape_result=response.scrape_result
+        )
+
+class HttpBackend(FetchBackend):
+    """Pooled keep-alive HTTP client for pages that need no anti-bot handling"""
+
+    name = "http"
+
+    def __init__(self, max_connections: int = 100, timeout: float = 30.0, headers: Optional[Dict[str, str]] = None,
+                 http2: bool = True):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.headers = headers or {"Accept-Language": "en-US,en;q=0.5"}
+
+        if httpx is not None:
+            self.http2 = http2 and h2 is not None
+            self.client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=timeout,
+                headers=self.headers,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+            self.implementation = "httpx/h2" if self.http2 else "httpx/http1.1"
+        else:
+            # requests keeps connections alive per pool; one thread per connection
+            import requests
+            from requests.adapters import HTTPAdapter
+            self.http2 = False
+            self.client = requests.Session()
+            self.client.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+            self.client.mount("http://", adapter)
+            self.client.mount("https://", adapter)
+            self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="http-backend")
+            self.implementation = "requests/http1.1"
+
+    async def fetch(self, url: str, **options) -> FetchResponse:
+        # Scrapfly-only keys (asp, proxy_pool, render_js, ...) have no meaning here
+        headers = options.get("headers")
+        started = time.perf_counter()
+        if httpx is not None:
+            response = await self.client.get(url, headers=headers)
+            content, status, headers = response.text, response.status_code, dict(response.headers)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._executor, lambda: self.client.get(url, headers=headers, timeout=self.timeout)
+            )
+            content, status, headers = response.text, response.status_code, dict(response.headers)
+
+        return FetchResponse(
+            content,
+            url=url,
+            status_code=status,
+            backend=self.name,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            headers=headers
+        )
+
+    async def close(self) -> None:
+        if httpx is not None:
+            await self.client.aclose()
+        else:
+            self.client.close()
+            self._executor.shutdown(wait=False)
+
+class _ReplayHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections (1 s SYN retry) at high concurrency
+    request_queue_size = 1024
+
+class ReplayServer:
+    """Local HTTP stand-in for LinkedIn that serves a saved corpus
+
+    Every GET returns the next corpus page (or the page named by `?page=`),
+    after `latency_ms` +/- `jitter_ms` of simulated server time.
+    """
+
+    def __init__(self, pages: List[PageResponse], host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        if not pages:
+            raise ValueError("ReplayServer needs at least one page")
+        self.pages = pages
+        self.by_name = {page.name: page for page in pages}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _ReplayHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, idx: int) -> str:
+        """URL of the idx-th corpus page (wrapping around)"""
+        return f"{self.base_url}/sales/search/people?page={self.pages[idx % len(self.pages)].name}"
+
+    def _next_page(self, name: Optional[str]) -> PageResponse:
+        with self._lock:
+            self.requests += 1
+            count = self.requests
+        if name and name in self.by_name:
+            return self.by_name[name]
+        return self.pages[count % len(self.pages)]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive
+            # Headers and body go out in separate writes; without this Nagle
+            # plus delayed ACKs add ~40 ms to every response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                name = None
+                if "page=" in self.path:
+                    name = self.path.split("page=", 1)[1].split("&", 1)[0]
+                page = server._next_page(name)
+
+                delay = server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+                body = page.content.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        log.info(f"🛰️ Replay server with {len(self.pages)} pages at {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+BACKENDS = {
+    "scrapfly": ScrapflyBackend,
+    "http": HttpBackend,
+}
+
+def create_backend(name: str = "scrapfly", **kwargs) -> FetchBackend:
+    """Backend by name ("scrapfly" or "http")"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown fetch backend {name!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+def plain_tier_backend(scrapfly: FetchBackend, name: str = DEFAULT_FETCH_BACKEND, **kwargs) -> FetchBackend:
+    """Backend for unrendered fetches: `scrapfly` itself unless FETCH_BACKEND names another one"""
+    if name == scrapfly.name:
+        return scrapfly
+    return create_backend(name, **kwargs)
+
+if __name__ == "__main__":
+    from sales_nav_corpus import DEFAULT_CORPUS, load_corpus
+
+    parser = argparse.ArgumentParser(description="Serve a saved corpus as a local LinkedIn stand-in")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        log.error(f"❌ No HTML pages found in {args.corpus}")
+        sys.exit(1)
+
+    server = ReplayServer(pages, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    print(f"🛰️ Serving {len(pages)} pages at {server.base_url} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
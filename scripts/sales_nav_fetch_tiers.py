@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Tiered fetching: a plain request first, a JS render only when needed
+
+Every config used to set `render_js=True`, even for public company and
+profile pages whose JSON-LD is already in the raw HTML. A JS render costs
+several times the credits and seconds of a plain fetch.
+
+`fetch_tiered` fetches a URL without JS first and parses it; only when the
+parser reports that the required data is missing does it escalate to a full
+render. `tiered_pipeline` does the same for many URLs on the staged
+pipeline from `sales_nav_pipeline`, parsing off the event loop and sending
+incomplete plain results back to the fetch stage as renders. Both go
+through the adaptive Scrapfly limiter, and renders through the hedger.
+
+Fetches go through a `FetchBackend` from `sales_nav_fetch_backends`. A
+`ScrapflyClient` is wrapped in a `ScrapflyBackend`; `plain_backend` can send
+the plain tier elsewhere, e.g. `HttpBackend` for pages that need no anti-bot
+handling, while renders stay on Scrapfly.
+
+Escalations are tracked per URL pattern (`linkedin.com/company/*`,
+`linkedin.com/sales/search/*`, ...), and patterns that almost always need
+the render skip the plain tier. One request in `probe_every` still starts at
+the plain tier, so routing notices when a pattern stops needing JS.
+
+Usage:
+    from sales_nav_fetch_tiers import FETCH_TIER_STATS, fetch_tiered_many
+
+    results = await fetch_tiered_many(SCRAPFLY, urls, parse_company, BASE_CONFIG)
+    FETCH_TIER_STATS.save()
+
+    # Same, with the per-stage pipeline report
+    pipeline = tiered_pipeline(SCRAPFLY, parse_company, BASE_CONFIG)
+    results = await pipeline.run(urls)
+    pipeline.print_report()
+
+    # Plain tier over a pooled HTTP client
+    pipeline = tiered_pipeline(SCRAPFLY, parse_company, BASE_CONFIG, plain_backend=HttpBackend())
+
+    python scripts/sales_nav_fetch_tiers.py   # print escalation rates per pattern
+"""
+
+import os
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from loguru import logger as log
+from sales_nav_pipeline import DEFAULT_PARSE_WORKERS, Job, Pipeline
+from sales_nav_concurrency import SCRAPFLY_LIMITER, AIMDLimiter
+from sales_nav_fetch_backends import FetchBackend, ScrapflyBackend
+from sales_nav_hedging import RENDER_HEDGER, Hedger, hedge_variant
+
+DEFAULT_TIER_STATS_PATH = os.environ.get("FETCH_TIER_STATS_PATH", "tmp/fetch_tier_stats.json")
+
+PLAIN = "plain"
+RENDER = "render"
+
+# Config keys that only make sense for a JS render
+RENDER_ONLY_KEYS = ("js", "js_scenario", "rendering_wait", "wait_for_selector", "auto_scroll", "screenshots")
+
+# Path prefixes whose second segment is part of the pattern (/sales/search/..., /sales/lead/...)
+TWO_SEGMENT_PREFIXES = ("sales",)
+
+def url_pattern(url: str) -> str:
+    """Routing key for a URL: host plus the leading path segment(s)"""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    segments = [s for s in parsed.path.split("/") if s]
+    depth = 2 if segments and segments[0] in TWO_SEGMENT_PREFIXES else 1
+    prefix = "/".join(segments[:depth])
+    return f"{host}/{prefix}/*" if prefix else f"{host}/"
+
+class TierStats:
+    """Persistent per-pattern escalation statistics with decayed counts"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_TIER_STATS_PATH, skip_plain_above: float = 0.8,
+                 min_samples: int = 5, probe_every: int = 20, decay: float = 0.95):
+        self.path = path
+        self.skip_plain_above = skip_plain_above
+        self.min_samples = min_samples
+        self.probe_every = probe_every
+        self.decay = decay
+        # pattern -> {"plain_attempts", "escalations", "renders", "render_failures", "requests"}
+        self.patterns: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_TIER_STATS_PATH, **kwargs) -> "TierStats":
+        """Load stats from disk, starting empty if the file is missing or unreadable"""
+        stats = cls(path=path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    stats.patterns = json.load(f).get("patterns", {})
+            except Exception as e:
+                log.warning(f"Could not load fetch tier stats from {path}: {e}")
+        return stats
+
+    def save(self) -> None:
+        """Write stats to disk atomically"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "patterns": self.patterns}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, pattern: str) -> Dict:
+        return self.patterns.setdefault(
+            pattern, {"plain_attempts": 0.0, "escalations": 0.0, "renders": 0.0, "render_failures": 0.0, "requests": 0}
+        )
+
+    def escalation_rate(self, pattern: str) -> Optional[float]:
+        """Share of plain fetches that had to be re-done with a render, None until measured"""
+        entry = self.patterns.get(pattern)
+        if not entry or entry["plain_attempts"] <= 0:
+            return None
+        return entry["escalations"] / entry["plain_attempts"]
+
+    def start_tier(self, pattern: str) -> str:
+        """Tier to start with: skip the plain fetch for patterns that nearly always escalate"""
+        entry = self._entry(pattern)
+        entry["requests"] += 1
+        rate = self.escalation_rate(pattern)
+        if rate is None or entry["requests"] <= self.min_samples:
+            return PLAIN
+        if rate >= self.skip_plain_above and entry["requests"] % self.probe_every != 0:
+            return RENDER
+        return PLAIN
+
+    def record(self, pattern: str, tier: str, complete: bool) -> None:
+        """Record the outcome of one fetch at one tier"""
+        entry = self._entry(pattern)
+        for key in ("plain_attempts", "escalations", "renders", "render_failures"):
+            entry[key] *= self.decay
+        if tier == PLAIN:
+            entry["plain_attempts"] += 1
+            if not complete:
+                entry["escalations"] += 1
+        else:
+            entry["renders"] += 1
+            if not complete:
+                entry["render_failures"] += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        return {
+            pattern: {
+                "escalation_rate": None if self.escalation_rate(pattern) is None else round(self.escalation_rate(pattern), 3),
+                "requests": entry["requests"],
+                "routes_to": RENDER if (self.escalation_rate(pattern) or 0) >= self.skip_plain_above else PLAIN,
+            }
+            for pattern, entry in self.patterns.items()
+        }
+
+# Shared instance used by the scraper scripts
+FETCH_TIER_STATS = TierStats.load()
+
+def tier_options(base_config: Dict, tier: str) -> Dict:
+    """Fetch options for a tier: the base config with or without JS rendering"""
+    config = dict(base_config)
+    if tier == PLAIN:
+        config["render_js"] = False
+        for key in RENDER_ONLY_KEYS:
+            config.pop(key, None)
+    else:
+        config["render_js"] = True
+    return config
+
+def _is_complete(parsed: Dict) -> bool:
+    return bool(parsed.get("success"))
+
+def as_backend(client, limiter: AIMDLimiter) -> FetchBackend:
+    """`client` as a fetch backend: a ScrapflyClient is wrapped, calls held under `limiter`"""
+    if isinstance(client, FetchBackend):
+        return client
+    return ScrapflyBackend(client, limiter=limiter)
+
+async def scrape_tier(backend: FetchBackend, url: str, base_config: Dict, tier: str, pattern: str, hedger: Hedger):
+    """One fetch at a tier through `backend`; renders are hedged as well"""
+    if tier == PLAIN:
+        return await backend.fetch(url, **tier_options(base_config, PLAIN))
+    return await hedger.run(pattern, lambda attempt: backend.fetch(
+        url, **tier_options(hedge_variant(base_config, attempt), RENDER)
+    ))
+
+async def fetch_tiered(client, url: str, parse: Callable, base_config: Dict,
+                       is_complete: Callable[[Dict], bool] = _is_complete,
+                       stats: Optional[TierStats] = None, limiter: Optional[AIMDLimiter] = None,
+                       hedger: Optional[Hedger] = None, plain_backend: Optional[FetchBackend] = None) -> Tuple[Dict, Dict]:
+    """Fetch and parse a URL, escalating to a JS render only when data is missing
+
+    `client` is a ScrapflyClient or a FetchBackend; `plain_backend` defaults to it.
+    """
+    stats = stats or FETCH_TIER_STATS
+    hedger = hedger or RENDER_HEDGER
+    backend = as_backend(client, limiter or SCRAPFLY_LIMITER)
+    plain_backend = plain_backend or backend
+    pattern = url_pattern(url)
+    tier = stats.start_tier(pattern)
+    info = {"pattern": pattern, "start_tier": tier, "tier": tier, "escalated": False}
+
+    if tier == PLAIN:
+        try:
+            response = await scrape_tier(plain_backend, url, base_config, PLAIN, pattern, hedger)
+            parsed = parse(response)
+        except Exception as e:
+            log.debug(f"Plain fetch of {url} failed: {e}")
+            parsed = {"success": False, "error": str(e), "url": url}
+
+        complete = is_complete(parsed)
+        stats.record(pattern, PLAIN, complete)
+        if complete:
+            return parsed, info
+
+        log.debug(f"Escalating {url} to a JS render ({pattern})")
+        info.update({"tier": RENDER, "escalated": True})
+
+    response = await scrape_tier(backend, url, base_config, RENDER, pattern, hedger)
+    parsed = parse(response)
+    stats.record(pattern, RENDER, is_complete(parsed))
+    return parsed, info
+
+def tiered_pipeline(client, parse: Callable, base_config: Dict,
+                    is_complete: Callable[[Dict], bool] = _is_complete,
+                    stats: Optional[TierStats] = None, concurrency: Optional[int] = None,
+                    parse_workers: int = DEFAULT_PARSE_WORKERS, limiter: Optional[AIMDLimiter] = None,
+                    hedger: Optional[Hedger] = None, sink: Optional[Callable[[Job, Dict], Any]] = None,
+                    keep_results: bool = True, plain_backend: Optional[FetchBackend] = None) -> Pipeline:
+    """Pipeline that fetches at the routed tier, parses in the process pool and
+    re-fetches incomplete plain results as a JS render
+
+    `client` is a ScrapflyClient or a FetchBackend, and `plain_backend`
+    (default: the same) serves the plain tier. Scrapfly calls in flight
+    follow the adaptive limiter, capped by `concurrency`; slow renders are
+    hedged when the hedger has a budget. `sink` receives each final result
+    as soon as it is parsed.
+    """
+    stats = stats or FETCH_TIER_STATS
+    limiter = limiter or SCRAPFLY_LIMITER
+    hedger = hedger or RENDER_HEDGER
+    backend = as_backend(client, limiter)
+    plain_backend = plain_backend or backend
+
+    async def fetch(job: Job):
+        if "fetch_tier" not in job.meta:
+            pattern = url_pattern(job.url)
+            tier = stats.start_tier(pattern)
+            job.meta["fetch_tier"] = {"pattern": pattern, "start_tier": tier, "tier": tier, "escalated": False}
+        info = job.meta["fetch_tier"]
+        tier_backend = plain_backend if info["tier"] == PLAIN else backend
+        return await scrape_tier(tier_backend, job.url, base_config, info["tier"], info["pattern"], hedger)
+
+    def on_parsed(job: Job, parsed: Dict) -> Optional[Job]:
+        info = job.meta.get("fetch_tier") or {"pattern": url_pattern(job.url)}
+        if "tier" in info:
+            complete = is_complete(parsed)
+            stats.record(info["pattern"], info["tier"], complete)
+            if info["tier"] == PLAIN and not complete:
+                log.debug(f"Escalating {job.url} to a JS render ({info['pattern']})")
+                info.update({"tier": RENDER, "escalated": True})
+                return job
+        parsed["fetch_tier"] = info
+        return None
+
+    return Pipeline(
+        fetch=fetch,
+        parse=parse,
+        sink=sink,
+        on_parsed=on_parsed,
+        # Idle fetch workers wait on the limiter, so this is only the ceiling
+        fetch_concurrency=concurrency or limiter.max_limit,
+        parse_workers=parse_workers,
+        keep_results=keep_results
+    )
+
+async def fetch_tiered_many(client, urls: List[str], parse: Callable, base_config: Dict,
+                            is_complete: Callable[[Dict], bool] = _is_complete,
+                            stats: Optional[TierStats] = None, concurrency: Optional[int] = None,
+                            plain_backend: Optional[FetchBackend] = None) -> List[Dict]:
+    """Tiered fetch of many URLs through the staged pipeline; each result carries its `fetch_tier` info"""
+    pipeline = tiered_pipeline(client, parse, base_config, is_complete, stats, concurrency,
+                               plain_backend=plain_backend)
+    return await pipeline.run(urls)
+
+if __name__ == "__main__":
+    print(f"🪜 Fetch tier stats ({FETCH_TIER_STATS.path})")
+    for pattern, row in sorted(FETCH_TIER_STATS.summary().items()):
+        rate = "n/a" if row["escalation_rate"] is None else f"{row['escalation_rate'] * 100:.0f}%"
+        print(f"  {pattern}: escalation {rate} over {row['requests']} requests -> {row['routes_to']}")
@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
 """
 Sales Navigator with fresh session approach
+
+Sessions are warmed once per session lifetime by SESSION_POOL (see
+sales_nav_session_pool.py) instead of before every target URL.
 """
 
 import os
-import json
 import asyncio
 from scrapfly import ScrapeConfig, ScrapflyClient
+from sales_nav_render_wait import build_wait_script, read_wait_report
+from sales_nav_access_guard import detect_access_block
+from sales_nav_session_pool import SessionPool, SessionWarmError, scrapfly_health_check
+from sales_nav_debug_capture import DEBUG_CAPTURE, is_failure
+from sales_nav_sink import NDJSONSink
+from sales_nav_identity import dedupe_leads
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
 
-async def establish_fresh_sales_nav_session():
+def print_render_wait(response):
+    """Print and return how long the render wait took"""
+    report = read_wait_report(response)
+    if report:
+        print(f"⏱️ Render wait: {report.get('outcome')} after {report.get('time_to_results_ms')} ms")
+    return report
+
+async def establish_fresh_sales_nav_session(session: str = "fresh_sales_nav"):
     """Establish a fresh Sales Navigator session before scraping"""
     
     cookies = {"li_at": os.environ.get("LINKEDIN_COOKIE_LI_AT", "")}
@@ -24,21 +39,14 @@ async def establish_fresh_sales_nav_session():
         asp=True,
         country="US",
         render_js=True,
-        js="""
-        new Promise(resolve => {
-            console.log('Accessing Sales Navigator home...');
-            setTimeout(() => {
-                console.log('Sales Navigator home loaded');
-                resolve(true);
-            }, 8000);
-        });
-        """,
-        session="fresh_sales_nav"
+        js=build_wait_script(result_selectors=[], max_ms=10000),
+        session=session
     )
     
     try:
         home_response = await SCRAPFLY.async_scrape(home_config)
         print(f"✅ Sales Navigator home: {home_response.status_code}")
+        print_render_wait(home_response)
         
         # Check what we got
         title = home_response.selector.css("title::text").get() or ""
@@ -61,20 +69,13 @@ async def establish_fresh_sales_nav_session():
                 asp=True,
                 country="US",
                 render_js=True,
-                js="""
-                new Promise(resolve => {
-                    console.log('Accessing people search...');
-                    setTimeout(() => {
-                        console.log('People search loaded');
-                        resolve(true);
-                    }, 10000);
-                });
-                """,
-                session="fresh_sales_nav"  # Same session
+                js=build_wait_script(result_selectors=[], max_ms=12000),
+                session=session  # Same session
             )
             
             search_response = await SCRAPFLY.async_scrape(search_config)
             print(f"✅ People search: {search_response.status_code}")
+            print_render_wait(search_response)
             
             search_title = search_response.selector.css("title::text").get() or ""
             search_content = search_response.content.lower()
@@ -82,28 +83,47 @@ async def establish_fresh_sales_nav_session():
             print(f"📄 Search title: {search_title}")
             print(f"🔍 Has search interface: {'search' in search_content}")
             
-            # Save this response for analysis
-            with open("tmp/debug/sales_nav_search_page.html", "w", encoding="utf-8") as f:
-                f.write(search_response.content)
+            # Keep a sample of search pages for analysis
+            DEBUG_CAPTURE.capture("fresh_search", search_response.content, meta={"session": session})
             
-            return search_response, "fresh_sales_nav"
+            return search_response, session
         
-        return home_response, "fresh_sales_nav"
+        return home_response, session
         
     except Exception as e:
         print(f"❌ Error establishing session: {e}")
         return None, None
 
-async def scrape_with_fresh_session(target_url: str):
-    """Scrape target URL with fresh session"""
-    
-    # First establish session
-    session_response, session_id = await establish_fresh_sales_nav_session()
+async def warm_fresh_session(session: str) -> bool:
+    """Pool warm-up: establish the session and reject login walls and upsells"""
+    response, _ = await establish_fresh_sales_nav_session(session)
+    return response is not None and detect_access_block(response.content) is None
+
+# Warm sessions shared by every target URL in this process (and later runs)
+SESSION_POOL = SessionPool(
+    warm=warm_fresh_session,
+    health_check=scrapfly_health_check(SCRAPFLY),
+    size=int(os.environ.get("SALES_NAV_SESSION_POOL_SIZE", "2")),
+    prefix="fresh_sales_nav"
+)
+
+async def scrape_with_fresh_session(target_url: str, pool: SessionPool = None):
+    """Scrape target URL with a warm session leased from the pool"""
+    pool = pool or SESSION_POOL
     
-    if not session_response:
-        return {"success": False, "error": "Could not establish session"}
+    try:
+        async with pool.lease() as session_id:
+            result = await scrape_in_session(target_url, session_id)
+            if result.get("access_blocked"):
+                pool.mark_unhealthy(session_id)
+            return result
+    except SessionWarmError as e:
+        return {"success": False, "error": f"Could not establish session: {e}"}
+
+async def scrape_in_session(target_url: str, session_id: str):
+    """Scrape target URL in an already warm session"""
     
-    print(f"\n🎯 Step 2: Scraping target URL with fresh session...")
+    print(f"\n🎯 Step 2: Scraping target URL with warm session {session_id}...")
     
     # Now scrape the target URL
     target_config = ScrapeConfig(
@@ -111,72 +131,7 @@ async def scrape_with_fresh_session(target_url: str):
         asp=True,
         country="US",
         render_js=True,
-        js="""
-        new Promise(resolve => {
-            console.log('Loading target Sales Navigator URL...');
-            
-            let attempts = 0;
-            const maxAttempts = 30;
-            
-            const checkContent = () => {
-                attempts++;
-                console.log(`Checking content, attempt ${attempts}`);
-                
-                // Look for actual search results
-                const resultSelectors = [
-                    '.reusable-search__result-container',
-                    '.search-results-container', 
-                    '.search-results__list',
-                    '.artdeco-list',
-                    '[data-x-search-result]'
-                ];
-                
-                for (const selector of resultSelectors) {
-                    const elements = document.querySelectorAll(selector + ' li, ' + selector + ' .result');
-                    if (elements.length > 0) {
-                        console.log(`Found ${elements.length} results with ${selector}`);
-                        resolve(true);
-                        return;
-                    }
-                }
-                
-                // Check for "no results" message
-                const noResultsSelectors = [
-                    '.empty-state',
-                    '.no-results',
-                    '.search-no-results'
-                ];
-                
-                for (const selector of noResultsSelectors) {
-                    if (document.querySelector(selector)) {
-                        console.log(`Found no results state: ${selector}`);
-                        resolve(true);
-                        return;
-                    }
-                }
-                
-                // Check body text for search indicators
-                const bodyText = document.body.innerText.toLowerCase();
-                if (bodyText.includes('results for') || 
-                    bodyText.includes('people found') ||
-                    bodyText.includes('no people found') ||
-                    bodyText.includes('try adjusting your search')) {
-                    console.log('Found search results text');
-                    resolve(true);
-                    return;
-                }
-                
-                if (attempts < maxAttempts) {
-                    setTimeout(checkContent, 3000);
-                } else {
-                    console.log('Max attempts reached');
-                    resolve(true);
-                }
-            };
-            
-            setTimeout(checkContent, 5000);
-        });
-        """,
+        js=build_wait_script(max_ms=90000, harvest=True),
         session=session_id  # Use the established session
     )
     
@@ -185,10 +140,7 @@ async def scrape_with_fresh_session(target_url: str):
         
         print(f"📄 Target response: {response.status_code}")
         print(f"📊 Content size: {len(response.content)} bytes")
-        
-        # Save for analysis
-        with open("tmp/debug/target_with_fresh_session.html", "w", encoding="utf-8") as f:
-            f.write(response.content)
+        render_wait = print_render_wait(response)
         
         # Analyze content
         selector = response.selector
@@ -238,14 +190,8 @@ async def scrape_with_fresh_session(target_url: str):
                     "index": idx
                 })
         
-        # Remove duplicates
-        unique_profiles = []
-        seen_names = set()
-        for profile in profiles:
-            name = profile.get('name', '').lower()
-            if name and name not in seen_names:
-                seen_names.add(name)
-                unique_profiles.append(profile)
+        # Remove duplicates (these name-only records fall back to the normalized name)
+        unique_profiles = dedupe_leads(profiles)
         
         result = {
             "success": len(unique_profiles) > 0 or has_no_results,
@@ -257,9 +203,18 @@ async def scrape_with_fresh_session(target_url: str):
             "has_search_interface": has_search_interface,
             "title": title,
             "url": target_url,
-            "status_code": response.status_code
+            "status_code": response.status_code,
+            "access_blocked": detect_access_block(response.content) is not None,
+            "session": session_id,
+            "render_wait": render_wait
         }
         
+        # Save for analysis when nothing was found, and a sample of the rest
+        result["debug_capture"] = DEBUG_CAPTURE.capture(
+            "fresh_target", response.content, meta={"url": target_url, "session": session_id, "title": title},
+            failed=is_failure(result)
+        )
+        
         return result
         
     except Exception as e:
@@ -279,13 +234,14 @@ async def test_fresh_session_approach():
     print("=" * 65)
     
     result = await scrape_with_fresh_session(target_url)
+    SESSION_POOL.close()
+    print(f"🏊 Session pool: {SESSION_POOL.stats}")
     
-    # Save results
-    os.makedirs("tmp", exist_ok=True)
-    with open("tmp/fresh_session_results.json", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    # Append the leads and the page record; earlier runs stay in the file
+    with NDJSONSink("tmp/fresh_session_results.ndjson") as sink:
+        sink.write_result(result)
     
-    print(f"\n💾 Results saved to tmp/fresh_session_results.json")
+    print(f"\n💾 Results appended to tmp/fresh_session_results.ndjson")
     
     if result.get("success"):
         print(f"🎉 SUCCESS!")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Hedged requests for slow Scrapfly renders
+
+A few Sales Navigator renders take a minute or more, and a batch is not done
+until its slowest page is. `Hedger.run` starts the primary attempt and, when
+it is still running after the p95 latency of its URL class (the caller
+passes `sales_nav_fetch_tiers.url_pattern(url)`), fires a second attempt
+on a different session / proxy and returns whichever finishes first with a
+result.
+
+- hedging is off unless a budget is set: at most `budget` extra requests per
+  primary request (0.05 = 5% extra spend), plus a small burst allowance
+- a URL class is only hedged once `min_samples` latencies are known; the
+  latencies are persisted so the p95 survives between runs
+- the losing attempt is not cancelled (the Scrapfly call is already paid
+  for); a finished primary gives the counterfactual latency, so `report()`
+  can compare the p99 with hedging against the p99 without it
+
+Usage:
+    from sales_nav_hedging import RENDER_HEDGER, hedge_variant
+
+    response = await RENDER_HEDGER.run(url_pattern(url), lambda attempt: limited_scrape(
+        SCRAPFLY, ScrapeConfig(url, **hedge_variant(BASE_CONFIG, attempt))
+    ))
+    await RENDER_HEDGER.drain()
+    print(RENDER_HEDGER.report())
+
+    SCRAPFLY_HEDGE_BUDGET=0.05 python scripts/sales_navigator_advanced.py
+    python scripts/sales_nav_hedging.py   # print the persisted p95 per URL class
+"""
+
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from loguru import logger as log
+
+DEFAULT_LATENCY_PATH = os.environ.get("RENDER_LATENCY_PATH", "tmp/render_latency.json")
+
+# Latencies kept per URL class for the running percentile
+LATENCY_WINDOW = 200
+
+# Most recent requests kept for report(); the counters cover every request
+OUTCOME_WINDOW = 1000
+
+# attempt number (0 = primary, 1 = hedge) -> awaitable response
+AttemptFactory = Callable[[int], Awaitable[Any]]
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of an unsorted sequence"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+def hedge_variant(config: Dict, attempt: int) -> Dict:
+    """Config for a hedge attempt: its own Scrapfly session, so it gets another browser and proxy"""
+    if attempt == 0:
+        return config
+    variant = dict(config)
+    if variant.get("session"):
+        variant["session"] = f"{variant['session']}_hedge{attempt}"
+    # A cached answer for the primary would defeat the point
+    variant["cache"] = False
+    return variant
+
+class Hedger:
+    """Fires a second attempt when the first exceeds its URL class's running p95"""
+
+    def __init__(self, budget: float = 0.0, pct: float = 95.0, min_samples: int = 20, burst: int = 2,
+                 min_delay_ms: float = 1000.0, path: Optional[str] = DEFAULT_LATENCY_PATH):
+        self.budget = budget
+        self.pct = pct
+        self.min_samples = min_samples
+        self.burst = burst
+        self.min_delay_ms = min_delay_ms
+        self.path = path
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        # Per recent request: latency returned to the caller, latency of the primary alone
+        self.outcomes: Deque[Dict] = deque(maxlen=OUTCOME_WINDOW)
+        self._pending: set = set()
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_LATENCY_PATH, **kwargs) -> "Hedger":
+        """Start from the latencies recorded by earlier runs"""
+        hedger = cls(path=path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f).get("patterns", {})
+                hedger.latencies = {p: deque(v, maxlen=LATENCY_WINDOW) for p, v in saved.items()}
+            except Exception as e:
+                log.warning(f"Could not load render latencies from {path}: {e}")
+        return hedger
+
+    def save(self) -> None:
+        """Write the latency windows to disk atomically"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "patterns": {p: list(v) for p, v in self.latencies.items()}}, f)
+        os.replace(tmp_path, self.path)
+
+    def _observe(self, pattern: str, latency_ms: float) -> None:
+        self.latencies.setdefault(pattern, deque(maxlen=LATENCY_WINDOW)).append(round(latency_ms, 1))
+
+    def hedge_delay_ms(self, pattern: str) -> Optional[float]:
+        """How long to wait before hedging, None while the URL class has too few samples"""
+        window = self.latencies.get(pattern)
+        if not window or len(window) < self.min_samples:
+            return None
+        return max(self.min_delay_ms, percentile(window, self.pct))
+
+    def _may_hedge(self) -> bool:
+        return self.hedges < self.budget * self.primaries + self.burst
+
+    async def _timed(self, attempt: Awaitable) -> Dict:
+        started = time.perf_counter()
+        try:
+            result = await attempt
+            return {"result": result, "error": None, "ms": (time.perf_counter() - started) * 1000}
+        except Exception as e:
+            return {"result": None, "error": e, "ms": (time.perf_counter() - started) * 1000}
+
+    def _finish_primary(self, pattern: str, outcome: Dict, task: asyncio.Task) -> None:
+        """Record the primary's latency once it completes, even after a hedge won"""
+        self._pending.discard(task)
+        if task.cancelled():
+            return
+        primary = task.result()
+        if primary["error"] is None:
+            self._observe(pattern, primary["ms"])
+        outcome["primary_ms"] = round(primary["ms"], 1)
+
+    async def run(self, pattern: str, attempt: AttemptFactory) -> Any:
+        """Run `attempt(0)`, hedging with `attempt(1)` if it is slower than the class p95"""
+        self.primaries += 1
+        started = time.perf_counter()
+        outcome = {"pattern": pattern, "hedged": False, "winner": "primary", "ms": None, "primary_ms": None}
+        self.outcomes.append(outcome)
+
+        primary = asyncio.ensure_future(self._timed(attempt(0)))
+        self._pending.add(primary)
+        primary.add_done_callback(lambda task: self._finish_primary(pattern, outcome, task))
+
+        delay = self.hedge_delay_ms(pattern) if self.budget > 0 else None
+        if delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=delay / 1000)
+            if not done and not self._may_hedge():
+                self.denied += 1
+            elif not done:
+                self.hedges += 1
+                outcome["hedged"] = True
+                log.info(f"🪁 Hedging a {pattern} request after {delay:.0f} ms (p{self.pct:.0f})")
+                hedge = asyncio.ensure_future(self._timed(attempt(1)))
+                self._pending.add(hedge)
+                hedge.add_done_callback(self._pending.discard)
+
+                # First attempt to succeed wins; an error only wins if both fail
+                pending = {primary, hedge}
+                first_error = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        value = task.result()
+                        if value["error"] is None:
+                            if task is hedge:
+                                self.hedge_wins += 1
+                                outcome["winner"] = "hedge"
+                            outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+                            return value["result"]
+                        first_error = first_error or value["error"]
+                outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+                raise first_error
+
+        value = await primary
+        outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if value["error"] is not None:
+            raise value["error"]
+        return value["result"]
+
+    async def drain(self) -> None:
+        """Wait for losing attempts still in flight, so every primary has a counterfactual"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        self.save()
+
+    def report(self) -> Dict:
+        """Tail latency with hedging against the primaries alone (last OUTCOME_WINDOW
+        requests), and the extra spend"""
+        finished = [o for o in self.outcomes if o["ms"] is not None and o["primary_ms"] is not None]
+        with_hedging = [o["ms"] for o in finished]
+        without = [o["primary_ms"] for o in finished]
+        p99_with = percentile(with_hedging, 99)
+        p99_without = percentile(without, 99)
+        reduction = round(100 * (1 - p99_with / p99_without), 1) if p99_without else 0.0
+        if reduction == 0:
+            # round() keeps the sign of a tiny regression; report no change as 0.0, not -0.0
+            reduction = 0.0
+        return {
+            "budget": self.budget,
+            "requests": self.primaries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "denied_by_budget": self.denied,
+            "extra_requests_pct": round(100 * self.hedges / self.primaries, 1) if self.primaries else 0.0,
+            "p50_ms": {"hedged": round(percentile(with_hedging, 50), 1), "primary_only": round(percentile(without, 50), 1)},
+            "p95_ms": {"hedged": round(percentile(with_hedging, 95), 1), "primary_only": round(percentile(without, 95), 1)},
+            "p99_ms": {"hedged": round(p99_with, 1), "primary_only": round(p99_without, 1)},
+            "p99_reduction_pct": reduction,
+        }
+
+# Shared hedger for JS renders; off unless SCRAPFLY_HEDGE_BUDGET is set
+RENDER_HEDGER = Hedger.load(budget=float(os.environ.get("SCRAPFLY_HEDGE_BUDGET", 0)))
+
+if __name__ == "__main__":
+    print(f"🪁 Render latency per URL class ({RENDER_HEDGER.path})")
+    for pattern, window in sorted(RENDER_HEDGER.latencies.items()):
+        delay = RENDER_HEDGER.hedge_delay_ms(pattern)
+        hedge_after = "not enough samples" if delay is None else f"hedge after {delay / 1000:.1f} s"
+        print(f"  {pattern}: {len(window)} samples, p50 {percentile(window, 50) / 1000:.1f} s, "
+              f"p95 {percentile(window, 95) / 1000:.1f} s -> {hedge_after}")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Pre-parse trimming of Sales Navigator pages
+
+Rendered search pages are megabytes of scripts, styles and inline SVG, and
+`response.selector` builds an lxml tree from all of it although the CSS
+extractors only read the result list. `trim_html` cuts the page down on the
+raw string, before any DOM is built:
+
+- "noise"    drops comments, <style>, <svg>, <noscript> and every <script>
+             except JSON data scripts (application/json, application/ld+json)
+- "results"  also drops everything outside the result list (the <ol>/<ul>
+             around the `data-x-search-result` items) and keeps the <title>,
+             the <code> / JSON script blocks that mention a person (what
+             sales_nav_embedded_json reads) and JSON-LD
+- "off"      returns the page unchanged
+
+"results" leaves the page untouched when it has no result list, or when
+result items lie outside it, so empty, blocked and unusual pages keep their
+full structure for the page analysis. The mode defaults to
+SALES_NAV_HTML_TRIM ("results").
+
+lxml builds a tree from a multi-MB page in a few ms, faster than any regex
+pass over the same string, so trimming only uses str.find / rfind (C speed)
+and scans the page as few times as possible. Rendered pages are serialized by
+the browser, so tag names are lowercase.
+
+Usage:
+    from sales_nav_html_trim import trimmed_selector
+
+    selector, trim_info = trimmed_selector(response.content)
+    profiles, plan_info = extract_profiles_planned(selector)
+
+    python scripts/sales_nav_html_trim.py                       # benchmark over tmp/debug
+    python scripts/sales_nav_html_trim.py --corpus tmp/corpus.pack --repeat 3
+"""
+
+import gc
+import os
+import re
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from parsel import Selector
+
+from sales_nav_embedded_json import PERSON_HINTS
+
+MODE_OFF = "off"
+MODE_NOISE = "noise"
+MODE_RESULTS = "results"
+MODES = (MODE_OFF, MODE_NOISE, MODE_RESULTS)
+
+DEFAULT_MODE = os.environ.get("SALES_NAV_HTML_TRIM", MODE_RESULTS)
+
+# Elements no extractor reads; JSON scripts among them are kept
+NOISE_OPEN_RE = re.compile(r'<(!--|(?:style|svg|noscript|script)\b)')
+# Elements that may carry the embedded JSON
+DATA_OPEN_RE = re.compile(r'<(code|script)\b')
+DATA_SCRIPT_TYPES = ('"application/json"', '"application/ld+json"', "'application/json'", "'application/ld+json'")
+
+# Attributes / classes of a result card, as matched by the extractors' container selectors
+RESULT_MARKERS = ("data-x-search-result", "search-results__result-item", "result-lockup")
+
+LIST_TAG_RE = re.compile(r'<(/?)(?:ol|ul)\b[^>]*>')
+
+def _elements(html: str, opening: re.Pattern) -> List[Tuple[str, int, int, int]]:
+    """(tag, start, end of opening tag, end) of each outermost element whose opening tag matches
+
+    One pass: the search resumes after each element, so nothing inside a skipped
+    element (a "<svg" in a script string, a script in a comment) is matched.
+    """
+    found = []
+    match = opening.search(html)
+    while match:
+        tag, start = match.group(1), match.start()
+        if tag == "!--":
+            tag_end, closing = match.end(), "-->"
+        else:
+            tag_end, closing = html.find(">", match.end()) + 1, f"</{tag}>"
+            if tag_end == 0:
+                break
+        if closing != "-->" and html[tag_end - 2] == "/":
+            end = tag_end
+        else:
+            close = html.find(closing, tag_end)
+            if close < 0:
+                break
+            end = close + len(closing)
+        found.append((tag, start, tag_end, end))
+        match = opening.search(html, end)
+    return found
+
+def _is_data_script(html: str, start: int, tag_end: int) -> bool:
+    return any(html.find(kind, start, tag_end) >= 0 for kind in DATA_SCRIPT_TYPES)
+
+def strip_noise(html: str) -> str:
+    """Remove comments, styles, SVG, noscript and non-data scripts"""
+    parts = []
+    pos = 0
+    for tag, start, tag_end, end in _elements(html, NOISE_OPEN_RE):
+        if tag == "script" and _is_data_script(html, start, tag_end):
+            continue
+        parts.append(html[pos:start])
+        pos = end
+    if not parts:
+        return html
+    parts.append(html[pos:])
+    return "".join(parts)
+
+def _list_end(html: str, start: int) -> int:
+    """End offset of the <ol>/<ul> opened at `start`, -1 if it is never closed"""
+    depth = 0
+    for match in LIST_TAG_RE.finditer(html, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return -1
+
+def find_result_list(html: str) -> Optional[Tuple[int, int]]:
+    """Span of the list holding every result card, None when there is no such list"""
+    # Markers in order of preference; each full scan of a multi-MB page costs ~1-2 ms
+    for marker in RESULT_MARKERS:
+        first = html.find(marker)
+        if first >= 0:
+            break
+    else:
+        return None
+    last = html.rfind(marker)
+
+    start = max(html.rfind("<ol", 0, first), html.rfind("<ul", 0, first))
+    if start < 0:
+        return None
+    end = _list_end(html, start)
+    if end < last:
+        # The nearest list closes before the last card: cards are not all in one list
+        return None
+    return start, end
+
+def data_blocks(html: str) -> List[str]:
+    """<code> and JSON script blocks that mention a person, plus JSON-LD"""
+    blocks = []
+    for tag, start, tag_end, end in _elements(html, DATA_OPEN_RE):
+        if tag == "script":
+            if not _is_data_script(html, start, tag_end):
+                continue
+            if html.find("ld+json", start, tag_end) >= 0:
+                blocks.append(html[start:end])
+                continue
+        if any(html.find(hint, tag_end, end) >= 0 for hint in PERSON_HINTS):
+            blocks.append(html[start:end])
+    return blocks
+
+def trim_to_results(html: str) -> Optional[str]:
+    """Title, result list and person data blocks of a page; None without a result list"""
+    span = find_result_list(html)
+    if span is None:
+        return None
+
+    title_start = html.find("<title", 0, span[0])
+    title_end = html.find("</title>", title_start) if title_start >= 0 else -1
+    title = html[title_start:title_end + len("</title>")] if title_end >= 0 else ""
+    return "".join([
+        "<html><head>", title, "</head><body>",
+        html[span[0]:span[1]], *data_blocks(html),
+        "</body></html>",
+    ])
+
+def trim_html(html: str, mode: str = DEFAULT_MODE) -> Tuple[str, str]:
+    """Trimmed page and the mode actually applied ("results" falls back to "off")"""
+    if mode not in MODES:
+        raise ValueError(f"Unknown trim mode {mode!r}, expected one of {MODES}")
+    if mode == MODE_OFF or not html:
+        return html, MODE_OFF
+
+    if mode == MODE_NOISE:
+        return strip_noise(html), MODE_NOISE
+
+    results = trim_to_results(html)
+    if results is None:
+        return html, MODE_OFF
+    return results, MODE_RESULTS
+
+def trimmed_selector(html: str, mode: Optional[str] = None) -> Tuple[Selector, Dict]:
+    """Selector over the trimmed page, plus what the trim did"""
+    started = time.perf_counter()
+    trimmed, applied = trim_html(html, mode or DEFAULT_MODE)
+    info = {
+        "mode": applied,
+        "original_bytes": len(html),
+        "trimmed_bytes": len(trimmed),
+        "trim_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    return Selector(text=trimmed), info
+
+def _rss_kb() -> float:
+    with open("/proc/self/statm", "r") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+
+def _dom_memory_kb(contents: List[str], mode: str) -> float:
+    """Runs in a fresh process: resident memory per trimmed page plus its tree"""
+    gc.collect()
+    before = _rss_kb()
+    kept = []
+    for content in contents:
+        trimmed, _ = trim_html(content, mode)
+        selector = Selector(text=trimmed)
+        selector.css("li")
+        kept.append((trimmed, selector))
+    gc.collect()
+    return (_rss_kb() - before) / len(kept) if kept else 0.0
+
+def benchmark_trim(pages: List, modes: Tuple[str, ...] = MODES, repeat: int = 1, memory_sample: int = 20) -> Dict:
+    """Per-page trim + DOM build time, DOM memory and profiles found, per mode"""
+    from sales_nav_corpus import EXTRACTORS, _percentile, quiet_extractors
+    from sales_nav_response import PageResponse
+
+    report = {}
+    for mode in modes:
+        timings = []
+        applied = {}
+        sizes = 0
+        for _ in range(repeat):
+            for page in pages:
+                started = time.perf_counter()
+                trimmed, used = trim_html(page.content, mode)
+                Selector(text=trimmed)
+                timings.append((time.perf_counter() - started) * 1000)
+                applied[used] = applied.get(used, 0) + 1
+                sizes += len(trimmed)
+
+        # libxml2 allocates outside the Python heap (tracemalloc cannot see the tree),
+        # so memory is the RSS growth of a fresh process holding the trimmed DOMs
+        sample = [page.content for page in pages[:memory_sample]]
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            dom_kb = pool.submit(_dom_memory_kb, sample, mode).result()
+
+        # End to end (trim, tree, extraction) per extractor; counts must match the untrimmed run
+        profiles = {}
+        extract_ms = {}
+        with quiet_extractors():
+            for name, func in EXTRACTORS.items():
+                found = 0
+                started = time.perf_counter()
+                for page in pages:
+                    try:
+                        found += len(func(PageResponse(trim_html(page.content, mode)[0], url=page.url, name=page.name)))
+                    except Exception:
+                        pass
+                extract_ms[name] = round((time.perf_counter() - started) * 1000 / len(pages), 3) if pages else 0.0
+                profiles[name] = found
+
+        report[mode] = {
+            "ms_per_page": round(sum(timings) / len(timings), 3) if timings else 0.0,
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "bytes_per_page": round(sizes / len(timings)) if timings else 0,
+            "dom_kb_per_page": round(dom_kb, 1),
+            "applied": applied,
+            "profiles": profiles,
+            "extract_ms": extract_ms,
+        }
+    return report
+
+def main() -> int:
+    from sales_nav_corpus import DEFAULT_CORPUS, load_corpus
+
+    parser = argparse.ArgumentParser(description="Benchmark HTML trimming before DOM construction")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of saved pages, or a *.pack")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, limit=args.limit)
+    if not pages:
+        print(f"❌ No HTML pages found in {args.corpus}")
+        return 1
+
+    report = benchmark_trim(pages, repeat=args.repeat)
+    baseline = report[MODE_OFF]
+    print(f"✂️ Trim + parse over {len(pages)} pages")
+    print(f"  {'mode':<9}{'KB/page':>9}{'ms/page':>9}{'p95 ms':>9}{'DOM KB':>9}{'speedup':>9}{'mem saved':>11}")
+    for mode, stats in report.items():
+        speedup = baseline["ms_per_page"] / stats["ms_per_page"] if stats["ms_per_page"] else 0.0
+        saved = 100 * (1 - stats["dom_kb_per_page"] / baseline["dom_kb_per_page"]) if baseline["dom_kb_per_page"] else 0.0
+        print(f"  {mode:<9}{stats['bytes_per_page'] / 1024:>9.1f}{stats['ms_per_page']:>9}{stats['p95_ms']:>9}"
+              f"{stats['dom_kb_per_page']:>9}{speedup:>8.1f}x{saved:>10.0f}%")
+
+    print("\n  trim + parse + extract, ms/page (profiles found must match 'off'):")
+    for name in baseline["profiles"]:
+        cells = "".join(f"{mode} {report[mode]['extract_ms'][name]:>7} ({report[mode]['profiles'][name]})  " for mode in report)
+        flag = "✅" if len({report[mode]["profiles"][name] for mode in report}) == 1 else "❌"
+        print(f"  {flag} {name:<32}{cells}")
+    print(f"\n  modes applied: { {mode: stats['applied'] for mode, stats in report.items()} }")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Canonical lead identity and a persistent seen-set across runs
+
+The scrapers deduped on `name + profile_url` strings, so one person got
+through under several URL forms (/in/<slug>, /sales/lead/<id>,...,
+/sales/people/<id>,..., with or without query strings), and nothing was
+remembered between runs. Here a lead is identified by what LinkedIn
+identifies it by:
+
+    member:<id>        urn:li:member:<id>
+    profile:<token>    the profile token in /sales/lead|people/<token>,... URLs and profile URNs
+    public:<slug>      the public identifier in /in/<slug> URLs (lowercased, unquoted)
+    email:<address>
+
+A lead can carry several (the embedded JSON gives the URN and the slug, the
+card only the sales URL); it matches another lead when any of them match.
+
+- `dedupe_leads` removes repeats within a page or run. The first occurrence
+  is kept and filled in with fields only the repeat has. Records that share
+  no identity (a card with only its sales URL, the embedded JSON with only
+  the URN and slug, a name-only record) are the same person when the
+  normalized name matches and neither an identity of the same kind nor the
+  company disagrees; namesakes with different URLs stay separate.
+- `SeenStore` remembers identities across runs: a Bloom filter answers
+  "never seen" without touching the exact store, which is a sorted array of
+  64-bit identity hashes (8 bytes per identity, collisions ~1e-8 at a
+  million leads). It is persisted to tmp/seen_leads.bin.
+- `SeenStore.mark(leads)` flags leads seen in an earlier run with
+  `known_lead: True` and records the new ones, so downstream stages (sink,
+  DB loader, enrichment) can skip known leads. Save the store only after
+  the leads are durably written (the sink closed): a lead saved as seen
+  but lost in a crash would be skipped by every later load.
+
+Usage:
+    from sales_nav_identity import SEEN_LEADS, dedupe_leads
+
+    profiles = dedupe_leads(profiles)
+    result["new_leads"] = SEEN_LEADS.mark(profiles)
+    with NDJSONSink(path) as sink:
+        sink.write_result(result)
+    SEEN_LEADS.save()
+
+    python scripts/sales_nav_identity.py                  # seen-set stats
+    python scripts/sales_nav_identity.py ids <url> [...]  # identities of profile URLs
+    python scripts/sales_nav_identity.py bench --leads 1000000
+"""
+
+import os
+import re
+import sys
+import math
+import time
+import struct
+import bisect
+import hashlib
+import argparse
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import unquote, urlsplit
+from loguru import logger as log
+
+DEFAULT_SEEN_PATH = os.environ.get("SALES_NAV_SEEN_PATH", "tmp/seen_leads.bin")
+DEFAULT_CAPACITY = int(os.environ.get("SALES_NAV_SEEN_CAPACITY", 1_000_000))
+DEFAULT_ERROR_RATE = 0.01
+
+MEMBER_URN_RE = re.compile(r'^urn:li:member:(\d+)$')
+# Profile URNs: urn:li:fs_salesProfile:(ACw...,NAME_SEARCH,x), urn:li:fsd_profile:ACo...
+PROFILE_URN_RE = re.compile(r'^urn:li:[A-Za-z_]+:\(?([A-Za-z0-9_-]{20,})')
+SALES_PATH_RE = re.compile(r'^/sales/(?:lead|people|profile)/([A-Za-z0-9_-]{8,})')
+PUBLIC_PATH_RE = re.compile(r'^/in/([^/?#]+)')
+
+# magic, version, bloom bits, hash count, capacity, identities
+_HEADER = struct.Struct("<4sBQIQQ")
+_MAGIC = b"SNSN"
+_VERSION = 1
+
+def url_identities(url: Optional[str]) -> List[str]:
+    """Identities in a LinkedIn profile URL (any host form, query and fragment ignored)"""
+    if not url or "linkedin.com" not in url:
+        return []
+    path = urlsplit(url if "://" in url else f"https://{url}").path
+    match = SALES_PATH_RE.match(path)
+    if match:
+        return [f"profile:{match.group(1)}"]
+    match = PUBLIC_PATH_RE.match(path)
+    if match:
+        return [f"public:{unquote(match.group(1)).lower()}"]
+    return []
+
+def lead_identities(lead: Dict) -> List[str]:
+    """Every identity of a lead, strongest first; empty when it only has a name"""
+    identities = []
+    member = MEMBER_URN_RE.match(lead.get("member_urn") or "")
+    if member:
+        identities.append(f"member:{member.group(1)}")
+    for value in (lead.get("profile_id"), lead.get("entity_urn")):
+        if not value:
+            continue
+        match = PROFILE_URN_RE.match(value)
+        token = match.group(1) if match else value if value.isascii() and len(value) >= 20 else None
+        if token and f"profile:{token}" not in identities:
+            identities.append(f"profile:{token}")
+    if lead.get("public_identifier"):
+        identities.append(f"public:{unquote(lead['public_identifier']).lower()}")
+    for identity in url_identities(lead.get("profile_url")):
+        if identity not in identities:
+            identities.append(identity)
+    if lead.get("email") and "@" in lead["email"]:
+        identities.append(f"email:{lead['email'].strip().lower()}")
+    return identities
+
+def lead_identity(lead: Dict) -> Optional[str]:
+    """Canonical identity of a lead, None when it only has a name"""
+    identities = lead_identities(lead)
+    return identities[0] if identities else None
+
+def _name_key(lead: Dict) -> str:
+    return " ".join((lead.get("name") or "").casefold().split())
+
+def merge_lead(target: Dict, other: Dict) -> None:
+    """Fill fields the target lacks from another record of the same person"""
+    for key, value in other.items():
+        if value and not target.get(key):
+            target[key] = value
+
+def _same_person(kept: Dict, lead: Dict, identities: List[str]) -> bool:
+    """Same-name records from different sources: no identity of one kind disagrees, nor the company"""
+    kept_kinds: Dict[str, Set[str]] = {}
+    for identity in lead_identities(kept):
+        kind, _, value = identity.partition(":")
+        kept_kinds.setdefault(kind, set()).add(value)
+    lead_kinds: Dict[str, Set[str]] = {}
+    for identity in identities:
+        kind, _, value = identity.partition(":")
+        lead_kinds.setdefault(kind, set()).add(value)
+    if any(kept_kinds[kind].isdisjoint(values) for kind, values in lead_kinds.items() if kind in kept_kinds):
+        return False
+    companies = {" ".join(str(record.get("company") or "").casefold().split()) for record in (kept, lead)}
+    return len(companies - {""}) <= 1
+
+def dedupe_leads(leads: List[Dict]) -> List[Dict]:
+    """One lead per person, in first-seen order, merging what repeats add"""
+    unique: List[Dict] = []
+    by_identity: Dict[str, Dict] = {}
+    by_name: Dict[str, List[Dict]] = {}
+    for lead in leads:
+        identities = lead_identities(lead)
+        name = _name_key(lead)
+        existing = next((by_identity[i] for i in identities if i in by_identity), None)
+        if existing is None and name:
+            # A card (sales URL) and its embedded JSON (member URN, slug) can share no identity
+            existing = next((kept for kept in by_name.get(name, []) if _same_person(kept, lead, identities)), None)
+
+        if existing is not None:
+            merge_lead(existing, lead)
+            target = existing
+        else:
+            unique.append(lead)
+            target = lead
+            if name:
+                by_name.setdefault(name, []).append(lead)
+        for identity in lead_identities(target):
+            by_identity[identity] = target
+    return unique
+
+def identity_hash(identity: str) -> int:
+    return int.from_bytes(hashlib.blake2b(identity.encode("utf-8"), digest_size=8).digest(), "little")
+
+class BloomFilter:
+    """Bit array with k probes per key, derived from one 64-bit hash (double hashing)"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE,
+                 bits: Optional[int] = None, hashes: Optional[int] = None, data: Optional[bytearray] = None):
+        self.capacity = max(1, capacity)
+        self.bits = bits or max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.bits / self.capacity * math.log(2)))
+        self.data = data if data is not None else bytearray((self.bits + 7) // 8)
+
+    def _probes(self, value: int) -> Iterable[int]:
+        low, high = value & 0xFFFFFFFF, (value >> 32) | 1
+        return ((low + i * high) % self.bits for i in range(self.hashes))
+
+    def add(self, value: int) -> None:
+        data = self.data
+        for bit in self._probes(value):
+            data[bit >> 3] |= 1 << (bit & 7)
+
+    def __contains__(self, value: int) -> bool:
+        data = self.data
+        return all(data[bit >> 3] & (1 << (bit & 7)) for bit in self._probes(value))
+
+class SeenStore:
+    """Persistent set of lead identities: Bloom filter in front of a sorted hash array"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_SEEN_PATH, capacity: int = DEFAULT_CAPACITY,
+                 error_rate: float = DEFAULT_ERROR_RATE):
+        self.path = path
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        # Sorted hashes from earlier runs, plus the ones added since the last merge
+        self._sorted = array("Q")
+        self._recent: Set[int] = set()
+        self.stats = {"checked": 0, "known": 0, "new": 0, "bloom_negative": 0, "bloom_false_positive": 0}
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_SEEN_PATH, **kwargs) -> "SeenStore":
+        """Load the seen-set from disk, starting empty if the file is missing or unreadable"""
+        store = cls(path=path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    magic, version, bits, hashes, capacity, count = _HEADER.unpack(f.read(_HEADER.size))
+                    if magic != _MAGIC or version != _VERSION:
+                        raise ValueError(f"not a seen-set file (magic {magic!r}, version {version})")
+                    bloom = bytearray(f.read((bits + 7) // 8))
+                    hashed = array("Q")
+                    hashed.frombytes(f.read(count * 8))
+                if len(hashed) != count:
+                    raise ValueError(f"truncated: {len(hashed)} of {count} identities")
+                store.bloom = BloomFilter(capacity, bits=bits, hashes=hashes, data=bloom)
+                store._sorted = hashed
+            except Exception as e:
+                log.warning(f"Could not load seen leads from {path}: {e}")
+        return store
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent)
+
+    def _contains(self, value: int) -> bool:
+        if value not in self.bloom:
+            self.stats["bloom_negative"] += 1
+            return False
+        if value in self._recent:
+            return True
+        index = bisect.bisect_left(self._sorted, value)
+        if index < len(self._sorted) and self._sorted[index] == value:
+            return True
+        self.stats["bloom_false_positive"] += 1
+        return False
+
+    def _add(self, value: int) -> None:
+        self._recent.add(value)
+        self.bloom.add(value)
+        if len(self) > self.bloom.capacity:
+            self._grow()
+
+    def _grow(self) -> None:
+        """Rebuild the filter at twice the capacity so its error rate holds"""
+        self._compact()
+        self.bloom = BloomFilter(self.bloom.capacity * 2, self.error_rate)
+        for value in self._sorted:
+            self.bloom.add(value)
+
+    def _compact(self) -> None:
+        if self._recent:
+            # Only identities not already stored are added, so there is nothing to dedupe
+            self._sorted = array("Q", sorted(chain(self._sorted, self._recent)))
+            self._recent = set()
+
+    def seen(self, lead: Dict) -> bool:
+        """Whether any identity of the lead was recorded before"""
+        return any(self._contains(identity_hash(identity)) for identity in lead_identities(lead))
+
+    def add(self, lead: Dict) -> bool:
+        """Record every identity of the lead; True when it was new"""
+        hashes = [identity_hash(identity) for identity in lead_identities(lead)]
+        present = [self._contains(value) for value in hashes]
+        for value, known in zip(hashes, present):
+            if not known:
+                self._add(value)
+        return not any(present)
+
+    def mark(self, leads: List[Dict]) -> int:
+        """Flag leads recorded in an earlier run with `known_lead`, record the rest; returns how many were new"""
+        new = 0
+        for lead in leads:
+            if not lead_identities(lead):
+                continue
+            self.stats["checked"] += 1
+            if self.add(lead):
+                new += 1
+                self.stats["new"] += 1
+            else:
+                lead["known_lead"] = True
+                self.stats["known"] += 1
+        return new
+
+    def save(self) -> None:
+        """Write the seen-set to disk atomically"""
+        if not self.path:
+            return
+
+        self._compact()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.bloom.bits, self.bloom.hashes,
+                                 self.bloom.capacity, len(self._sorted)))
+            f.write(self.bloom.data)
+            f.write(self._sorted.tobytes())
+        os.replace(tmp_path, self.path)
+
+    def memory_bytes(self) -> int:
+        return len(self.bloom.data) + self._sorted.itemsize * len(self._sorted) + sys.getsizeof(self._recent)
+
+# Shared instance used by the scraper scripts
+SEEN_LEADS = SeenStore.load()
+
+def _bench(args) -> int:
+    """Seen-set memory and lookup speed against a Python set of identity strings"""
+    store = SeenStore(path=None, capacity=args.leads)
+    leads = [{"name": f"Person {i}", "profile_url": f"https://www.linkedin.com/in/person-{i}/",
+              "member_urn": f"urn:li:member:{1_000_000 + i}"} for i in range(args.leads)]
+
+    started = time.perf_counter()
+    store.mark(leads)
+    store._compact()
+    add_s = time.perf_counter() - started
+
+    strings = {identity for lead in leads for identity in lead_identities(lead)}
+    strings_bytes = sys.getsizeof(strings) + sum(sys.getsizeof(s) for s in strings)
+
+    # Re-crawl: half known (other URL form), half new
+    probes = [{"name": "x", "profile_url": f"https://linkedin.com/in/Person-{i}?trk=search"} for i in range(0, args.leads, 2)]
+    probes += [{"name": "y", "member_urn": f"urn:li:member:{9_000_000_000 + i}"} for i in range(len(probes))]
+    store.stats = {key: 0 for key in store.stats}
+    started = time.perf_counter()
+    known = sum(store.seen(lead) for lead in probes)
+    lookup_us = (time.perf_counter() - started) * 1e6 / len(probes)
+
+    print(f"🪪 {args.leads} leads, {len(store)} identities")
+    print(f"  seen-set      {store.memory_bytes() / 1024 / 1024:8.1f} MB  ({store.memory_bytes() / len(store):.1f} B/identity)")
+    print(f"  set of str    {strings_bytes / 1024 / 1024:8.1f} MB")
+    print(f"  mark          {add_s * 1e6 / args.leads:8.1f} us/lead")
+    print(f"  lookup        {lookup_us:8.1f} us/lead, {known} of {len(probes)} known "
+          f"(bloom negatives {store.stats['bloom_negative']}, false positives {store.stats['bloom_false_positive']})")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Lead identities and the persistent seen-set")
+    commands = parser.add_subparsers(dest="command")
+
+    ids = commands.add_parser("ids", help="Print the identities of profile URLs")
+    ids.add_argument("urls", nargs="+")
+
+    bench = commands.add_parser("bench", help="Seen-set memory and speed")
+    bench.add_argument("--leads", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.command == "ids":
+        for url in args.urls:
+            print(f"{url}\n  {url_identities(url) or 'no identity'}")
+        return 0
+    if args.command == "bench":
+        return _bench(args)
+
+    print(f"🪪 Seen leads ({SEEN_LEADS.path}): {len(SEEN_LEADS)} identities, "
+          f"bloom {SEEN_LEADS.bloom.bits // 8 / 1024:.0f} KB for {SEEN_LEADS.bloom.capacity} "
+          f"({SEEN_LEADS.bloom.hashes} probes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Layout fingerprints and a cache of extraction plans keyed by them
+
+`analyze_final_page` and `analyze_page_structure` already build class-name
+inventories for debug output. This module turns that inventory into a cheap
+structural fingerprint of a page (a hash of the result-related class names
+and data-anonymize markers) and caches, per fingerprint, the extraction plan
+that worked for it: which container selector and which selector per field.
+
+A page whose fingerprint is known takes the direct path (one container
+query and one query per field) and skips the full strategy cascade. When the
+cached plan stops producing profiles the caller falls back to the cascade
+and learns a new plan.
+
+Usage:
+    python scripts/sales_nav_layout_cache.py tmp/debug/final_page.html
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+from parsel import Selector
+from loguru import logger as log
+
+DEFAULT_PLAN_CACHE_PATH = os.environ.get("EXTRACTION_PLAN_CACHE_PATH", "tmp/extraction_plans.json")
+
+# Class names containing these keywords describe the result layout
+LAYOUT_KEYWORDS = ['result', 'search', 'person', 'profile', 'member', 'lockup']
+
+def class_inventory(selector: Selector) -> Set[str]:
+    """All class names on the page, collected with a single XPath query"""
+    classes = set()
+    for value in selector.root.xpath('//@class'):
+        classes.update(value.split())
+    return classes
+
+def layout_classes(classes: Set[str]) -> List[str]:
+    """Class names relevant to the result layout, sorted"""
+    return sorted(c for c in classes if any(keyword in c.lower() for keyword in LAYOUT_KEYWORDS))
+
+def layout_fingerprint(selector: Selector, classes: Optional[Set[str]] = None) -> str:
+    """Structural fingerprint: hash of layout classes plus data-anonymize markers"""
+    if classes is None:
+        classes = class_inventory(selector)
+
+    markers = sorted(set(selector.root.xpath('//@data-anonymize')))
+    has_search_result_attr = bool(selector.root.xpath('//*[@data-x-search-result][1]'))
+
+    digest = hashlib.sha1()
+    digest.update(" ".join(layout_classes(classes)).encode("utf-8"))
+    digest.update(b"|")
+    digest.update(" ".join(markers).encode("utf-8"))
+    digest.update(b"|x" if has_search_result_attr else b"|")
+    return digest.hexdigest()[:16]
+
+def learn_plan(selector: Selector, container_selector: str, field_chains: List[Tuple[str, str, List[str]]]) -> Optional[Dict]:
+    """Pick, per field, the selector that matched the most containers"""
+    containers = selector.css(container_selector)
+    if not containers:
+        return None
+
+    fields = {}
+    for field, _, selectors in field_chains:
+        best, best_hits = None, 0
+        for css in selectors:
+            hits = 0
+            for container in containers:
+                value = container.css(css).get()
+                if value and (field == "profile_url" or value.strip()):
+                    hits += 1
+            if hits > best_hits:
+                best, best_hits = css, hits
+            if hits == len(containers):
+                break
+        if best:
+            fields[field] = best
+
+    if "name" not in fields:
+        return None
+
+    return {"container": container_selector, "fields": fields}
+
+def extract_with_plan(selector: Selector, plan: Dict) -> List[Dict]:
+    """Direct path: one container query and one query per field"""
+    profiles = []
+    container_selector = plan["container"]
+    fields = plan["fields"]
+
+    for idx, container in enumerate(selector.css(container_selector)):
+        values = {}
+        for field, css in fields.items():
+            value = container.css(css).get() or ""
+            values[field] = value if field == "profile_url" else value.strip()
+
+        if not values.get("name"):
+            continue
+
+        profile_url = values.get("profile_url", "")
+        if profile_url and not profile_url.startswith('http'):
+            profile_url = 'https://www.linkedin.com' + profile_url
+
+        profiles.append({
+            "name": values["name"],
+            "title": values.get("title", ""),
+            "company": values.get("company", ""),
+            "location": values.get("location", ""),
+            "profile_url": profile_url,
+            "extraction_method": f"container_{container_selector}",
+            "result_index": idx
+        })
+
+    return profiles
+
+class PlanCache:
+    """Persistent fingerprint -> extraction plan cache"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_PLAN_CACHE_PATH, max_entries: int = 500):
+        self.path = path
+        self.max_entries = max_entries
+        self.plans: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_PLAN_CACHE_PATH, **kwargs) -> "PlanCache":
+        """Load the cache from disk, starting empty if missing or unreadable"""
+        cache = cls(path=path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    cache.plans = json.load(f).get("plans", {})
+            except Exception as e:
+                log.warning(f"Could not load extraction plans from {path}: {e}")
+        return cache
+
+    def save(self) -> None:
+        """Write the cache to disk atomically"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "plans": self.plans}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        entry = self.plans.get(fingerprint)
+        return entry["plan"] if entry else None
+
+    def put(self, fingerprint: str, plan: Dict) -> None:
+        """Store a plan, evicting the least recently used entries when full"""
+        self.plans[fingerprint] = {"plan": plan, "hits": 0, "learned_at": time.time(), "used_at": time.time()}
+        if len(self.plans) > self.max_entries:
+            oldest = sorted(self.plans, key=lambda fp: self.plans[fp]["used_at"])
+            for fp in oldest[:len(self.plans) - self.max_entries]:
+                del self.plans[fp]
+
+    def record_hit(self, fingerprint: str) -> None:
+        entry = self.plans.get(fingerprint)
+        if entry:
+            entry["hits"] += 1
+            entry["used_at"] = time.time()
+
+    def invalidate(self, fingerprint: str) -> None:
+        """Drop a plan that stopped producing profiles"""
+        self.plans.pop(fingerprint, None)
+
+# Shared instance used by the scraper scripts
+PLAN_CACHE = PlanCache.load()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/sales_nav_layout_cache.py <page.html> [...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            page = Selector(text=f.read())
+        fingerprint = layout_fingerprint(page)
+        plan = PLAN_CACHE.get(fingerprint)
+        print(f"{path}: {fingerprint} -> {json.dumps(plan) if plan else 'no cached plan'}")
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Compact lead records and columnar batch output
+
+The extractors return one dict per lead, repeating the same keys and (for
+title, company, location, extraction method) mostly the same values. For
+large batches of leads:
+
+- `Lead` is a `__slots__` record: no per-lead dict, low-cardinality values
+  interned. It still answers `lead["name"]` / `lead.get(...)`, so code written
+  against the dicts keeps working. `to_dict()` gives back the extractor's dict.
+- `LeadTable` accumulates leads column by column. Low-cardinality string
+  columns are dictionary-encoded as they arrive (one copy of each distinct
+  value plus an int32 code per lead).
+- `LeadTable.write(path)` writes Parquet (`*.parquet`) or Arrow IPC
+  (`*.arrow`, `*.feather`) with those columns as dictionary arrays, so
+  analytics tools load them without reparsing JSON. pyarrow is an optional
+  dependency (`pip install pyarrow`); without it `write_leads` falls back to
+  gzip NDJSON.
+
+The drivers stream their leads to NDJSON (sales_nav_sink); the `extract` and
+`convert` commands below are the batch paths that collect leads in a
+LeadTable and write them out columnar.
+
+Usage:
+    table = LeadTable()
+    table.extend(result["results"], search_url=url)
+    path = write_leads(table, "tmp/leads.parquet")
+
+    python scripts/sales_nav_leads.py extract --corpus tmp/corpus.pack -o tmp/leads.parquet
+    python scripts/sales_nav_leads.py convert tmp/advanced_scraper_results.ndjson -o tmp/leads.arrow
+    python scripts/sales_nav_leads.py bench --leads 200000 [--out tmp/bench]
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from loguru import logger as log
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Every key the extractors emit, in output order
+LEAD_FIELDS = (
+    "name", "title", "company", "location", "profile_url", "extraction_method", "result_index",
+    "source", "public_identifier", "member_urn", "entity_urn", "profile_id",
+)
+
+# Few distinct values across a crawl: interned on Lead, dictionary-encoded in LeadTable
+DICTIONARY_FIELDS = ("title", "company", "location", "extraction_method", "source")
+
+# Per-lead context added by the batch run, not by the extractors
+CONTEXT_FIELDS = ("search_url", "scraped_at")
+
+class Lead:
+    """One extracted lead in fixed slots; unset fields are None and left out of to_dict()"""
+
+    __slots__ = LEAD_FIELDS + ("extra",)
+
+    def __init__(self, **fields):
+        for field in LEAD_FIELDS:
+            value = fields.pop(field, None)
+            if field in DICTIONARY_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, field, value)
+        # Keys no extractor emits today (e.g. the token scanner's offset)
+        self.extra = fields or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Lead":
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in LEAD_FIELDS if getattr(self, field) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key: str):
+        if key in LEAD_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Lead) and self.to_dict() == other.to_dict()
+
+    # Mutable and compared by value: not hashable, like the dicts it replaces
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Lead({self.name!r}, {self.title!r}, {self.company!r})"
+
+def _strings(values: List[Optional[str]]):
+    return pyarrow.array(values, type=pyarrow.string())
+
+class LeadTable:
+    """Column-wise lead storage with dictionary-encoded string columns"""
+
+    def __init__(self):
+        self._rows = 0
+        # Dictionary columns: value -> code, code -> value, code per row (-1 = null)
+        self._codes_by_value: Dict[str, Dict[str, int]] = {f: {} for f in DICTIONARY_FIELDS + ("search_url",)}
+        self._values: Dict[str, List[str]] = {f: [] for f in DICTIONARY_FIELDS + ("search_url",)}
+        self._codes: Dict[str, array] = {f: array("i") for f in DICTIONARY_FIELDS + ("search_url",)}
+        # Plain columns
+        self._plain: Dict[str, List[Optional[str]]] = {
+            f: [] for f in LEAD_FIELDS if f not in DICTIONARY_FIELDS and f != "result_index"
+        }
+        self._result_index = array("i")
+        self._scraped_at = array("d")
+        self._extra: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _encode(self, field: str, value) -> None:
+        if value is None:
+            self._codes[field].append(-1)
+            return
+        value = str(value)
+        code = self._codes_by_value[field].get(value)
+        if code is None:
+            code = len(self._values[field])
+            self._codes_by_value[field][value] = code
+            self._values[field].append(value)
+        self._codes[field].append(code)
+
+    def append(self, lead: Union[Lead, Dict], search_url: Optional[str] = None, scraped_at: Optional[float] = None) -> None:
+        """Add one lead (a Lead or an extractor dict) with the page it came from"""
+        if isinstance(lead, dict):
+            lead = Lead.from_dict(lead)
+        for field in DICTIONARY_FIELDS:
+            self._encode(field, getattr(lead, field))
+        self._encode("search_url", search_url)
+        for field, column in self._plain.items():
+            value = getattr(lead, field)
+            column.append(None if value is None else str(value))
+        self._result_index.append(lead.result_index if isinstance(lead.result_index, int) else -1)
+        self._scraped_at.append(scraped_at if scraped_at is not None else float("nan"))
+        self._extra.append(json.dumps(lead.extra, ensure_ascii=False, default=str) if lead.extra else None)
+        self._rows += 1
+
+    def extend(self, leads: Iterable[Union[Lead, Dict]], search_url: Optional[str] = None,
+               scraped_at: Optional[float] = None) -> None:
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        for lead in leads:
+            self.append(lead, search_url=search_url, scraped_at=scraped_at)
+
+    def rows(self) -> Iterator[Dict]:
+        """Leads back as extractor-style dicts, plus the batch context"""
+        for row in range(self._rows):
+            data = {}
+            for field in LEAD_FIELDS:
+                if field == "result_index":
+                    value = self._result_index[row] if self._result_index[row] >= 0 else None
+                elif field in DICTIONARY_FIELDS:
+                    code = self._codes[field][row]
+                    value = self._values[field][code] if code >= 0 else None
+                else:
+                    value = self._plain[field][row]
+                if value is not None:
+                    data[field] = value
+            if self._extra[row]:
+                data.update(json.loads(self._extra[row]))
+            code = self._codes["search_url"][row]
+            if code >= 0:
+                data["search_url"] = self._values["search_url"][code]
+            if self._scraped_at[row] == self._scraped_at[row]:
+                data["scraped_at"] = self._scraped_at[row]
+            yield data
+
+    def to_arrow(self):
+        """pyarrow Table; dictionary columns become DictionaryArrays without re-encoding"""
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is required for columnar output (pip install pyarrow)")
+
+        columns = {}
+        for field in LEAD_FIELDS + CONTEXT_FIELDS:
+            if field == "result_index":
+                columns[field] = pyarrow.array([i if i >= 0 else None for i in self._result_index], type=pyarrow.int32())
+            elif field == "scraped_at":
+                columns[field] = pyarrow.array([t if t == t else None for t in self._scraped_at], type=pyarrow.float64())
+            elif field in self._codes:
+                codes = pyarrow.array([c if c >= 0 else None for c in self._codes[field]], type=pyarrow.int32())
+                columns[field] = pyarrow.DictionaryArray.from_arrays(codes, _strings(self._values[field]))
+            else:
+                columns[field] = _strings(self._plain[field])
+        columns["extra"] = _strings(self._extra)
+        return pyarrow.table(columns)
+
+    def write(self, path: str) -> str:
+        """Parquet for *.parquet, Arrow IPC for *.arrow / *.feather"""
+        table = self.to_arrow()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if path.endswith(".parquet"):
+            pyarrow.parquet.write_table(
+                table, tmp_path, compression="zstd",
+                use_dictionary=list(DICTIONARY_FIELDS) + ["search_url"]
+            )
+        elif path.endswith((".arrow", ".feather")):
+            with pyarrow.OSFile(tmp_path, "wb") as sink:
+                with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            raise ValueError(f"Unknown columnar format for {path} (use .parquet, .arrow or .feather)")
+        os.replace(tmp_path, path)
+        return path
+
+    def write_ndjson(self, path: str) -> str:
+        """One JSON lead per line, gzip-compressed when the path ends in .gz"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            for row in self.rows():
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, path)
+        return path
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the stored columns"""
+        total = sum(codes.itemsize * len(codes) for codes in self._codes.values())
+        total += sum(sys.getsizeof(v) for values in self._values.values() for v in values)
+        total += sum(sys.getsizeof(column) + sum(sys.getsizeof(v) for v in column if v is not None)
+                     for column in self._plain.values())
+        total += self._result_index.itemsize * len(self._result_index) + self._scraped_at.itemsize * len(self._scraped_at)
+        return total
+
+def write_leads(table: LeadTable, path: str) -> str:
+    """Columnar output when pyarrow is installed, gzip NDJSON next to it otherwise; returns the path written"""
+    if pyarrow is None:
+        fallback = os.path.splitext(path)[0] + ".ndjson.gz"
+        log.warning(f"pyarrow is not installed - writing {fallback} instead of {path}")
+        return table.write_ndjson(fallback)
+    return table.write(path)
+
+def leads_in_result(result: Dict) -> List[Dict]:
+    """Lead dicts in a scraper result (`results` or `profiles`)"""
+    leads = result.get("results")
+    if not isinstance(leads, list):
+        leads = result.get("profiles")
+    return [lead for lead in leads or [] if isinstance(lead, dict) and lead.get("name")]
+
+def _extract(args) -> int:
+    from sales_nav_corpus import EXTRACTORS, load_corpus, quiet_extractors
+    from sales_nav_response import PageResponse
+    from sales_nav_corpus_pack import PackReader, is_pack
+
+    if args.extractor not in EXTRACTORS:
+        print(f"❌ Unknown extractor {args.extractor}. Available: {list(EXTRACTORS)}")
+        return 1
+
+    # Packs are read one page at a time, so the pages never all sit in memory
+    if is_pack(args.corpus):
+        reader = PackReader(args.corpus)
+        pages = (PageResponse(html, url=meta.get("url") or f"pack://{key}", name=key)
+                 for key, meta, html in reader.iter_records())
+    else:
+        pages = iter(load_corpus(args.corpus))
+
+    table = LeadTable()
+    started = time.perf_counter()
+    page_count = 0
+    with quiet_extractors():
+        for page in pages:
+            table.extend(EXTRACTORS[args.extractor](page), search_url=page.url)
+            page_count += 1
+
+    path = write_leads(table, args.output)
+    print(f"📇 {len(table)} leads from {page_count} pages in {time.perf_counter() - started:.1f} s -> {path}")
+    return 0
+
+def _epoch(value) -> Optional[float]:
+    """Epoch seconds from the sink's `at` or a result's ISO `scraped_at`"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp() if value else None
+    except ValueError:
+        return None
+
+def _convert(args) -> int:
+    from sales_nav_db_loader import iter_lead_file
+    from sales_nav_sink import ENVELOPE_KEYS
+
+    # Sink NDJSON (what the drivers write) as well as older single-JSON result files
+    table = LeadTable()
+    for lead, search_url, scraped_at in iter_lead_file(args.results):
+        lead = {key: value for key, value in lead.items() if key not in ENVELOPE_KEYS + CONTEXT_FIELDS}
+        table.append(lead, search_url=search_url, scraped_at=_epoch(scraped_at))
+    path = write_leads(table, args.output)
+    print(f"📇 {len(table)} leads -> {path}")
+    return 0
+
+def _bench(args) -> int:
+    """Memory of N leads as dicts, as Lead records and in a LeadTable"""
+    from sales_nav_corpus import EXTRACTORS, load_corpus, quiet_extractors
+
+    with quiet_extractors():
+        samples = [lead for page in load_corpus(args.corpus) for lead in EXTRACTORS[args.extractor](page)]
+    if not samples:
+        print(f"❌ No leads extracted from {args.corpus}")
+        return 1
+
+    def fresh(i: int) -> Dict:
+        # Parsed strings are separate objects per lead, as they are after extraction
+        return {k: (v + " ")[:-1] if isinstance(v, str) else v for k, v in samples[i % len(samples)].items()}
+
+    report = {}
+    for label, build in (
+        ("dicts", lambda: [fresh(i) for i in range(args.leads)]),
+        ("Lead", lambda: [Lead.from_dict(fresh(i)) for i in range(args.leads)]),
+        ("LeadTable", lambda: _filled_table(fresh, args.leads)),
+    ):
+        tracemalloc.start()
+        kept = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report[label] = current
+        del kept
+
+    print(f"📇 {args.leads} leads (from {len(samples)} distinct, {args.extractor})")
+    for label, size in report.items():
+        print(f"  {label:<10}{size / 1024 / 1024:>9.1f} MB  {size / args.leads:>7.0f} B/lead  "
+              f"{100 * size / report['dicts']:>5.0f}% of dicts")
+
+    if pyarrow is not None:
+        table = _filled_table(fresh, args.leads)
+        # Scratch output unless --out asks to keep the files
+        with tempfile.TemporaryDirectory(prefix="leads_bench_") as scratch:
+            out_dir = args.out or scratch
+            for suffix in (".parquet", ".arrow"):
+                path = os.path.join(out_dir, f"leads_bench{suffix}")
+                started = time.perf_counter()
+                table.write(path)
+                print(f"  {suffix:<10}{os.path.getsize(path) / 1024 / 1024:>9.1f} MB on disk, "
+                      f"written in {time.perf_counter() - started:.2f} s")
+    return 0
+
+def _filled_table(fresh, count: int) -> LeadTable:
+    table = LeadTable()
+    for i in range(count):
+        table.append(fresh(i), search_url="https://www.linkedin.com/sales/search/people", scraped_at=0.0)
+    return table
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Columnar lead output for batch runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="Run an extractor over a corpus or pack and write the leads")
+    extract.add_argument("--corpus", default="tmp/debug", help="Directory of saved pages, or a *.pack")
+    extract.add_argument("--extractor", default="extract_profiles_planned")
+    extract.add_argument("-o", "--output", default="tmp/leads.parquet")
+
+    convert = commands.add_parser("convert", help="Convert a scraper's NDJSON (or JSON) result file")
+    convert.add_argument("results")
+    convert.add_argument("-o", "--output", default="tmp/leads.parquet")
+
+    bench = commands.add_parser("bench", help="Compare lead memory as dicts, Lead records and LeadTable")
+    bench.add_argument("--corpus", default="tmp/debug")
+    bench.add_argument("--extractor", default="extract_profiles_comprehensive")
+    bench.add_argument("--leads", type=int, default=100000)
+    bench.add_argument("--out", help="Directory to keep the Parquet/Arrow files in (default: a temp dir)")
+    args = parser.parse_args()
+
+    return {"extract": _extract, "convert": _convert, "bench": _bench}[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
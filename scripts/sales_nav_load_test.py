@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Local load test for the Sales Navigator fetch path
+
+Starts the corpus replay server from `sales_nav_fetch_backends`, then drives
+fetch (and optionally extraction) through a fetch backend at increasing
+concurrency levels, 1 to 256 by default. For every level it reports
+throughput and the latency distribution, which gives the throughput and
+latency curves without spending Scrapfly credits.
+
+With `--tiered` the requests go through `tiered_pipeline`, the fetch path
+the scrapers use, with `HttpBackend` serving both tiers: pages where the
+extractor finds no profiles are escalated and fetched again.
+
+Usage:
+    python scripts/sales_nav_load_test.py --corpus tmp/debug
+    python scripts/sales_nav_load_test.py --levels 1,8,64,256 --latency-ms 150 --jitter-ms 50
+    python scripts/sales_nav_load_test.py --extractor extract_profiles_compiled
+    python scripts/sales_nav_load_test.py --extractor extract_profiles_compiled --parse-workers 4
+    python scripts/sales_nav_load_test.py --extractor extract_profiles_compiled --tiered
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from functools import partial
+from typing import Callable, Dict, List, Optional
+from loguru import logger as log
+
+from sales_nav_corpus import DEFAULT_CORPUS, EXTRACTORS, load_corpus, quiet_extractors
+from sales_nav_concurrency import AIMDLimiter
+from sales_nav_fetch_backends import FetchBackend, HttpBackend, ReplayServer
+from sales_nav_fetch_tiers import TierStats, tiered_pipeline
+from sales_nav_hedging import Hedger
+from sales_nav_pipeline import Pipeline, shutdown_parse_pool
+
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+async def run_level(backend, urls: List[str], concurrency: int, handle: Optional[Callable] = None) -> Dict:
+    """Fetch every URL with at most `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    total_bytes = 0
+    profiles = 0
+
+    async def one(url: str) -> None:
+        nonlocal errors, total_bytes, profiles
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await backend.fetch(url)
+                total_bytes += len(response.content)
+                if handle is not None:
+                    profiles += len(handle(response))
+            except Exception as e:
+                errors += 1
+                log.debug(f"Request failed: {e}")
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(urls),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mb_per_sec": round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "profiles": profiles,
+    }
+
+async def run_level_pipeline(backend, urls: List[str], concurrency: int, handle: Callable, parse_workers: int) -> Dict:
+    """Same as run_level, with extraction in the staged pipeline's process pool"""
+    latencies: List[float] = []
+    total_bytes = 0
+
+    async def fetch(job):
+        nonlocal total_bytes
+        started = time.perf_counter()
+        response = await backend.fetch(job.url)
+        latencies.append((time.perf_counter() - started) * 1000)
+        total_bytes += len(response.content)
+        return response
+
+    pipeline = Pipeline(fetch=fetch, parse=handle, fetch_concurrency=concurrency, parse_workers=parse_workers)
+    results = await pipeline.run(urls)
+    elapsed = pipeline.wall_s
+    errors = sum(1 for r in results if isinstance(r, dict) and r.get("success") is False)
+
+    return {
+        "concurrency": concurrency,
+        "parse_workers": parse_workers,
+        "requests": len(urls),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mb_per_sec": round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "profiles": sum(len(r) for r in results if isinstance(r, list)),
+        "pipeline": pipeline.report()["stages"],
+    }
+
+class RecordingBackend(FetchBackend):
+    """Wraps a backend, recording latency and bytes of every fetch"""
+
+    def __init__(self, backend: FetchBackend):
+        self.backend = backend
+        self.name = backend.name
+        self.latencies: List[float] = []
+        self.total_bytes = 0
+
+    async def fetch(self, url: str, **options):
+        response = await self.backend.fetch(url, **options)
+        self.latencies.append(response.elapsed_ms)
+        self.total_bytes += len(response.content)
+        return response
+
+def parse_profiles(extractor: str, response) -> Dict:
+    """Extractor result in the shape the tiered pipeline expects"""
+    profiles = EXTRACTORS[extractor](response)
+    return {"success": bool(profiles), "profiles": len(profiles)}
+
+async def run_level_tiered(backend, urls: List[str], concurrency: int, extractor: str, parse_workers: int) -> Dict:
+    """Same as run_level_pipeline, through the tiered fetch path"""
+    recording = RecordingBackend(backend)
+    pipeline = tiered_pipeline(recording, partial(parse_profiles, extractor), {}, stats=TierStats(path=None),
+                               concurrency=concurrency, parse_workers=parse_workers,
+                               limiter=AIMDLimiter(path=None), hedger=Hedger(path=None))
+    results = await pipeline.run(urls)
+    elapsed = pipeline.wall_s
+    latencies = recording.latencies
+
+    return {
+        "concurrency": concurrency,
+        "parse_workers": parse_workers,
+        "requests": len(latencies),
+        "errors": sum(1 for r in results if r.get("success") is False and "error" in r),
+        "escalations": sum(1 for r in results if r.get("fetch_tier", {}).get("escalated")),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mb_per_sec": round(recording.total_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "profiles": sum(r.get("profiles", 0) for r in results),
+        "pipeline": pipeline.report()["stages"],
+    }
+
+def print_curve(levels: List[Dict]) -> None:
+    print(f"\n{'conc':>6}{'req/s':>10}{'MB/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for row in levels:
+        lat = row["latency_ms"]
+        print(
+            f"{row['concurrency']:>6}{row['requests_per_sec']:>10.1f}{row['mb_per_sec']:>8.2f}"
+            f"{lat['p50']:>10.1f}{lat['p95']:>10.1f}{lat['p99']:>10.1f}{row['errors']:>8}"
+        )
+
+async def run_load_test(args) -> Dict:
+    pages = load_corpus(args.corpus, limit=args.limit)
+    if not pages:
+        raise SystemExit(f"❌ No HTML pages found in {args.corpus}")
+
+    server = ReplayServer(pages, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    levels = [int(level) for level in args.levels.split(",")] if args.levels else DEFAULT_LEVELS
+    backend = HttpBackend(max_connections=max(levels))
+    handle = EXTRACTORS[args.extractor] if args.extractor else None
+
+    report = {
+        "corpus_pages": len(pages),
+        "backend": backend.implementation,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "extractor": args.extractor,
+        "parse_workers": args.parse_workers,
+        "tiered": args.tiered,
+        "levels": [],
+    }
+
+    try:
+        with quiet_extractors():
+            for concurrency in levels:
+                count = max(args.requests, concurrency * 4)
+                urls = [server.url_for(idx) for idx in range(count)]
+                if args.tiered:
+                    row = await run_level_tiered(backend, urls, concurrency, args.extractor, max(1, args.parse_workers))
+                elif handle is not None and args.parse_workers:
+                    row = await run_level_pipeline(backend, urls, concurrency, handle, args.parse_workers)
+                else:
+                    row = await run_level(backend, urls, concurrency, handle)
+                report["levels"].append(row)
+    finally:
+        await backend.close()
+        shutdown_parse_pool()
+        server.stop()
+
+    return report
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Throughput and latency curves against the local replay server")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--levels", default=None, help="Comma separated concurrency levels (default 1..256)")
+    parser.add_argument("--requests", type=int, default=200, help="Minimum requests per level")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated server latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--extractor", choices=sorted(EXTRACTORS), default=None, help="Also run an extractor per page")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Run the extractor in the staged pipeline with N parse processes")
+    parser.add_argument("--tiered", action="store_true",
+                        help="Fetch through tiered_pipeline, escalating pages without profiles (needs --extractor)")
+    parser.add_argument("--output", default="tmp/load_test.json")
+    args = parser.parse_args()
+    if args.tiered and not args.extractor:
+        parser.error("--tiered needs --extractor")
+
+    report = asyncio.run(run_load_test(args))
+    print(f"\n🚦 Load test: {report['corpus_pages']} pages via {report['backend']}, "
+          f"server latency {report['latency_ms']}±{report['jitter_ms']} ms")
+    print_curve(report["levels"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
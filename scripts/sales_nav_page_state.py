@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Page-state classifier for LinkedIn / Sales Navigator responses
+
+The test and debug scripts used to decide what kind of page came back with
+dozens of separate `"x" in content.lower()` checks, and
+`analyze_page_structure` re-serialized the whole DOM with `selector.get()`
+for almost every one of them.
+
+This module lowercases the page once and matches every indicator phrase in
+a single Aho-Corasick pass with pyahocorasick, a declared dependency. Without
+it the scripts still run, with one substring scan per phrase over the same
+lowercased string. A compiled alternation regex is not used instead: Python's
+`re` tries every alternative at every offset and measured 2-4x slower than
+the per-phrase scan. It returns a typed state:
+
+- RESULTS              search result items are present
+- CHALLENGE            checkpoint / captcha / security verification
+- LOGIN_WALL           authwall, login form, "sign in to linkedin"
+- SUBSCRIPTION_UPSELL  trial / upgrade / expired subscription prompts
+- EMPTY                the search ran but returned nothing
+- LOADING              the app shell is still loading
+- UNKNOWN              none of the above
+
+States are checked in that order. Result markup wins: the challenge and
+login indicators are plain substrings that also occur on working pages (a
+recaptcha script, a footer link to /uas/login), so a page with result cards
+is RESULTS whatever else it mentions. A login wall with a "try premium" link
+is still LOGIN_WALL.
+
+Usage:
+    python scripts/sales_nav_page_state.py tmp/debug/*.html
+"""
+
+import sys
+import time
+from enum import Enum
+from typing import Dict, FrozenSet, List, NamedTuple, Union
+from parsel import Selector
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class PageState(str, Enum):
+    RESULTS = "results"
+    EMPTY = "empty"
+    LOGIN_WALL = "login_wall"
+    SUBSCRIPTION_UPSELL = "subscription_upsell"
+    LOADING = "loading"
+    CHALLENGE = "challenge"
+    UNKNOWN = "unknown"
+
+# Lowercase phrase -> signal. Phrases are chosen to be rare on normal pages:
+# generic words such as "search" or "linkedin" occur thousands of times and
+# would only slow the pass down without telling states apart.
+INDICATORS: Dict[str, str] = {
+    # Security challenges
+    "checkpoint/challenge": "challenge",
+    # LinkedIn's challenge iframe; bare "captcha" also matches recaptcha.js on login pages
+    "captcha-internal": "challenge",
+    "security verification": "challenge",
+    "quick security check": "challenge",
+    "unusual activity": "challenge",
+
+    # Login walls
+    "authwall": "login",
+    "/uas/login": "login",
+    "/checkpoint/lg/login": "login",
+    "login-form": "login",
+    "session_key": "login",
+    "sign in to linkedin": "login",
+    "join linkedin": "login",
+    "sign in": "login_hint",
+    "login": "login_hint",
+
+    # Subscription upsells
+    "start your free trial": "upsell",
+    "try sales navigator": "upsell",
+    "try premium": "upsell",
+    "upgrade to sales navigator": "upsell",
+    "your subscription has expired": "upsell",
+    "reactivate your": "upsell",
+    "choose your plan": "upsell",
+    "upgrade": "upsell_hint",
+    "premium": "upsell_hint",
+
+    # Result markup
+    "data-x-search-result": "results",
+    "search-results__result-item": "results",
+    "result-lockup": "results",
+    "artdeco-entity-lockup": "results",
+    "data-anonymize=\"person-name\"": "results",
+    "search-results": "search_interface",
+    "filters": "search_interface",
+
+    # Empty searches
+    "no results found": "empty",
+    "no leads found": "empty",
+    "no people found": "empty",
+    "search-no-results": "empty",
+    "empty-state": "empty",
+    "try adjusting your": "empty",
+
+    # Loading shells
+    "initial-load": "loading",
+    "loading-bar": "loading",
+    "artdeco-loader": "loading",
+    "loading": "loading_hint",
+
+    # Misc page markers kept for the debug output
+    "sales navigator": "sales_nav",
+    "subscription": "subscription",
+    "access denied": "access_denied",
+    "unauthorized": "access_denied",
+    "page not found": "error",
+    "this page doesn't exist": "error",
+    "something went wrong": "error",
+}
+
+# (state, signal that triggers it), in priority order
+STATE_RULES = [
+    (PageState.RESULTS, "results"),
+    (PageState.CHALLENGE, "challenge"),
+    (PageState.LOGIN_WALL, "login"),
+    (PageState.SUBSCRIPTION_UPSELL, "upsell"),
+    (PageState.EMPTY, "empty"),
+    (PageState.LOADING, "loading"),
+]
+
+class PageClassification(NamedTuple):
+    state: PageState
+    signals: FrozenSet[str]   # every signal seen on the page
+    phrases: List[str]        # matched indicator phrases, sorted
+    elapsed_ms: float
+
+    def has(self, signal: str) -> bool:
+        return signal in self.signals
+
+def _build_automaton():
+    automaton = ahocorasick.Automaton()
+    for phrase in INDICATORS:
+        automaton.add_word(phrase, phrase)
+    automaton.make_automaton()
+    return automaton
+
+_AUTOMATON = _build_automaton() if ahocorasick is not None else None
+
+def match_phrases(lowered: str) -> List[str]:
+    """Indicator phrases present in an already lowercased document"""
+    if _AUTOMATON is not None:
+        return sorted({phrase for _, phrase in _AUTOMATON.iter(lowered)})
+    return sorted(phrase for phrase in INDICATORS if phrase in lowered)
+
+def classify_page(content: Union[str, Selector]) -> PageClassification:
+    """Classify a page from its HTML (or a parsed selector) in one pass"""
+    started = time.perf_counter()
+    if isinstance(content, Selector):
+        content = content.get()
+
+    phrases = match_phrases(content.lower())
+    signals = frozenset(INDICATORS[phrase] for phrase in phrases)
+    state = next((state for state, signal in STATE_RULES if signal in signals), PageState.UNKNOWN)
+
+    return PageClassification(state, signals, phrases, (time.perf_counter() - started) * 1000)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/sales_nav_page_state.py <page.html> [...]")
+        sys.exit(1)
+
+    print(f"Matcher: {'pyahocorasick' if _AUTOMATON is not None else 'substring scan'}")
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            page = f.read()
+        result = classify_page(page)
+        print(f"{path}: {result.state.value} ({len(page) / 1024:.0f} KB, {result.elapsed_ms:.2f} ms) {', '.join(result.phrases)}")
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Staged fetch -> parse -> sink pipeline for the Sales Navigator scripts
+
+The scrape functions parsed every response with parsel on the event loop, so
+one heavy page stalled every other fetch in flight. `Pipeline` splits the
+work into three stages joined by bounded queues:
+
+- fetch   `fetch_concurrency` coroutines awaiting the network
+- parse   `parse_workers` processes running the (CPU-bound) parse function
+- sink    one coroutine handing results to an optional sink callback
+
+With `keep_results=False` results are handed to the sink and dropped, and
+`run` returns an empty list, so memory stays flat over long crawls.
+
+When parsing falls behind, the parse queue fills up and fetch workers block
+on it (backpressure) instead of piling up responses in memory. Each stage
+reports its queue depth, throughput, utilization and the time upstream spent
+blocked on it, so network concurrency and CPU parallelism can be sized
+independently: a parse queue that is always full needs more parse workers, an
+empty one with idle parse workers needs more fetch concurrency.
+
+Parse functions run in another process, so they must be module-level
+functions taking a response (a `PageResponse` rebuilt from content, URL and
+status) and returning a picklable result.
+
+Usage:
+    pipeline = Pipeline(fetch=fetch_page, parse=parse_profile, fetch_concurrency=16, parse_workers=4)
+    results = await pipeline.run(urls)
+    pipeline.print_report()
+
+    # Stream results to disk as they are parsed instead of collecting them
+    with NDJSONSink("tmp/results.ndjson") as out:
+        pipeline = Pipeline(fetch=fetch_page, parse=parse_profile, sink=lambda job, result: out.write_result(result),
+                            keep_results=False)
+        await pipeline.run(urls)
+
+    # A single parse off the event loop
+    parsed = await parse_off_loop(parse_sales_navigator_search, response)
+"""
+
+import os
+import time
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger as log
+
+from sales_nav_response import PageResponse
+
+DEFAULT_PARSE_WORKERS = int(os.environ.get("SALES_NAV_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Responses waiting for a parse worker, per worker
+DEFAULT_QUEUE_PER_WORKER = 2
+
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+_PARSE_POOL_WORKERS = 0
+
+def parse_pool(workers: int = DEFAULT_PARSE_WORKERS) -> ProcessPoolExecutor:
+    """Shared process pool for parsing, grown when more workers are requested"""
+    global _PARSE_POOL, _PARSE_POOL_WORKERS
+    if _PARSE_POOL is None or workers > _PARSE_POOL_WORKERS:
+        if _PARSE_POOL is not None:
+            _PARSE_POOL.shutdown(wait=False)
+        _PARSE_POOL = ProcessPoolExecutor(max_workers=workers)
+        _PARSE_POOL_WORKERS = workers
+    return _PARSE_POOL
+
+def shutdown_parse_pool() -> None:
+    global _PARSE_POOL, _PARSE_POOL_WORKERS
+    if _PARSE_POOL is not None:
+        _PARSE_POOL.shutdown(wait=True)
+        _PARSE_POOL = None
+        _PARSE_POOL_WORKERS = 0
+
+def _run_parse(parse: Callable, content: str, url: str, status_code: int) -> Tuple[Any, float]:
+    """Runs in the worker process: rebuild a response, parse it, time the parse"""
+    started = time.perf_counter()
+    try:
+        result = parse(PageResponse(content, url=url, name=url, status_code=status_code))
+    except Exception as e:
+        result = {"success": False, "error": str(e), "url": url}
+    return result, (time.perf_counter() - started) * 1000
+
+def _payload(response, url: str) -> Tuple[str, str, int]:
+    context = getattr(response, "context", None) or {}
+    return response.content, str(context.get("url") or url), getattr(response, "status_code", 200)
+
+async def parse_off_loop(parse: Callable, response, executor: Optional[Executor] = None) -> Any:
+    """Run one parse in the process pool so the event loop keeps serving fetches"""
+    loop = asyncio.get_running_loop()
+    content, url, status_code = _payload(response, "")
+    result, _ = await loop.run_in_executor(executor or parse_pool(), _run_parse, parse, content, url, status_code)
+    return result
+
+class Job:
+    """One URL moving through the pipeline; `meta` is free for fetch/on_parsed state"""
+
+    def __init__(self, url: str, index: int):
+        self.url = url
+        self.index = index
+        self.attempts = 0
+        self.meta: Dict[str, Any] = {}
+
+class StageStats:
+    """Counters for one stage and the queue in front of it"""
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.processed = 0
+        self.errors = 0
+        self.busy_ms = 0.0
+        self.blocked_ms = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def sample(self, depth: int) -> None:
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def summary(self, wall_s: float) -> Dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size or None,
+            "processed": self.processed,
+            "errors": self.errors,
+            "items_per_sec": round(self.processed / wall_s, 2) if wall_s else 0.0,
+            "utilization": round(self.busy_ms / 1000 / (wall_s * self.workers), 3) if wall_s and self.workers else 0.0,
+            "queue_depth_mean": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "queue_depth_max": self.max_depth,
+            "backpressure_ms": round(self.blocked_ms, 1),
+        }
+
+class Pipeline:
+    """Bounded fetch -> parse -> sink stages with per-stage metrics"""
+
+    def __init__(self, fetch: Callable[[Job], Awaitable[Any]], parse: Callable,
+                 sink: Optional[Callable[[Job, Any], Any]] = None,
+                 on_parsed: Optional[Callable[[Job, Any], Optional[Job]]] = None,
+                 fetch_concurrency: int = 8, parse_workers: int = DEFAULT_PARSE_WORKERS,
+                 queue_size: Optional[int] = None, executor: Optional[Executor] = None,
+                 sample_interval: float = 0.1, keep_results: bool = True):
+        self.fetch = fetch
+        self.parse = parse
+        self.sink = sink
+        self.keep_results = keep_results
+        # Returns the job to re-fetch it (e.g. escalate to a JS render), None to emit the result
+        self.on_parsed = on_parsed
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.parse_workers = max(1, parse_workers)
+        self.queue_size = queue_size or self.parse_workers * DEFAULT_QUEUE_PER_WORKER
+        self.executor = executor
+        self.sample_interval = sample_interval
+        self.stats = {
+            "fetch": StageStats("fetch", self.fetch_concurrency, 0),
+            "parse": StageStats("parse", self.parse_workers, self.queue_size),
+            "sink": StageStats("sink", 1, self.queue_size),
+        }
+        self.wall_s = 0.0
+        self.refetches = 0
+
+    async def _put(self, queue: asyncio.Queue, item, stage: StageStats) -> None:
+        # Time spent waiting on a full queue is the backpressure from that stage
+        if queue.full():
+            started = time.perf_counter()
+            await queue.put(item)
+            stage.blocked_ms += (time.perf_counter() - started) * 1000
+        else:
+            queue.put_nowait(item)
+
+    async def _fetch_worker(self) -> None:
+        stage = self.stats["fetch"]
+        while True:
+            job = await self._fetch_queue.get()
+            job.attempts += 1
+            started = time.perf_counter()
+            try:
+                response = await self.fetch(job)
+                item = (job, _payload(response, job.url), None)
+            except Exception as e:
+                stage.errors += 1
+                log.debug(f"Fetch of {job.url} failed: {e}")
+                item = (job, None, {"success": False, "error": str(e), "url": job.url})
+            stage.busy_ms += (time.perf_counter() - started) * 1000
+            stage.processed += 1
+            await self._put(self._parse_queue, item, self.stats["parse"])
+
+    async def _parse_worker(self) -> None:
+        stage = self.stats["parse"]
+        loop = asyncio.get_running_loop()
+        executor = self.executor or parse_pool(self.parse_workers)
+        while True:
+            job, payload, result = await self._parse_queue.get()
+            if payload is not None:
+                try:
+                    result, parse_ms = await loop.run_in_executor(executor, _run_parse, self.parse, *payload)
+                    stage.busy_ms += parse_ms
+                except Exception as e:
+                    # The worker process died or the parse function could not be pickled
+                    log.warning(f"Parse of {job.url} failed in the pool: {e}")
+                    result = {"success": False, "error": str(e), "url": job.url}
+                if isinstance(result, dict) and result.get("success") is False and result.get("error"):
+                    stage.errors += 1
+                stage.processed += 1
+
+            if self.on_parsed is not None:
+                try:
+                    retry = self.on_parsed(job, result)
+                except Exception as e:
+                    # A dead worker would leave the job outstanding and run() waiting forever
+                    stage.errors += 1
+                    log.warning(f"on_parsed failed for {job.url}: {e}")
+                    retry = None
+                if retry is not None:
+                    # The fetch queue is unbounded, so a retry never deadlocks against backpressure
+                    self.refetches += 1
+                    self._fetch_queue.put_nowait(retry)
+                    continue
+
+            await self._put(self._sink_queue, (job, result), self.stats["sink"])
+
+    async def _sink_worker(self) -> None:
+        stage = self.stats["sink"]
+        while True:
+            job, result = await self._sink_queue.get()
+            started = time.perf_counter()
+            if self.sink is not None:
+                try:
+                    outcome = self.sink(job, result)
+                    if asyncio.iscoroutine(outcome):
+                        await outcome
+                except Exception as e:
+                    stage.errors += 1
+                    log.warning(f"Sink failed for {job.url}: {e}")
+            stage.busy_ms += (time.perf_counter() - started) * 1000
+            stage.processed += 1
+
+            if self.keep_results:
+                self._results[job.index] = result
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._done.set()
+
+    async def _sampler(self) -> None:
+        while True:
+            self.stats["fetch"].sample(self._fetch_queue.qsize())
+            self.stats["parse"].sample(self._parse_queue.qsize())
+            self.stats["sink"].sample(self._sink_queue.qsize())
+            await asyncio.sleep(self.sample_interval)
+
+    async def run(self, urls: Iterable[str]) -> List[Any]:
+        """Fetch, parse and sink every URL; results come back in input order (none without keep_results)"""
+        jobs = [Job(url, idx) for idx, url in enumerate(urls)]
+        if not jobs:
+            return []
+
+        self._fetch_queue: asyncio.Queue = asyncio.Queue()
+        self._parse_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._sink_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._results: List[Any] = [None] * len(jobs) if self.keep_results else []
+        self._outstanding = len(jobs)
+        self._done = asyncio.Event()
+        for job in jobs:
+            self._fetch_queue.put_nowait(job)
+
+        workers = (
+            [asyncio.create_task(self._fetch_worker()) for _ in range(self.fetch_concurrency)]
+            + [asyncio.create_task(self._parse_worker()) for _ in range(self.parse_workers)]
+            + [asyncio.create_task(self._sink_worker()), asyncio.create_task(self._sampler())]
+        )
+
+        started = time.perf_counter()
+        try:
+            await self._done.wait()
+        finally:
+            self.wall_s += time.perf_counter() - started
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return self._results
+
+    def report(self) -> Dict:
+        """Per-stage throughput, utilization, queue depth and backpressure"""
+        return {
+            "wall_s": round(self.wall_s, 3),
+            "refetches": self.refetches,
+            "stages": {name: stage.summary(self.wall_s) for name, stage in self.stats.items()},
+        }
+
+    def print_report(self) -> None:
+        report = self.report()
+        print(f"🏭 Pipeline: {report['wall_s']} s, {report['refetches']} re-fetches")
+        print(f"  {'stage':<7}{'workers':>8}{'items/s':>10}{'util':>7}{'depth':>8}{'max':>6}{'blocked ms':>12}")
+        for name, stage in report["stages"].items():
+            print(
+                f"  {name:<7}{stage['workers']:>8}{stage['items_per_sec']:>10}{stage['utilization']:>7.2f}"
+                f"{stage['queue_depth_mean']:>8}{stage['queue_depth_max']:>6}{stage['backpressure_ms']:>12}"
+            )
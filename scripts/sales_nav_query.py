@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Sales Navigator search URLs: Rest.li query parser, builder and canonical keys
+
+Search URLs carry the search as a Rest.li-encoded `query` parameter:
+
+    /sales/search/people?query=(filters%3AList((type%3ACURRENT_COMPANY%2Cvalues%3AList((id%3A3341537%2CselectionType%3AINCLUDED)))))&sessionId=cWxb...
+
+Once the URL encoding is removed this is Rest.li protocol 2.0 syntax:
+`(key:value,...)` records, `List(...)` arrays and leaf strings whose reserved
+characters are percent-escaped a second time (`urn%3Ali%3Aorganization%3A1`,
+`Crowe%20Norway`), so `urn%253A...` in the URL is a colon inside a value.
+
+- `parse_restli` / `to_restli` convert between that syntax and dicts, lists
+  and strings; `to_restli(parse_restli(text)) == text` for LinkedIn's output
+- `SalesNavQuery` parses a whole URL and reads or changes filters
+  (`company_ids()`, `add_filter_value()`, `set_filter()`, `remove_filter()`)
+- `company_search_url` / `company_search_urls` build searches for company
+  lists, optionally several companies per URL
+- `canonical_url` drops what changes between visits of the same search
+  (`sessionId` and other tracking parameters, `recentSearchParam`, value
+  labels next to an id) and sorts filters and values, for cache and dedupe
+  keys; `cache_key` is its SHA-1
+
+Usage:
+    from sales_nav_query import SalesNavQuery, canonical_url, company_search_urls
+
+    query = SalesNavQuery.from_url(url)
+    query.company_ids()                        # ['3341537']
+    query.add_filter_value("REGION", "100506914", text="Norway")
+    query.to_url()
+
+    python scripts/sales_nav_query.py parse "<url>"
+    python scripts/sales_nav_query.py build 3341537 1035 --per-url 2
+    python scripts/sales_nav_query.py build --ids-file tmp/company_ids.txt > tmp/search_urls.txt
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+SEARCH_BASE = "https://www.linkedin.com"
+PEOPLE_SEARCH_PATH = "/sales/search/people"
+
+# URL parameters that differ between visits of the same search
+VOLATILE_PARAMS = ("sessionId", "searchSessionId", "rsLogId", "_ntb", "trk", "lipi")
+# Query fields that are search-history bookkeeping, not part of the search
+VOLATILE_FIELDS = ("recentSearchParam",)
+
+COMPANY_FILTERS = ("CURRENT_COMPANY", "PAST_COMPANY")
+ORGANIZATION_URN_RE = re.compile(r'^urn:li:(?:organization|company|fs_salesCompany):(\d+)$')
+
+INCLUDED = "INCLUDED"
+EXCLUDED = "EXCLUDED"
+
+def _leaf(text: str) -> str:
+    return "" if text == "''" else unquote(text)
+
+def _parse_value(text: str, pos: int) -> Tuple[Any, int]:
+    if text.startswith("List(", pos):
+        items: List[Any] = []
+        pos += len("List(")
+        if text.startswith(")", pos):
+            return items, pos + 1
+        while True:
+            item, pos = _parse_value(text, pos)
+            items.append(item)
+            if pos >= len(text):
+                raise ValueError(f"Unterminated List( in Rest.li query at {pos}")
+            if text[pos] == ")":
+                return items, pos + 1
+            if text[pos] != ",":
+                raise ValueError(f"Expected ',' or ')' in Rest.li list at {pos}, got {text[pos]!r}")
+            pos += 1
+
+    if text.startswith("(", pos):
+        record: Dict[str, Any] = {}
+        pos += 1
+        if text.startswith(")", pos):
+            return record, pos + 1
+        while True:
+            colon = text.find(":", pos)
+            if colon < 0:
+                raise ValueError(f"Expected 'key:' in Rest.li record at {pos}")
+            key = _leaf(text[pos:colon])
+            record[key], pos = _parse_value(text, colon + 1)
+            if pos >= len(text):
+                raise ValueError(f"Unterminated record in Rest.li query at {pos}")
+            if text[pos] == ")":
+                return record, pos + 1
+            if text[pos] != ",":
+                raise ValueError(f"Expected ',' or ')' in Rest.li record at {pos}, got {text[pos]!r}")
+            pos += 1
+
+    end = pos
+    while end < len(text) and text[end] not in ",)":
+        end += 1
+    return _leaf(text[pos:end]), end
+
+def parse_restli(text: str) -> Any:
+    """Rest.li 2.0 text (no URL encoding) -> dicts, lists and strings"""
+    value, pos = _parse_value(text, 0)
+    if pos != len(text):
+        raise ValueError(f"Unexpected {text[pos:pos + 20]!r} after Rest.li value at {pos}")
+    return value
+
+def to_restli(value: Any) -> str:
+    """Dicts, lists and scalars -> Rest.li 2.0 text"""
+    if isinstance(value, dict):
+        return "(" + ",".join(f"{quote(str(key), safe='')}:{to_restli(item)}" for key, item in value.items()) + ")"
+    if isinstance(value, (list, tuple)):
+        return "List(" + ",".join(to_restli(item) for item in value) + ")"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = str(value)
+    return quote(text, safe="") if text else "''"
+
+def _split_params(query_string: str) -> List[Tuple[str, str]]:
+    # Not parse_qs: a '+' inside the Rest.li text is a plus, not a space
+    params = []
+    for part in query_string.split("&"):
+        if part:
+            key, _, value = part.partition("=")
+            params.append((unquote(key), unquote(value)))
+    return params
+
+def _company_id(value: Any) -> Optional[str]:
+    if not isinstance(value, str) or not value:
+        return None
+    if value.isdigit():
+        return value
+    match = ORGANIZATION_URN_RE.match(value)
+    return match.group(1) if match else None
+
+class SalesNavQuery:
+    """A Sales Navigator search: path, decoded Rest.li query and the other URL parameters"""
+
+    def __init__(self, query: Optional[Dict] = None, path: str = PEOPLE_SEARCH_PATH,
+                 params: Optional[List[Tuple[str, str]]] = None, base: str = SEARCH_BASE):
+        self.query: Dict[str, Any] = query if query is not None else {}
+        self.path = path
+        self.params = params or []
+        # scheme://host of the parsed URL, so to_url() gives back the same host
+        self.base = base
+
+    @classmethod
+    def from_url(cls, url: str) -> "SalesNavQuery":
+        """Parse a search URL; raises ValueError on a malformed query"""
+        parts = urlsplit(url)
+        query: Dict[str, Any] = {}
+        params = []
+        for key, value in _split_params(parts.query):
+            if key == "query":
+                parsed = parse_restli(value) if value else {}
+                if not isinstance(parsed, dict):
+                    raise ValueError(f"Rest.li query is not a record: {value[:40]!r}")
+                query = parsed
+            else:
+                params.append((key, value))
+        base = f"{parts.scheme or 'https'}://{parts.netloc}" if parts.netloc else SEARCH_BASE
+        return cls(query, path=parts.path or PEOPLE_SEARCH_PATH, params=params, base=base)
+
+    def to_url(self, include_volatile: bool = True) -> str:
+        """URL in LinkedIn's own encoding; without volatile parameters when asked"""
+        parts = []
+        if self.query:
+            parts.append("query=" + quote(to_restli(self.query), safe="()"))
+        parts += [f"{quote(key, safe='')}={quote(value, safe='')}" for key, value in self.params
+                  if include_volatile or key not in VOLATILE_PARAMS]
+        return f"{self.base}{self.path}" + (f"?{'&'.join(parts)}" if parts else "")
+
+    @property
+    def filters(self) -> List[Dict]:
+        filters = self.query.get("filters")
+        return filters if isinstance(filters, list) else []
+
+    def filter(self, filter_type: str) -> Optional[Dict]:
+        return next((f for f in self.filters if isinstance(f, dict) and f.get("type") == filter_type), None)
+
+    def filter_values(self, filter_type: str, selection: Optional[str] = None) -> List[Dict]:
+        """Values of one filter, optionally only INCLUDED or EXCLUDED ones"""
+        found = self.filter(filter_type)
+        values = found.get("values", []) if found else []
+        return [v for v in values if isinstance(v, dict) and (selection is None or v.get("selectionType") == selection)]
+
+    def company_ids(self, filter_type: str = "CURRENT_COMPANY", selection: Optional[str] = INCLUDED) -> List[str]:
+        """Numeric company IDs of a company filter (plain IDs and organization URNs)"""
+        ids = (_company_id(value.get("id")) for value in self.filter_values(filter_type, selection))
+        return [company_id for company_id in ids if company_id]
+
+    def set_filter(self, filter_type: str, values: List[Dict]) -> "SalesNavQuery":
+        """Replace (or add) a filter's values"""
+        existing = self.filter(filter_type)
+        if existing is not None:
+            existing["values"] = values
+        else:
+            self.query["filters"] = self.filters + [{"type": filter_type, "values": values}]
+        return self
+
+    def add_filter_value(self, filter_type: str, value_id: str, text: Optional[str] = None,
+                         selection: str = INCLUDED) -> "SalesNavQuery":
+        """Add one value to a filter, creating the filter if needed; an existing id is not repeated"""
+        values = self.filter_values(filter_type)
+        if not any(str(v.get("id")) == str(value_id) for v in values):
+            value = {"id": str(value_id)}
+            if text:
+                value["text"] = text
+            value["selectionType"] = selection
+            values.append(value)
+        return self.set_filter(filter_type, values)
+
+    def remove_filter(self, filter_type: str) -> "SalesNavQuery":
+        self.query["filters"] = [f for f in self.filters if not (isinstance(f, dict) and f.get("type") == filter_type)]
+        if not self.query["filters"]:
+            del self.query["filters"]
+        return self
+
+    def canonical(self) -> "SalesNavQuery":
+        """Same search without volatile parts, with keys, filters and values in a fixed order"""
+        query = {key: value for key, value in self.query.items() if key not in VOLATILE_FIELDS}
+        if isinstance(query.get("filters"), list):
+            filters = []
+            for entry in query["filters"]:
+                if isinstance(entry, dict) and isinstance(entry.get("values"), list):
+                    # A label next to an id is display text (it changes with the UI language)
+                    values = [{k: v for k, v in value.items() if not (k == "text" and "id" in value)}
+                              if isinstance(value, dict) else value for value in entry["values"]]
+                    entry = {**entry, "values": sorted(values, key=lambda v: to_restli(_sorted_keys(v)))}
+                filters.append(entry)
+            query["filters"] = sorted(filters, key=lambda f: to_restli(_sorted_keys(f)))
+        params = sorted((key, value) for key, value in self.params if key not in VOLATILE_PARAMS)
+        return SalesNavQuery(_sorted_keys(query), path=self.path.rstrip("/") or "/", params=params,
+                             base=_canonical_base(self.base))
+
+def _canonical_base(base: str) -> str:
+    # http/https and linkedin.com/www.linkedin.com serve the same search
+    host = (urlsplit(base).netloc or "").lower()
+    return SEARCH_BASE if host in ("linkedin.com", "www.linkedin.com") else f"https://{host}"
+
+def _sorted_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _sorted_keys(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted_keys(item) for item in value]
+    return value
+
+def is_linkedin_url(url: str) -> bool:
+    host = (urlsplit(url).hostname or "").lower()
+    return host == "linkedin.com" or host.endswith(".linkedin.com")
+
+def canonical_url(url: str) -> str:
+    """Cache / dedupe form of a search URL; the URL unchanged when it is not LinkedIn's or does not parse"""
+    if not is_linkedin_url(url):
+        return url
+    try:
+        return SalesNavQuery.from_url(url).canonical().to_url()
+    except ValueError:
+        return url
+
+def cache_key(url: str) -> str:
+    return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+
+def company_search_url(company_ids: Iterable[str], keywords: Optional[str] = None,
+                       filter_type: str = "CURRENT_COMPANY", texts: Optional[Dict[str, str]] = None) -> str:
+    """People search for one or more companies (OR-ed values of one filter)"""
+    query = SalesNavQuery()
+    for company_id in company_ids:
+        query.add_filter_value(filter_type, str(company_id), text=(texts or {}).get(str(company_id)))
+    if keywords:
+        query.query["keywords"] = keywords
+    return query.to_url()
+
+def company_search_urls(company_ids: Iterable[str], per_url: int = 1, **kwargs) -> Iterator[str]:
+    """Search URLs for a long company list, `per_url` companies each, each company once"""
+    seen = set()
+    batch: List[str] = []
+    for company_id in company_ids:
+        company_id = _company_id(str(company_id).strip()) or str(company_id).strip()
+        if not company_id or company_id in seen:
+            continue
+        seen.add(company_id)
+        batch.append(company_id)
+        if len(batch) >= per_url:
+            yield company_search_url(batch, **kwargs)
+            batch = []
+    if batch:
+        yield company_search_url(batch, **kwargs)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parse, build and canonicalize Sales Navigator search URLs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse = commands.add_parser("parse", help="Decode a search URL")
+    parse.add_argument("url")
+
+    build = commands.add_parser("build", help="People search URLs for company IDs")
+    build.add_argument("ids", nargs="*")
+    build.add_argument("--ids-file", help="One company ID (or organization URN) per line")
+    build.add_argument("--per-url", type=int, default=1, help="Companies per search URL")
+    build.add_argument("--keywords", default=None)
+    args = parser.parse_args()
+
+    if args.command == "parse":
+        query = SalesNavQuery.from_url(args.url)
+        print(json.dumps({"path": query.path, "query": query.query, "params": dict(query.params)}, indent=2, ensure_ascii=False))
+        print(f"\n🏢 Company IDs: {query.company_ids()}")
+        print(f"🔑 Canonical:   {canonical_url(args.url)}")
+        print(f"   Cache key:   {cache_key(args.url)}")
+        return 0
+
+    ids = list(args.ids)
+    if args.ids_file:
+        with open(args.ids_file, "r", encoding="utf-8") as f:
+            ids += [line.strip() for line in f if line.strip()]
+    for url in company_search_urls(ids, per_url=args.per_url, keywords=args.keywords):
+        print(url)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
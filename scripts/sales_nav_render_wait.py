@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Event-driven render wait for Scrapfly JS rendering
+
+The wait scripts passed to Scrapfly used fixed sleeps (8-10 s), an initial
+3-5 s delay and 2-3 s polling, so every page paid several seconds even when
+results were on screen after 1.5 s. `build_wait_script` generates one
+parameterized script instead:
+
+- a MutationObserver re-evaluates the page whenever the DOM changes
+- once result nodes exist, the wait resolves after `quiet_ms` without the
+  result count changing and without mutations inside a result node
+- an empty-state selector resolves the same way (a valid empty search)
+- without result selectors the wait resolves once the whole DOM is quiet
+- `max_ms` is a hard cap; the access guard from `sales_nav_access_guard`
+  resolves immediately on login walls, checkpoints and upsells
+
+With `harvest=True` the wait also collects lazily rendered cards: Sales
+Navigator only hydrates the cards near the viewport, so instead of resolving
+on the first stable batch the script scrolls the result list one step at a
+time, waits for the new batch to hydrate (a quiet period again) and resolves
+once `page_size` hydrated cards are present or the count stops growing for
+`max_stalls` steps (a short last page).
+
+The script resolves with a small report (outcome, result count, time to the
+first result and to a stable page) that Scrapfly returns as the JS
+evaluation result. The same report is written to `data-b2b-render-report`
+on <html> so it survives in the HTML; `read_wait_report` reads either.
+
+Usage:
+    from sales_nav_render_wait import build_wait_script, read_wait_report
+
+    config = ScrapeConfig(url, render_js=True, js=build_wait_script(), ...)
+    response = await SCRAPFLY.async_scrape(config)
+    report = read_wait_report(response)   # {"outcome": "results", "time_to_results_ms": 1480, ...}
+
+    # One render that captures the whole page of 25 leads
+    js = build_wait_script(harvest=True, page_size=25)
+
+    # A wait step inside a longer script (include ACCESS_GUARD_JS once at the top)
+    js = ACCESS_GUARD_JS + f"await {build_wait_expression(result_selectors=['#username'], guard=False)} ..."
+
+    python scripts/sales_nav_render_wait.py   # print the default script
+"""
+
+import re
+import json
+import html as html_lib
+from typing import Dict, List, Optional
+
+from sales_nav_access_guard import ACCESS_GUARD_JS
+
+REPORT_ATTR = "data-b2b-render-report"
+
+# Result nodes on search pages, across the layouts seen so far
+DEFAULT_RESULT_SELECTORS = [
+    '[data-x-search-result]',
+    '.search-results__result-item',
+    '.reusable-search__result-container',
+    '.reusable-search__entities-container li',
+    '.search-results__list li',
+    '.result-lockup',
+    '.member-result'
+]
+
+# A search that finished with nothing to show
+DEFAULT_EMPTY_SELECTORS = [
+    '.empty-state',
+    '.no-results',
+    '.search-no-results',
+    '.error-state'
+]
+
+# A card counts as hydrated once its name is rendered
+DEFAULT_HYDRATED_SELECTOR = (
+    '[data-anonymize="person-name"], .result-lockup__name, .artdeco-entity-lockup__title, '
+    'a[href*="/sales/lead/"], a[href*="/sales/people/"]'
+)
+
+DEFAULT_QUIET_MS = 800
+DEFAULT_MAX_MS = 25000
+
+# Sales Navigator search pages show 25 leads
+SALES_NAV_PAGE_SIZE = 25
+
+# Quiet period after each harvest scroll, shorter than the initial one
+DEFAULT_SCROLL_QUIET_MS = 500
+
+# Scroll steps without new or newly hydrated cards before harvesting stops
+DEFAULT_MAX_STALLS = 3
+
+# Mutation bursts are coalesced into one evaluation per interval
+EVALUATE_THROTTLE_MS = 100
+
+_REPORT_RE = re.compile(REPORT_ATTR + r'=(?:"([^"]*)"|\'([^\']*)\')')
+_REPORT_WINDOW = 8192
+
+_WAIT_JS = """
+new Promise((resolve) => {
+    const config = __CONFIG__;
+    const started = performance.now();
+    const resultSelector = config.resultSelectors.join(', ');
+    const emptySelector = config.emptySelectors.join(', ');
+    const elapsed = () => Math.round(performance.now() - started);
+
+    let done = false;
+    let mutations = 0;
+    let lastCount = -1;
+    let firstResultMs = null;
+    let quietTimer = null;
+    let evaluatePending = false;
+    let scrolls = 0;
+    let stalls = 0;
+    let harvestCount = 0;
+    let harvestHydrated = 0;
+
+    const countResults = () => resultSelector ? document.querySelectorAll(resultSelector).length : 0;
+
+    const isHydrated = (node) => {
+        const name = node.querySelector(config.hydratedSelector);
+        return name !== null && (name.textContent || '').trim() !== '';
+    };
+
+    const countHydrated = () => {
+        if (!resultSelector) {
+            return 0;
+        }
+        let hydrated = 0;
+        document.querySelectorAll(resultSelector).forEach((node) => {
+            if (isHydrated(node)) {
+                hydrated++;
+            }
+        });
+        return hydrated;
+    };
+
+    // The result list scrolls inside its own pane on some layouts
+    const scrollContainer = () => {
+        let node = document.querySelector(resultSelector);
+        while (node && node !== document.body) {
+            const style = window.getComputedStyle(node);
+            if (node.scrollHeight > node.clientHeight + 10 && /(auto|scroll)/.test(style.overflowY)) {
+                return node;
+            }
+            node = node.parentElement;
+        }
+        return document.scrollingElement || document.documentElement;
+    };
+
+    const finish = (outcome) => {
+        if (done) {
+            return;
+        }
+        done = true;
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(hardCap);
+        const report = {
+            outcome: outcome,
+            results: countResults(),
+            time_to_first_result_ms: firstResultMs,
+            time_to_results_ms: elapsed(),
+            quiet_ms: config.quietMs,
+            mutations: mutations
+        };
+        if (config.harvest) {
+            report.hydrated = countHydrated();
+            report.page_size = config.pageSize;
+            report.scrolls = scrolls;
+            report.complete = report.hydrated >= config.pageSize;
+        }
+        document.documentElement.setAttribute('__REPORT_ATTR__', JSON.stringify(report));
+        console.log(`Render wait finished: ${outcome} after ${report.time_to_results_ms} ms`);
+        resolve(report);
+    };
+
+    // One harvest step: stop when the page is full or stopped growing, else scroll on
+    const harvestStep = () => {
+        if (done) {
+            return;
+        }
+        const count = countResults();
+        const hydrated = countHydrated();
+        if (hydrated >= config.pageSize) {
+            finish('results');
+            return;
+        }
+
+        if (count > harvestCount || hydrated > harvestHydrated) {
+            stalls = 0;
+        } else {
+            stalls++;
+        }
+        harvestCount = count;
+        harvestHydrated = hydrated;
+        if (stalls >= config.maxStalls) {
+            finish('results');
+            return;
+        }
+
+        const container = scrollContainer();
+        const nodes = document.querySelectorAll(resultSelector);
+        if (nodes.length > 0) {
+            nodes[nodes.length - 1].scrollIntoView({block: 'end'});
+        }
+        container.scrollBy(0, Math.max(200, Math.round(container.clientHeight * 0.8)));
+        scrolls++;
+        // Wait for the batch revealed by this scroll to hydrate
+        settle('results');
+    };
+
+    const settle = (outcome) => {
+        clearTimeout(quietTimer);
+        const harvesting = config.harvest && outcome === 'results';
+        const onQuiet = harvesting ? harvestStep : () => finish(outcome);
+        // After a scroll only the revealed batch needs to settle
+        quietTimer = setTimeout(onQuiet, harvesting && scrolls > 0 ? config.scrollQuietMs : config.quietMs);
+    };
+
+    const evaluate = (touchedResults) => {
+        if (done) {
+            return;
+        }
+        if (config.guard) {
+            const blocked = b2bDetectAccessBlock();
+            if (blocked) {
+                document.documentElement.setAttribute('data-b2b-page-state', blocked);
+                finish(blocked);
+                return;
+            }
+        }
+
+        if (!resultSelector) {
+            // No result markup to wait for: resolve once the DOM is quiet
+            settle('quiet');
+            return;
+        }
+
+        const count = countResults();
+        if (count >= config.minResults) {
+            if (firstResultMs === null) {
+                firstResultMs = elapsed();
+            }
+            // Restart the quiet period while results are still arriving or hydrating
+            if (count !== lastCount || touchedResults || quietTimer === null) {
+                lastCount = count;
+                settle('results');
+            }
+        } else if (emptySelector && document.querySelector(emptySelector)) {
+            if (lastCount !== 0 || quietTimer === null) {
+                lastCount = 0;
+                settle('empty');
+            }
+        }
+    };
+
+    const observer = new MutationObserver((records) => {
+        mutations += records.length;
+        const touchedResults = resultSelector !== '' && records.some((record) => {
+            const node = record.target.nodeType === 1 ? record.target : record.target.parentElement;
+            return node && node.closest && node.closest(resultSelector);
+        });
+        if (touchedResults) {
+            evaluate(true);
+        } else if (!evaluatePending) {
+            evaluatePending = true;
+            setTimeout(() => {
+                evaluatePending = false;
+                evaluate(false);
+            }, __THROTTLE_MS__);
+        }
+    });
+
+    const hardCap = setTimeout(() => finish('timeout'), config.maxMs);
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    evaluate(false);
+});
+"""
+
+def build_wait_expression(
+    result_selectors: Optional[List[str]] = None,
+    empty_selectors: Optional[List[str]] = None,
+    quiet_ms: int = DEFAULT_QUIET_MS,
+    max_ms: int = DEFAULT_MAX_MS,
+    min_results: int = 1,
+    guard: bool = True,
+    harvest: bool = False,
+    page_size: int = SALES_NAV_PAGE_SIZE,
+    hydrated_selector: str = DEFAULT_HYDRATED_SELECTOR,
+    max_stalls: int = DEFAULT_MAX_STALLS,
+    scroll_quiet_ms: int = DEFAULT_SCROLL_QUIET_MS,
+) -> str:
+    """The wait as one JS Promise expression, to `await` inside a larger script that
+    includes ACCESS_GUARD_JS once (see build_wait_script)"""
+    config = {
+        "resultSelectors": DEFAULT_RESULT_SELECTORS if result_selectors is None else result_selectors,
+        "emptySelectors": DEFAULT_EMPTY_SELECTORS if empty_selectors is None else empty_selectors,
+        "quietMs": quiet_ms,
+        "maxMs": max_ms,
+        "minResults": min_results,
+        "guard": guard,
+        "harvest": harvest,
+        "pageSize": page_size,
+        "hydratedSelector": hydrated_selector,
+        "maxStalls": max_stalls,
+        "scrollQuietMs": scroll_quiet_ms,
+    }
+    return (
+        _WAIT_JS.strip()
+        .replace("__CONFIG__", json.dumps(config))
+        .replace("__REPORT_ATTR__", REPORT_ATTR)
+        .replace("__THROTTLE_MS__", str(EVALUATE_THROTTLE_MS))
+    )
+
+def build_wait_script(**kwargs) -> str:
+    """JS that resolves once results (or an empty state) stop changing for quiet_ms;
+    with harvest=True it scrolls until page_size cards are hydrated"""
+    # The guard defines b2bDetectAccessBlock; include it even when unused so
+    # the script stays valid
+    return ACCESS_GUARD_JS + "\n" + build_wait_expression(**kwargs)
+
+def _parse_report(value) -> Optional[Dict]:
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value.startswith("{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return None
+
+def read_wait_report(response) -> Optional[Dict]:
+    """Render wait report from the JS evaluation result or the HTML marker"""
+    scrape_result = getattr(response, "scrape_result", None) or {}
+    browser_data = scrape_result.get("browser_data") or {}
+    report = _parse_report(browser_data.get("javascript_evaluation_result"))
+    if report:
+        return report
+
+    content = getattr(response, "content", response)
+    if not isinstance(content, str):
+        return None
+    match = _REPORT_RE.search(content[:_REPORT_WINDOW])
+    if not match:
+        return None
+    return _parse_report(html_lib.unescape(match.group(1) or match.group(2)))
+
+if __name__ == "__main__":
+    import sys
+    print(build_wait_script(harvest="--harvest" in sys.argv[1:]))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Page response shim shared by the Sales Navigator scripts
+
+The parse functions in the scraper scripts take a Scrapfly
+`ScrapeApiResponse` but only read `content`, `selector`, `status_code` and
+`context["url"]`. `PageResponse` provides the same attributes for a page
+that did not come from Scrapfly: a saved corpus page, a response rebuilt in
+a parse worker process, or a fetch backend result.
+
+Usage:
+    from sales_nav_response import PageResponse
+
+    profiles = extract_sales_nav_profiles(PageResponse(html, url=url).selector)
+"""
+
+from parsel import Selector
+
+class PageResponse:
+    """Minimal stand-in for ScrapeApiResponse built from page content"""
+
+    def __init__(self, content: str, url: str = "", name: str = "", status_code: int = 200):
+        self.content = content
+        self.url = url
+        self.name = name
+        self.status_code = status_code
+        self.context = {"url": url}
+        self._selector = None
+
+    @property
+    def selector(self) -> Selector:
+        if self._selector is None:
+            self._selector = Selector(text=self.content)
+        return self._selector
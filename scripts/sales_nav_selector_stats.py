@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Adaptive ordering for Sales Navigator selector fallback chains
+
+The extractors try long chains of CSS selectors (names, titles, companies,
+result containers) in a fixed order. After a LinkedIn markup change the
+selector that still works may be the seventh one tried, for every field of
+every result. This module records per-selector hit statistics, persists
+them between runs and reorders each chain so the most productive selector
+runs first.
+
+- hit rates are decayed at the end of every run so the order follows the
+  live layout instead of history
+- selectors that have not matched in `demote_after_runs` runs are moved to
+  the end of the chain
+- the order of a chain is fixed for the duration of a run (one page)
+- container scans that try several selectors only credit the one that
+  matched the most results, so partial matches are demoted
+
+Usage:
+    from sales_nav_selector_stats import SELECTOR_STATS
+
+    for css in SELECTOR_STATS.ordered("advanced.name", NAME_SELECTORS):
+        value = container.css(css).get()
+        SELECTOR_STATS.record("advanced.name", css, bool(value))
+        ...
+    SELECTOR_STATS.finish_run()
+    SELECTOR_STATS.save()
+
+    python scripts/sales_nav_selector_stats.py   # print current ordering
+"""
+
+import os
+import json
+import time
+from typing import Dict, List, Optional
+from loguru import logger as log
+
+DEFAULT_STATS_PATH = os.environ.get("SELECTOR_STATS_PATH", "tmp/selector_stats.json")
+
+class SelectorStats:
+    """Persistent per-selector hit statistics with decayed hit rates"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_STATS_PATH, demote_after_runs: int = 20, decay: float = 0.9):
+        self.path = path
+        self.demote_after_runs = demote_after_runs
+        self.decay = decay
+        self.run = 0
+        # chain -> selector -> {"hits", "attempts", "first_seen_run", "last_hit_run"}
+        self.chains: Dict[str, Dict[str, Dict]] = {}
+        self._order_cache: Dict[str, List[str]] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = DEFAULT_STATS_PATH, **kwargs) -> "SelectorStats":
+        """Load stats from disk, starting empty if the file is missing or unreadable"""
+        stats = cls(path=path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                stats.run = data.get("run", 0)
+                stats.chains = data.get("chains", {})
+            except Exception as e:
+                log.warning(f"Could not load selector stats from {path}: {e}")
+        return stats
+
+    def save(self) -> None:
+        """Write stats to disk atomically"""
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run": self.run, "saved_at": time.time(), "chains": self.chains}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, chain: str, selector: str) -> Dict:
+        entries = self.chains.setdefault(chain, {})
+        entry = entries.get(selector)
+        if entry is None:
+            entry = {"hits": 0.0, "attempts": 0.0, "first_seen_run": self.run, "last_hit_run": None}
+            entries[selector] = entry
+        return entry
+
+    def is_demoted(self, chain: str, selector: str) -> bool:
+        """True when the selector has not matched in the last `demote_after_runs` runs"""
+        entry = self.chains.get(chain, {}).get(selector)
+        if not entry or not entry["attempts"]:
+            return False
+
+        last_hit = entry["last_hit_run"]
+        since = entry["first_seen_run"] if last_hit is None else last_hit
+        return self.run - since >= self.demote_after_runs
+
+    def _score(self, chain: str, selector: str) -> float:
+        entry = self.chains.get(chain, {}).get(selector)
+        if not entry:
+            return 0.5
+        # Laplace-smoothed hit rate so unseen selectors sit in the middle
+        return (entry["hits"] + 1) / (entry["attempts"] + 2)
+
+    def ordered(self, chain: str, selectors: List[str]) -> List[str]:
+        """Return the chain reordered by hit rate, demoted selectors last"""
+        cached = self._order_cache.get(chain)
+        if cached is not None and len(cached) == len(selectors):
+            return cached
+
+        positions = {selector: idx for idx, selector in enumerate(selectors)}
+        order = sorted(
+            selectors,
+            key=lambda s: (self.is_demoted(chain, s), -self._score(chain, s), positions[s])
+        )
+        self._order_cache[chain] = order
+        return order
+
+    def record(self, chain: str, selector: str, hit: bool) -> None:
+        """Record one attempt of a selector"""
+        entry = self._entry(chain, selector)
+        entry["attempts"] += 1
+        if hit:
+            entry["hits"] += 1
+            entry["last_hit_run"] = self.run
+
+    def record_cascade(self, chain: str, order: List[str], winner: Optional[int]) -> None:
+        """Record a first-match cascade: misses up to the winning position, then a hit"""
+        tried = order if winner is None else order[:winner + 1]
+        for idx, selector in enumerate(tried):
+            self.record(chain, selector, idx == winner)
+
+    def record_scan(self, chain: str, tried: List[str], yields: List[int]) -> None:
+        """Record a scan that may try several selectors: only the ones that
+        yielded the most hit, so a selector that matched part of the page
+        (a sidebar, a partial list) loses ground to the one that matched it all"""
+        best = max(yields, default=0)
+        for selector, count in zip(tried, yields):
+            self.record(chain, selector, count > 0 and count == best)
+
+    def finish_run(self) -> None:
+        """Close a run: decay counts so recent pages dominate and recompute orders"""
+        self.run += 1
+        for entries in self.chains.values():
+            for entry in entries.values():
+                entry["hits"] *= self.decay
+                entry["attempts"] *= self.decay
+        self._order_cache.clear()
+
+    def summary(self) -> Dict[str, List[Dict]]:
+        """Current ordering with scores, for logging and debugging"""
+        result = {}
+        for chain, entries in self.chains.items():
+            rows = []
+            for selector in self.ordered(chain, list(entries.keys())):
+                entry = entries[selector]
+                rows.append({
+                    "selector": selector,
+                    "hit_rate": round(self._score(chain, selector), 3),
+                    "last_hit_run": entry["last_hit_run"],
+                    "demoted": self.is_demoted(chain, selector),
+                })
+            result[chain] = rows
+        return result
+
+# Shared instance used by the scraper scripts
+SELECTOR_STATS = SelectorStats.load()
+
+if __name__ == "__main__":
+    print(f"📈 Selector stats after {SELECTOR_STATS.run} runs ({SELECTOR_STATS.path})")
+    for chain, rows in SELECTOR_STATS.summary().items():
+        print(f"\n{chain}:")
+        for idx, row in enumerate(rows):
+            flag = " (demoted)" if row["demoted"] else ""
+            print(f"  {idx + 1}. {row['selector']}  hit_rate={row['hit_rate']}{flag}")
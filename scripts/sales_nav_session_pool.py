@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Pool of warm Scrapfly sessions for Sales Navigator
+
+`scrape_with_fresh_session` and `linkedin_login_and_scrape` used to render
+one or two warm-up pages (Sales Navigator home, the login form) before every
+target URL. This pool keeps a fixed set of named Scrapfly sessions instead:
+
+- each session is warmed once (by a caller supplied coroutine) and reused
+  until it is older than `ttl` or fails a health check
+- a background task health-checks idle sessions every `health_interval`
+  seconds; failing sessions are re-warmed on their next lease
+- `lease()` hands one session to one scrape at a time, so concurrent scrapes
+  never share a browser session, and re-warms expired sessions transparently
+- warm-up times are persisted, so a session warmed by a previous run of a
+  script is reused while it is still within its lifetime
+
+Usage:
+    pool = SessionPool(warm=warm_session, health_check=check_session, size=3)
+    async with pool.lease() as session:
+        response = await SCRAPFLY.async_scrape(ScrapeConfig(url, session=session, ...))
+    pool.close()
+
+    python scripts/sales_nav_session_pool.py   # show persisted session state
+"""
+
+import os
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+from loguru import logger as log
+
+from scrapfly import ScrapeConfig, ScrapflyClient
+from sales_nav_access_guard import blocked_url_state
+
+DEFAULT_POOL_PATH = os.environ.get("SESSION_POOL_PATH", "tmp/session_pool.json")
+
+SALES_NAV_HOME = "https://www.linkedin.com/sales/"
+
+# Scrapfly keeps a session's browser state for a limited time after last use
+DEFAULT_SESSION_TTL = 20 * 60
+DEFAULT_HEALTH_INTERVAL = 5 * 60
+
+# Warm/health coroutines take the session name and return True when usable
+SessionCheck = Callable[[str], Awaitable[bool]]
+
+class SessionWarmError(Exception):
+    """Raised when a session cannot be warmed (bad cookie, no subscription)"""
+
+class PooledSession:
+    """State of one named Scrapfly session"""
+
+    def __init__(self, name: str, warmed_at: float = 0.0, checked_at: float = 0.0, uses: int = 0):
+        self.name = name
+        self.warmed_at = warmed_at
+        self.checked_at = checked_at
+        self.uses = uses
+        self.healthy = warmed_at > 0
+        self.leased = False
+        self.lock = asyncio.Lock()
+
+    def expired(self, ttl: float) -> bool:
+        return not self.healthy or time.time() - self.warmed_at > ttl
+
+    def to_dict(self) -> Dict:
+        return {"warmed_at": self.warmed_at, "checked_at": self.checked_at, "uses": self.uses}
+
+class SessionPool:
+    """Fixed set of warm sessions leased to one scrape at a time"""
+
+    def __init__(self, warm: SessionCheck, health_check: Optional[SessionCheck] = None, size: int = 3,
+                 prefix: str = "sales_nav_pool", ttl: float = DEFAULT_SESSION_TTL,
+                 health_interval: float = DEFAULT_HEALTH_INTERVAL, path: Optional[str] = DEFAULT_POOL_PATH):
+        self.warm = warm
+        self.health_check = health_check
+        self.ttl = ttl
+        self.health_interval = health_interval
+        self.path = path
+        self.sessions: Dict[str, PooledSession] = {
+            f"{prefix}_{idx}": PooledSession(f"{prefix}_{idx}") for idx in range(size)
+        }
+        self.stats = {"leases": 0, "warms": 0, "warm_failures": 0, "health_checks": 0, "health_failures": 0}
+        self._idle: Optional[asyncio.Queue] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._load()
+
+    def _load(self) -> None:
+        """Reuse sessions warmed by earlier runs that are still within their lifetime"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f).get("sessions", {})
+        except Exception as e:
+            log.warning(f"Could not load session pool state from {self.path}: {e}")
+            return
+
+        for name, state in saved.items():
+            if name in self.sessions:
+                session = PooledSession(name, state.get("warmed_at", 0.0), state.get("checked_at", 0.0), state.get("uses", 0))
+                self.sessions[name] = session
+
+    def save(self) -> None:
+        """Write session state to disk atomically, merged with other pools' sessions"""
+        if not self.path:
+            return
+
+        saved = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    saved = json.load(f).get("sessions", {})
+            except Exception:
+                saved = {}
+        saved.update({name: session.to_dict() for name, session in self.sessions.items()})
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "sessions": saved}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _queue(self) -> asyncio.Queue:
+        # Created lazily so the queue binds to the running event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for session in self.sessions.values():
+                self._idle.put_nowait(session)
+            if self.health_check and self.health_interval:
+                self._health_task = asyncio.create_task(self._health_loop())
+        return self._idle
+
+    async def _ensure_warm(self, session: PooledSession) -> None:
+        async with session.lock:
+            if not session.expired(self.ttl):
+                return
+
+            log.info(f"🔥 Warming session {session.name}")
+            self.stats["warms"] += 1
+            try:
+                ok = await self.warm(session.name)
+            except Exception as e:
+                log.warning(f"Warm-up of {session.name} failed: {e}")
+                ok = False
+
+            if not ok:
+                self.stats["warm_failures"] += 1
+                session.healthy = False
+                raise SessionWarmError(f"could not warm session {session.name}")
+
+            session.warmed_at = session.checked_at = time.time()
+            session.healthy = True
+            self.save()
+
+    async def start(self) -> None:
+        """Warm every session up front, concurrently"""
+        self._queue()
+        results = await asyncio.gather(
+            *(self._ensure_warm(session) for session in self.sessions.values()), return_exceptions=True
+        )
+        failed = [r for r in results if isinstance(r, Exception)]
+        if len(failed) == len(results):
+            raise SessionWarmError("no session in the pool could be warmed")
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a warm session name for the duration of one scrape"""
+        idle = self._queue()
+        session = await idle.get()
+        session.leased = True
+        try:
+            await self._ensure_warm(session)
+            self.stats["leases"] += 1
+            session.uses += 1
+            yield session.name
+        finally:
+            session.leased = False
+            idle.put_nowait(session)
+
+    def mark_unhealthy(self, name: str) -> None:
+        """Force a re-warm on the next lease (e.g. the scrape hit a login wall)"""
+        session = self.sessions.get(name)
+        if session:
+            session.healthy = False
+
+    async def check(self, session: PooledSession) -> bool:
+        """Run the health check on one session, marking it for re-warm on failure"""
+        self.stats["health_checks"] += 1
+        try:
+            ok = await self.health_check(session.name)
+        except Exception as e:
+            log.debug(f"Health check of {session.name} failed: {e}")
+            ok = False
+
+        session.checked_at = time.time()
+        if not ok:
+            self.stats["health_failures"] += 1
+            session.healthy = False
+            log.warning(f"🩺 Session {session.name} failed its health check, will re-warm")
+        return ok
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for session in self.sessions.values():
+                # Only idle, warm sessions; leased ones are busy being used
+                if session.leased or session.lock.locked() or session.expired(self.ttl):
+                    continue
+                if time.time() - session.checked_at >= self.health_interval:
+                    # Holding the lock makes a lease taken meanwhile wait in _ensure_warm
+                    # until the probe is done, so the session still has one user at a time
+                    async with session.lock:
+                        if not session.leased:
+                            await self.check(session)
+            self.save()
+
+    def close(self) -> None:
+        """Stop health checks and persist session state"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        self.save()
+
+def scrapfly_health_check(client: ScrapflyClient, url: str = SALES_NAV_HOME) -> SessionCheck:
+    """Cheap health check: a non-rendered request in the session must not be redirected to a login wall"""
+    async def check(session: str) -> bool:
+        response = await client.async_scrape(ScrapeConfig(url, asp=True, country="US", session=session))
+        # The unrendered app shell carries login links and scripts on healthy sessions too,
+        # so judge by where the request ended up, not by the HTML
+        final_url = (response.scrape_result or {}).get("url") or url
+        return response.status_code == 200 and blocked_url_state(final_url) is None
+    return check
+
+if __name__ == "__main__":
+    if not os.path.exists(DEFAULT_POOL_PATH):
+        print(f"No session pool state at {DEFAULT_POOL_PATH}")
+    else:
+        with open(DEFAULT_POOL_PATH, "r", encoding="utf-8") as f:
+            sessions = json.load(f).get("sessions", {})
+        now = time.time()
+        print(f"🏊 Session pool state ({DEFAULT_POOL_PATH})")
+        for name, state in sorted(sessions.items()):
+            age = (now - state["warmed_at"]) / 60 if state["warmed_at"] else None
+            status = "cold" if age is None else f"warmed {age:.0f} min ago"
+            print(f"  {name}: {status}, {state['uses']} uses")
@@ -6,8 +6,13 @@ Simple Sales Navigator scraper - no complex JavaScript, just extract what we can
 import os
 import json
 import asyncio
-import re
 from scrapfly import ScrapeConfig, ScrapflyClient
+from sales_nav_embedded_json import extract_embedded_leads_from_html
+from sales_nav_token_scanner import scan_profile_records
+from sales_nav_debug_capture import DEBUG_CAPTURE, is_failure
+from sales_nav_html_trim import trimmed_selector
+from sales_nav_sink import NDJSONSink
+from sales_nav_identity import SEEN_LEADS, dedupe_leads
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
 
@@ -33,26 +38,17 @@ async def simple_sales_nav_scrape(url: str):
         print(f"📄 Response: {response.status_code}")
         print(f"📊 Size: {len(response.content)} bytes")
         
-        # Save full response
-        os.makedirs("tmp/debug", exist_ok=True)
-        with open("tmp/debug/simple_scrape.html", "w", encoding="utf-8") as f:
-            f.write(response.content)
-        
         # Extract whatever we can find
-        profiles = extract_any_profiles(response.content, response.selector)
+        # The token scanner reads the raw page; the DOM is built from the trimmed one
+        selector, _ = trimmed_selector(response.content)
+        profiles = extract_any_profiles(response.content, selector)
         
         # Try to extract from JavaScript variables
         js_profiles = extract_from_javascript(response.content)
         profiles.extend(js_profiles)
         
-        # Remove duplicates
-        unique_profiles = []
-        seen = set()
-        for profile in profiles:
-            key = profile.get('name', '') + profile.get('email', '') + profile.get('profile_url', '')
-            if key and key not in seen:
-                seen.add(key)
-                unique_profiles.append(profile)
+        # Remove duplicates by member URN / profile token / public ID / email
+        unique_profiles = dedupe_leads(profiles)
         
         result = {
             "success": len(unique_profiles) > 0,
@@ -62,6 +58,13 @@ async def simple_sales_nav_scrape(url: str):
             "status_code": response.status_code,
             "extraction_methods": list(set([p.get('source', 'unknown') for p in unique_profiles]))
         }
+        # Leads recorded in an earlier run are flagged `known_lead`
+        result["new_leads"] = SEEN_LEADS.mark(unique_profiles)
+        
+        # Save the response when nothing was found, and a sample of the rest
+        result["debug_capture"] = DEBUG_CAPTURE.capture(
+            "simple", response.content, meta={"url": url, "total_found": len(unique_profiles)}, failed=is_failure(result)
+        )
         
         return result
         
@@ -90,49 +93,11 @@ def extract_any_profiles(html_content: str, selector) -> list:
                 "source": "profile_link"
             })
     
-    # Method 2: Look for email addresses and extract context
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, html_content)
-    print(f"  Found {len(emails)} email addresses")
-    
-    for email in emails:
-        if 'linkedin' not in email.lower():  # Skip LinkedIn's own emails
-            profiles.append({
-                "email": email,
-                "source": "email_extraction"
-            })
-    
-    # Method 3: Look for name patterns
-    name_patterns = [
-        r'"firstName":\s*"([^"]+)"',
-        r'"lastName":\s*"([^"]+)"',
-        r'"name":\s*"([^"]+)"',
-        r'"publicIdentifier":\s*"([^"]+)"'
-    ]
-    
-    names = {}
-    for pattern in name_patterns:
-        matches = re.findall(pattern, html_content)
-        field = pattern.split('"')[1]
-        names[field] = matches
-    
-    # Combine first and last names
-    if 'firstName' in names and 'lastName' in names:
-        for first, last in zip(names['firstName'], names['lastName']):
-            if first and last:
-                profiles.append({
-                    "name": f"{first} {last}",
-                    "source": "json_name_extraction"
-                })
-    
-    # Single names
-    if 'name' in names:
-        for name in names['name']:
-            if name and len(name.split()) >= 2:  # Likely a full name
-                profiles.append({
-                    "name": name,
-                    "source": "json_name_extraction"
-                })
+    # Methods 2 and 3: emails and JSON name fields in one pass, grouped by
+    # enclosing object so first/last names from the same record stay together
+    scanned = scan_profile_records(html_content)
+    print(f"  Found {len(scanned)} records in raw HTML scan")
+    profiles.extend(scanned)
     
     # Method 4: Look for structured data
     json_ld_scripts = selector.css('script[type="application/ld+json"]::text').getall()
@@ -150,38 +115,8 @@ def extract_any_profiles(html_content: str, selector) -> list:
     return profiles
 
 def extract_from_javascript(html_content: str) -> list:
-    """Extract profile data from JavaScript variables"""
-    profiles = []
-    
-    # Look for common LinkedIn JavaScript patterns
-    js_patterns = [
-        r'voyager.*?firstName.*?lastName',
-        r'search.*?results.*?people',
-        r'profile.*?data.*?name'
-    ]
-    
-    # Extract JSON-like structures from JavaScript
-    json_pattern = r'\{[^{}]*(?:"firstName"|"name"|"publicIdentifier")[^{}]*\}'
-    json_matches = re.findall(json_pattern, html_content)
-    
-    for match in json_matches:
-        try:
-            # Try to parse as JSON
-            data = json.loads(match)
-            person = extract_person_from_data(data)
-            if person:
-                person['source'] = 'javascript_extraction'
-                profiles.append(person)
-        except:
-            # Try to extract manually
-            name_match = re.search(r'"(?:firstName|name)":\s*"([^"]+)"', match)
-            if name_match:
-                profiles.append({
-                    "name": name_match.group(1),
-                    "source": "javascript_manual_extraction"
-                })
-    
-    return profiles
+    """Extract profile data from the embedded JSON data blocks"""
+    return extract_embedded_leads_from_html(html_content)
 
 def extract_persons_from_json(data) -> list:
     """Extract person data from JSON structure"""
@@ -250,11 +185,13 @@ async def test_simple_scraper():
     
     result = await simple_sales_nav_scrape(target_url)
     
-    # Save results
-    with open("tmp/simple_scraper_results.json", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    # Append the leads and the page record; earlier runs stay in the file
+    with NDJSONSink("tmp/simple_scraper_results.ndjson") as sink:
+        sink.write_result(result)
+    # Only once the leads are on disk: a lead remembered as seen is skipped by later loads
+    SEEN_LEADS.save()
     
-    print(f"\n💾 Results saved to tmp/simple_scraper_results.json")
+    print(f"\n💾 Results appended to tmp/simple_scraper_results.ndjson")
     
     if result.get("success"):
         print(f"🎉 SUCCESS! Found {result['total_found']} profiles")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON result sink
+
+The drivers kept every result in memory and wrote tmp/*_results.json with
+`indent=2` once the run finished, so a crash lost the run and memory grew
+with the crawl. `NDJSONSink` writes one JSON record per line as soon as a
+lead or page is extracted:
+
+    {"type": "lead", "run_id": ..., "seq": 12, "at": 1760000000.1, "name": ..., "search_url": ...}
+    {"type": "page", "run_id": ..., "seq": 13, "at": ..., "url": ..., "success": true, "lead_count": 25, ...}
+    {"type": "summary", ...}
+
+- every record is flushed to the OS right away, so `tail -f` (or Rails
+  reading new lines with File#each_line) sees it immediately; a line
+  without its trailing newline is still being written
+- the file is fsynced every `fsync_interval` seconds or `fsync_records`
+  records, and on close
+- paths ending in .gz are gzip-compressed with a sync flush after every
+  record, so `zcat` / Zlib::GzipReader can read everything written so far;
+  appending to an existing .gz adds a gzip member
+- nothing is kept after it is written: memory stays flat however long the
+  crawl runs
+
+Usage:
+    with NDJSONSink("tmp/advanced_scraper_results.ndjson") as sink:
+        sink.write_result(result)           # one lead record per lead, then the page
+        sink.write("summary", {...})
+
+    for record in read_ndjson("tmp/advanced_scraper_results.ndjson"):
+        ...
+"""
+
+import os
+import json
+import time
+import uuid
+import zlib
+import threading
+from typing import Dict, Iterator, List, Optional
+from loguru import logger as log
+
+DEFAULT_FSYNC_INTERVAL = float(os.environ.get("SALES_NAV_SINK_FSYNC_S", 2.0))
+DEFAULT_FSYNC_RECORDS = int(os.environ.get("SALES_NAV_SINK_FSYNC_RECORDS", 1000))
+
+# Result keys that hold the lead list, depending on the scraper
+LEAD_KEYS = ("results", "profiles")
+
+# Keys the sink adds to every record
+ENVELOPE_KEYS = ("type", "run_id", "seq", "at")
+
+class NDJSONSink:
+    """Appends one JSON record per line, flushed per record and fsynced periodically"""
+
+    def __init__(self, path: str, run_id: Optional[str] = None, fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 fsync_records: int = DEFAULT_FSYNC_RECORDS):
+        self.path = path
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.fsync_interval = fsync_interval
+        self.fsync_records = fsync_records
+        self.stats = {"records": 0, "leads": 0, "pages": 0, "bytes": 0, "fsyncs": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab")
+        # wbits=31: gzip container
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if path.endswith(".gz") else None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def __enter__(self) -> "NDJSONSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, record_type: str, payload: Dict) -> None:
+        """Append one record and flush it; fsync when the interval or record count is reached"""
+        with self._lock:
+            self._seq += 1
+            record = {"type": record_type, "run_id": self.run_id, "seq": self._seq, "at": round(time.time(), 3), **payload}
+            data = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            if self._gzip is not None:
+                data = self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+            self._file.write(data)
+            self._file.flush()
+
+            self.stats["records"] += 1
+            self.stats["bytes"] += len(data)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_records or time.monotonic() - self._synced_at >= self.fsync_interval:
+                self._fsync()
+
+    def _fsync(self) -> None:
+        os.fsync(self._file.fileno())
+        self.stats["fsyncs"] += 1
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def write_leads(self, leads: List[Dict], **context) -> int:
+        """One lead record per lead, tagged with the page context (search_url, ...)"""
+        for lead in leads:
+            self.write("lead", {**lead, **context})
+        self.stats["leads"] += len(leads)
+        return len(leads)
+
+    def write_result(self, result: Dict, record_type: str = "page") -> None:
+        """A scraper result: its leads first, then the page record without the lead list"""
+        page = {key: value for key, value in result.items() if key not in LEAD_KEYS}
+        leads = next((result[key] for key in LEAD_KEYS if isinstance(result.get(key), list)), [])
+        page["lead_count"] = self.write_leads(leads, search_url=result.get("url"))
+        self.write(record_type, page)
+        self.stats["pages"] += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._gzip is not None:
+                self._file.write(self._gzip.flush(zlib.Z_FINISH))
+            self._file.flush()
+            self._fsync()
+            self._file.close()
+        log.debug(f"💾 {self.stats['records']} records written to {self.path}")
+
+def read_ndjson(path: str) -> Iterator[Dict]:
+    """Records of a sink file, skipping a last line that is still being written"""
+    if path.endswith(".gz"):
+        # A file still being written has no gzip trailer: decompress what is there
+        decompressor = zlib.decompressobj(31)
+        with open(path, "rb") as f:
+            data = b""
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                data += decompressor.decompress(chunk)
+                # Appended runs start a new gzip member
+                while decompressor.eof and decompressor.unused_data:
+                    rest = decompressor.unused_data
+                    decompressor = zlib.decompressobj(31)
+                    data += decompressor.decompress(rest)
+                *lines, data = data.split(b"\n")
+                for line in lines:
+                    if line:
+                        yield json.loads(line)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.endswith("\n") and line.strip():
+                yield json.loads(line)
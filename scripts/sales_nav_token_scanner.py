@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Single-pass token scanner for the raw-HTML fallbacks
+
+`extract_any_profiles` used to run an email regex plus four separate
+`re.findall` calls over the whole document, then paired first and last names
+with `zip`, which misaligns every record after the first missing field.
+
+This scanner makes one pass with a single compiled pattern and emits
+positioned tokens for emails, firstName, lastName, publicIdentifier and name.
+Each token is then given the offset of its enclosing `{` (a short backward
+brace walk from the token, so the CSS and JS braces elsewhere in the page
+cost nothing), and tokens are grouped by that offset so fields from the same
+JSON object always end up in the same record. Both raw (`"`) and HTML-escaped
+(`&quot;`) quoting is recognised, since LinkedIn escapes its `<code>` blocks.
+
+Usage (benchmark against the multi-regex approach on multi-megabyte pages):
+    python scripts/sales_nav_token_scanner.py --corpus tmp/debug --min-mb 4
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, NamedTuple
+from loguru import logger as log
+
+_QUOTE = r'(?:"|&quot;)'
+
+# The pattern starts with a character class so the regex engine can skip
+# straight between '"', '&' and '@' candidates; the local part of an email is
+# recovered by walking back from the '@'
+TOKEN_RE = re.compile(
+    r'["&@](?:'
+    r'(?<=@)(?P<domain>[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)'
+    r'|(?:(?<=")|(?<=&)quot;)(?P<key>firstName|lastName|publicIdentifier|name)' + _QUOTE
+    + r'\s*:\s*' + _QUOTE + r'(?P<value>[^"&\\]*(?:(?:\\.|&(?!quot;))[^"&\\]*)*)' + _QUOTE
+    + r')'
+)
+
+EMAIL_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+MAX_EMAIL_LOCAL_PART = 64
+
+# Give up looking for an enclosing object after this many braces
+MAX_BRACE_WALK = 256
+
+class Token(NamedTuple):
+    kind: str      # email, firstName, lastName, publicIdentifier or name
+    value: str
+    offset: int    # position of the token in the document
+    object_offset: int  # position of the enclosing '{', -1 at top level
+
+def _decode(value: str) -> str:
+    """Undo JSON string escapes (\\u00e9, \\") when present"""
+    if '\\' not in value:
+        return value
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+def enclosing_object(html_content: str, position: int, max_braces: int = MAX_BRACE_WALK) -> int:
+    """Offset of the innermost unclosed '{' before position, -1 if none"""
+    depth = 0
+    cursor = position
+    for _ in range(max_braces):
+        opening = html_content.rfind('{', 0, cursor)
+        closing = html_content.rfind('}', 0, cursor)
+        if opening == -1:
+            return -1
+        if closing > opening:
+            depth += 1
+            cursor = closing
+        elif depth == 0:
+            return opening
+        else:
+            depth -= 1
+            cursor = opening
+    return -1
+
+def scan_tokens(html_content: str) -> List[Token]:
+    """One pass over the document emitting positioned tokens"""
+    tokens = []
+
+    for match in TOKEN_RE.finditer(html_content):
+        offset = match.start()
+        if match.lastgroup == 'domain':
+            start = offset
+            limit = max(0, offset - MAX_EMAIL_LOCAL_PART)
+            while start > limit and html_content[start - 1] in EMAIL_LOCAL_CHARS:
+                start -= 1
+            if start == offset:
+                continue
+            tokens.append(Token('email', html_content[start:match.end()], start, enclosing_object(html_content, start)))
+        else:
+            object_offset = enclosing_object(html_content, offset)
+            tokens.append(Token(match.group('key'), _decode(match.group('value')), offset, object_offset))
+
+    return tokens
+
+def group_tokens(tokens: List[Token]) -> List[Dict]:
+    """Group tokens by enclosing object into records (first value per field wins)"""
+    groups: Dict[int, Dict] = {}
+    standalone = []
+
+    for token in tokens:
+        # Emails outside any object are independent findings
+        if token.object_offset == -1:
+            if token.kind == 'email':
+                standalone.append({"email": token.value, "offset": token.offset})
+            continue
+
+        record = groups.setdefault(token.object_offset, {"offset": token.object_offset})
+        record.setdefault(token.kind, token.value)
+
+    records = list(groups.values()) + standalone
+    records.sort(key=lambda r: r["offset"])
+    return records
+
+def scan_profile_records(html_content: str) -> List[Dict]:
+    """Profiles and emails found in raw HTML, one record per enclosing object"""
+    profiles = []
+
+    for record in group_tokens(scan_tokens(html_content)):
+        first = record.get('firstName', '').strip()
+        last = record.get('lastName', '').strip()
+        full = record.get('name', '').strip()
+
+        if first and last:
+            name = f"{first} {last}"
+        elif full and len(full.split()) >= 2:  # Likely a full name
+            name = full
+        else:
+            name = ""
+
+        email = record.get('email', '')
+        if email and 'linkedin' in email.lower():  # Skip LinkedIn's own emails
+            email = ""
+
+        if name:
+            profile = {"name": name, "source": "json_name_extraction", "offset": record["offset"]}
+            if email:
+                profile["email"] = email
+            if record.get('publicIdentifier'):
+                profile["linkedin_id"] = record['publicIdentifier']
+                profile["profile_url"] = f"https://www.linkedin.com/in/{record['publicIdentifier']}"
+            profiles.append(profile)
+        elif email:
+            profiles.append({"email": email, "source": "email_extraction", "offset": record["offset"]})
+
+    return profiles
+
+def legacy_scan(html_content: str) -> List[Dict]:
+    """The previous multi-regex approach, kept for benchmarking only"""
+    profiles = []
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    for email in re.findall(email_pattern, html_content):
+        if 'linkedin' not in email.lower():
+            profiles.append({"email": email, "source": "email_extraction"})
+
+    names = {}
+    for pattern in [r'"firstName":\s*"([^"]+)"', r'"lastName":\s*"([^"]+)"',
+                    r'"name":\s*"([^"]+)"', r'"publicIdentifier":\s*"([^"]+)"']:
+        names[pattern.split('"')[1]] = re.findall(pattern, html_content)
+
+    for first, last in zip(names['firstName'], names['lastName']):
+        if first and last:
+            profiles.append({"name": f"{first} {last}", "source": "json_name_extraction"})
+    for name in names['name']:
+        if name and len(name.split()) >= 2:
+            profiles.append({"name": name, "source": "json_name_extraction"})
+
+    return profiles
+
+def _time(func, text: str, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+def main() -> int:
+    from sales_nav_corpus import DEFAULT_CORPUS, load_corpus
+
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass scanner on multi-megabyte pages")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--min-mb", type=float, default=4.0, help="Concatenate pages until each sample is this large")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        log.error(f"❌ No HTML pages found in {args.corpus}")
+        return 1
+
+    # Build multi-megabyte samples out of the captured pages
+    samples = []
+    cursor = 0
+    for _ in range(args.samples):
+        parts, size = [], 0
+        while size < args.min_mb * 1024 * 1024:
+            content = pages[cursor % len(pages)].content
+            parts.append(content)
+            size += len(content)
+            cursor += 1
+        samples.append("".join(parts))
+
+    print(f"\n{'sample':<8}{'MB':>8}{'legacy ms':>12}{'scanner ms':>12}{'legacy recs':>13}{'scanner recs':>14}")
+    legacy_total = scanner_total = 0.0
+    for idx, sample in enumerate(samples):
+        legacy_ms = _time(legacy_scan, sample, args.repeat)
+        scanner_ms = _time(scan_profile_records, sample, args.repeat)
+        legacy_total += legacy_ms
+        scanner_total += scanner_ms
+        print(
+            f"{idx + 1:<8}{len(sample) / 1024 / 1024:>8.1f}{legacy_ms:>12.1f}{scanner_ms:>12.1f}"
+            f"{len(legacy_scan(sample)):>13}{len(scan_profile_records(sample)):>14}"
+        )
+
+    if scanner_total:
+        print(f"\n🚀 Scanner vs legacy: {legacy_total / scanner_total:.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
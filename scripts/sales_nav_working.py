@@ -4,14 +4,81 @@ Working Sales Navigator scraper for users with active subscription
 """
 
 import os
-import json
+import time
 import asyncio
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from scrapfly import ScrapeConfig, ScrapflyClient
 from parsel import Selector
+from sales_nav_selector_stats import SELECTOR_STATS, SelectorStats
+from sales_nav_embedded_json import extract_embedded_leads
+from sales_nav_page_state import PageState, classify_page
+from sales_nav_render_wait import build_wait_script, read_wait_report
+from sales_nav_access_guard import ACCOUNT_BREAKER, access_failure, account_key, detect_access_block
+from sales_nav_concurrency import SCRAPFLY_LIMITER, limited_scrape
+from sales_nav_debug_capture import DEBUG_CAPTURE
+from sales_nav_html_trim import trimmed_selector
+from sales_nav_sink import NDJSONSink
+from sales_nav_identity import SEEN_LEADS, dedupe_leads
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
 
+# Result container selectors, tried in adaptive order
+RESULT_CONTAINER_SELECTORS = [
+    '.reusable-search__result-container .result',
+    '.search-results-container .result', 
+    '.reusable-search__entities-container li',
+    '.search-results__list li',
+    '[data-x-search-result]',
+    '.artdeco-list li',
+    '.search-result',
+    '.result-lockup',
+    '.member-result'
+]
+
+# Container selectors that only match result cards; the generic `li` ones can
+# also match a sidebar or a partial list, so the scan continues past them
+RESULT_CARD_SELECTORS = {
+    '.reusable-search__result-container .result',
+    '.search-results-container .result',
+    '[data-x-search-result]',
+    '.search-result',
+    '.result-lockup',
+    '.member-result'
+}
+
+# Per-field fallback chains used inside a result container
+NAME_SELECTORS = [
+    '.result-lockup__name a::text',
+    '.result-lockup__name::text',
+    '.member-result__info h3 a::text',
+    '.member-result__info h3::text',
+    'h3 a::text',
+    'h3::text',
+    '.name a::text',
+    '.name::text',
+    '[data-control-name*="profile"] span::text'
+]
+
+TITLE_SELECTORS = [
+    '.result-lockup__highlight-keyword::text',
+    '.member-result__info .subline::text',
+    '.headline::text',
+    '.result-lockup__position::text'
+]
+
+COMPANY_SELECTORS = [
+    '.result-lockup__position-company a::text',
+    '.result-lockup__position-company::text',
+    '.member-result__info .subline a::text',
+    '.company-name::text'
+]
+
+URL_SELECTORS = [
+    'a[href*="/sales/people/"]::attr(href)',
+    'a[href*="/in/"]::attr(href)',
+    'h3 a::attr(href)'
+]
+
 def build_full_cookies() -> Dict[str, str]:
     """Build complete LinkedIn cookie set"""
     cookies = {}
@@ -44,93 +111,21 @@ async def scrape_sales_navigator_with_subscription(url: str) -> Dict:
     """Scrape Sales Navigator with proper subscription handling"""
     
     cookies = build_full_cookies()
+    account = account_key(cookies)
     
-    # More aggressive JavaScript execution for Sales Navigator
-    js_script = """
-    new Promise((resolve) => {
-        console.log('Starting Sales Navigator wait script');
-        
-        let attempts = 0;
-        const maxAttempts = 40; // 2 minutes max
-        
-        const checkForContent = () => {
-            attempts++;
-            console.log(`Attempt ${attempts}/${maxAttempts}`);
-            
-            // Remove loading screen first if it exists
-            const loadingScreen = document.querySelector('.initial-loading-state');
-            if (loadingScreen) {
-                loadingScreen.style.display = 'none';
-            }
-            
-            // Look for various result containers
-            const resultSelectors = [
-                '.reusable-search__result-container .result',
-                '.search-results-container .result',
-                '.reusable-search__entities-container li',
-                '.search-results__list li',
-                '[data-x-search-result]',
-                '.artdeco-list li',
-                '.search-result',
-                '.result-lockup',
-                '.member-result'
-            ];
-            
-            let foundResults = false;
-            for (const selector of resultSelectors) {
-                const elements = document.querySelectorAll(selector);
-                if (elements.length > 0) {
-                    console.log(`Found ${elements.length} results with selector: ${selector}`);
-                    foundResults = true;
-                    break;
-                }
-            }
-            
-            if (foundResults) {
-                resolve(true);
-                return;
-            }
-            
-            // Check for error states
-            const errorSelectors = [
-                '.empty-state',
-                '.error-state', 
-                '.no-results',
-                '.search-no-results'
-            ];
-            
-            for (const selector of errorSelectors) {
-                if (document.querySelector(selector)) {
-                    console.log(`Found error state: ${selector}`);
-                    resolve(true);
-                    return;
-                }
-            }
-            
-            // Check if we have any meaningful content
-            const bodyText = document.body.innerText.toLowerCase();
-            if (bodyText.includes('search results') || 
-                bodyText.includes('people found') || 
-                bodyText.includes('no results') ||
-                bodyText.includes('try adjusting')) {
-                console.log('Found search-related content in text');
-                resolve(true);
-                return;
-            }
-            
-            // Continue checking if we haven't reached max attempts
-            if (attempts < maxAttempts) {
-                setTimeout(checkForContent, 3000);
-            } else {
-                console.log('Max attempts reached, resolving anyway');
-                resolve(true);
-            }
-        };
-        
-        // Start checking after initial delay
-        setTimeout(checkForContent, 5000);
-    });
-    """
+    # Fail fast while this account's circuit is open
+    blocked = ACCOUNT_BREAKER.blocked_state(account)
+    if blocked:
+        print(f"🔌 Skipping: circuit open for account {account} ({blocked.value})")
+        return access_failure(url, blocked, account, from_circuit=True)
+    
+    # Event-driven wait that scrolls until the full page of cards is hydrated, with a one minute cap
+    js_script = build_wait_script(
+        result_selectors=RESULT_CONTAINER_SELECTORS,
+        max_ms=60000,
+        harvest=True,
+        page_size=DEFAULT_EXPECTED_COUNT
+    )
     
     config = ScrapeConfig(
         url,
@@ -157,18 +152,35 @@ async def scrape_sales_navigator_with_subscription(url: str) -> Dict:
         print(f"🔗 URL: {url}")
         print(f"🍪 Using {len(cookies)} cookies")
         
-        response = await SCRAPFLY.async_scrape(config)
+        response = await limited_scrape(SCRAPFLY, config)
+        SCRAPFLY_LIMITER.save()
         
         print(f"📄 Response: {response.status_code}")
         print(f"📊 Size: {len(response.content)} bytes")
+        render_wait = read_wait_report(response)
+        if render_wait:
+            print(f"⏱️ Render wait: {render_wait.get('outcome')} after {render_wait.get('time_to_results_ms')} ms "
+                  f"({render_wait.get('hydrated', 0)}/{render_wait.get('page_size', '?')} cards, {render_wait.get('scrolls', 0)} scrolls)")
         
-        # Save response for debugging
-        os.makedirs("tmp/debug", exist_ok=True)
-        with open("tmp/debug/sales_nav_subscription.html", "w", encoding="utf-8") as f:
-            f.write(response.content)
+        # A login wall or upsell page will not contain profiles; open the account circuit
+        blocked = detect_access_block(response.content)
+        if blocked:
+            print(f"🚫 Access blocked ({blocked.value}) - skipping extraction")
+            ACCOUNT_BREAKER.open(account, blocked, url)
+            ACCOUNT_BREAKER.save()
+            result = access_failure(url, blocked, account)
+            result["status_code"] = response.status_code
+            result["debug_capture"] = DEBUG_CAPTURE.capture(
+                "subscription", response.content, meta={"url": url, "page_state": blocked.value}, failed=True
+            )
+            return result
         
-        # Parse results with multiple strategies
-        profiles = extract_sales_nav_profiles(response.selector)
+        # Parse results with tiered strategies, cheapest first, over the trimmed page
+        selector, trim_info = trimmed_selector(response.content)
+        extraction = extract_sales_nav_profiles_tiered(selector)
+        profiles = extraction["profiles"]
+        SELECTOR_STATS.save()
+        print(f"🧮 Extraction tier: {extraction['tier']} ({extraction['cpu_ms']} ms CPU, {len(extraction['tiers_run'])} tier(s) run)")
         
         result = {
             "success": len(profiles) > 0,
@@ -176,22 +188,42 @@ async def scrape_sales_navigator_with_subscription(url: str) -> Dict:
             "total_found": len(profiles),
             "url": url,
             "status_code": response.status_code,
-            "content_size": len(response.content)
+            "content_size": len(response.content),
+            "extraction_tier": extraction["tier"],
+            "extraction_tiers_run": extraction["tiers_run"],
+            "extraction_cpu_ms": extraction["cpu_ms"],
+            "html_trim": trim_info,
+            "render_wait": render_wait
         }
+        # Leads recorded in an earlier run are flagged `known_lead`
+        result["new_leads"] = SEEN_LEADS.mark(profiles)
         
         if len(profiles) > 0:
-            print(f"🎉 SUCCESS! Found {len(profiles)} profiles")
+            print(f"🎉 SUCCESS! Found {len(profiles)} profiles ({result['new_leads']} new)")
             for i, profile in enumerate(profiles[:3]):
                 print(f"  {i+1}. {profile.get('name', 'No name')} - {profile.get('title', 'No title')}")
         else:
             print(f"⚠️ No profiles found - analyzing page content...")
-            analysis = analyze_sales_nav_page(response.selector)
+            # Prompts and banners live outside the result list: analyze the whole page
+            analysis = analyze_sales_nav_page(selector if trim_info["mode"] == "off" else response.selector)
             result["analysis"] = analysis
             print(f"   Title: {analysis.get('title', 'Unknown')}")
+            print(f"   Page state: {analysis.get('page_state', 'unknown')}")
             print(f"   Has subscription prompt: {analysis.get('has_subscription_prompt', False)}")
             print(f"   Has search interface: {analysis.get('has_search_interface', False)}")
             print(f"   Content type: {analysis.get('content_type', 'Unknown')}")
         
+        # Pages without profiles are always captured, the rest sampled
+        result["debug_capture"] = DEBUG_CAPTURE.capture(
+            "subscription",
+            response.content,
+            meta={"url": url, "total_found": len(profiles), "extraction_tier": extraction["tier"],
+                  "analysis": result.get("analysis")},
+            failed=not profiles
+        )
+        if result["debug_capture"]:
+            print(f"💾 Page captured to {result['debug_capture']}")
+        
         return result
         
     except Exception as e:
@@ -202,147 +234,164 @@ async def scrape_sales_navigator_with_subscription(url: str) -> Dict:
             "url": url
         }
 
-def extract_sales_nav_profiles(selector: Selector) -> List[Dict]:
-    """Extract profiles from Sales Navigator with multiple strategies"""
-    profiles = []
+def extract_from_containers(selector: Selector, stats: SelectorStats, deadline: float) -> Tuple[List[Dict], bool]:
+    """Tier 1: result containers, most productive selector first
     
-    # Strategy 1: Modern Sales Navigator selectors
-    result_containers = [
-        '.reusable-search__result-container .result',
-        '.search-results-container .result', 
-        '.reusable-search__entities-container li',
-        '.search-results__list li',
-        '[data-x-search-result]',
-        '.artdeco-list li',
-        '.search-result',
-        '.result-lockup',
-        '.member-result'
-    ]
-    
-    for container_selector in result_containers:
+    Stops at the first result-card selector that yields profiles or once the
+    page is full; profiles from generic selectors are kept and deduped while
+    the scan goes on.
+    """
+    profiles = []
+    tried, yields = [], []
+    complete = False
+    out_of_budget = False
+    for container_selector in stats.ordered("working.container", RESULT_CONTAINER_SELECTORS):
         containers = selector.css(container_selector)
         print(f"  Trying {container_selector}: {len(containers)} containers")
         
+        found = 0
         for idx, container in enumerate(containers):
-            profile = extract_profile_from_sales_nav_container(container, idx)
+            if time.thread_time() >= deadline:
+                out_of_budget = True
+                break
+            profile = extract_profile_from_sales_nav_container(container, idx, stats)
             if profile:
                 profiles.append(profile)
+                found += 1
+        tried.append(container_selector)
+        yields.append(found)
+        if out_of_budget:
+            break
+        
+        if found and len(dedupe_leads(profiles)) >= DEFAULT_EXPECTED_COUNT:
+            complete = True
+            break
+        if found and container_selector in RESULT_CARD_SELECTORS:
+            # Every card yielded a profile: nothing left for the other tiers
+            complete = found == len(containers)
+            break
+    
+    stats.record_scan("working.container", tried, yields)
+    stats.finish_run()
+    return dedupe_leads(profiles), complete
+
+def extract_from_embedded_json(selector: Selector, stats: SelectorStats, deadline: float) -> Tuple[List[Dict], bool]:
+    """Tier 2: leads from the embedded Voyager / Sales API JSON payloads"""
+    profiles = []
+    # One parse of a few <code> blocks; the deadline is checked before the tier starts
+    for idx, lead in enumerate(extract_embedded_leads(selector)):
+        lead["result_index"] = idx
+        profiles.append(lead)
     
-    # Strategy 2: Look for any profile links and extract context
+    print(f"  Found {len(profiles)} leads in embedded JSON")
+    return profiles, False
+
+def extract_from_link_context(selector: Selector, stats: SelectorStats, deadline: float) -> Tuple[List[Dict], bool]:
+    """Tier 3: every profile link, with a context walk up two levels"""
+    profiles = []
     profile_links = selector.css('a[href*="/sales/people/"], a[href*="/in/"]')
     print(f"  Found {len(profile_links)} profile links")
     
     for idx, link in enumerate(profile_links):
+        if time.thread_time() >= deadline:
+            break
         profile = extract_profile_from_link_context(link, idx)
         if profile:
             profiles.append(profile)
     
-    # Strategy 3: JSON data extraction
-    scripts = selector.css('script::text').getall()
-    for script in scripts:
-        if 'voyager' in script.lower() or 'search' in script.lower():
-            try:
-                # Try to extract any JSON that might contain profile data
-                import re
-                json_matches = re.findall(r'\{[^{}]*"firstName"[^{}]*\}', script)
-                for match in json_matches:
-                    try:
-                        data = json.loads(match)
-                        if 'firstName' in data:
-                            profile = {
-                                "name": f"{data.get('firstName', '')} {data.get('lastName', '')}".strip(),
-                                "title": data.get('headline', ''),
-                                "company": data.get('companyName', ''),
-                                "location": data.get('location', ''),
-                                "profile_url": data.get('profileUrl', ''),
-                                "source": "json_extraction"
-                            }
-                            if profile["name"]:
-                                profiles.append(profile)
-                    except:
-                        continue
-            except:
-                continue
-    
-    # Remove duplicates
-    unique_profiles = []
-    seen = set()
-    for profile in profiles:
-        key = profile.get('name', '') + profile.get('profile_url', '')
-        if key and key not in seen:
-            seen.add(key)
-            unique_profiles.append(profile)
-    
-    return unique_profiles
+    return profiles, False
 
-def extract_profile_from_sales_nav_container(container, idx: int) -> Dict:
-    """Extract profile from Sales Navigator result container"""
-    try:
-        # Multiple name extraction approaches
-        name_selectors = [
-            '.result-lockup__name a::text',
-            '.result-lockup__name::text',
-            '.member-result__info h3 a::text',
-            '.member-result__info h3::text',
-            'h3 a::text',
-            'h3::text',
-            '.name a::text',
-            '.name::text',
-            '[data-control-name*="profile"] span::text'
-        ]
-        
-        name = ""
-        for sel in name_selectors:
-            result = container.css(sel).get()
-            if result and result.strip():
-                name = result.strip()
-                break
-        
-        # Title extraction
-        title_selectors = [
-            '.result-lockup__highlight-keyword::text',
-            '.member-result__info .subline::text',
-            '.headline::text',
-            '.result-lockup__position::text'
-        ]
+# Extraction tiers in order of increasing cost; the embedded JSON parse
+# reads a handful of <code> blocks, the link walk touches every anchor
+EXTRACTION_TIERS = [
+    ("containers", extract_from_containers),
+    ("embedded_json", extract_from_embedded_json),
+    ("link_context", extract_from_link_context),
+]
+
+# Sales Navigator shows 25 leads per result page
+DEFAULT_EXPECTED_COUNT = 25
+DEFAULT_CPU_BUDGET_MS = 500
+
+def extract_sales_nav_profiles_tiered(selector: Selector, expected_count: int = DEFAULT_EXPECTED_COUNT,
+                                      cpu_budget_ms: float = DEFAULT_CPU_BUDGET_MS,
+                                      stats: Optional[SelectorStats] = None) -> Dict:
+    """Run extraction tiers cheapest first and stop once the page is covered
+    
+    Stops when the expected number of profiles is reached, when a tier
+    reports the page complete, or when the per-page CPU budget is spent.
+    The budget is checked between tiers and per container / link inside
+    them, so a page overruns it by at most one item (or one embedded JSON
+    parse).
+    """
+    stats = stats or SELECTOR_STATS
+    started = time.thread_time()
+    deadline = started + cpu_budget_ms / 1000
+    profiles = []
+    produced_by = []
+    tiers_run = []
+    budget_exhausted = False
+    
+    for name, tier in EXTRACTION_TIERS:
+        if time.thread_time() >= deadline:
+            budget_exhausted = True
+            print(f"  CPU budget of {cpu_budget_ms} ms spent, skipping remaining tiers")
+            break
         
-        title = ""
-        for sel in title_selectors:
-            result = container.css(sel).get()
-            if result and result.strip():
-                title = result.strip()
-                break
+        tier_started = time.thread_time()
+        found, complete = tier(selector, stats, deadline)
+        tiers_run.append({
+            "tier": name,
+            "found": len(found),
+            "cpu_ms": round((time.thread_time() - tier_started) * 1000, 3)
+        })
         
-        # Company extraction
-        company_selectors = [
-            '.result-lockup__position-company a::text',
-            '.result-lockup__position-company::text',
-            '.member-result__info .subline a::text',
-            '.company-name::text'
-        ]
+        if found:
+            produced_by.append(name)
+            profiles = dedupe_leads(profiles + found)
         
-        company = ""
-        for sel in company_selectors:
-            result = container.css(sel).get()
-            if result and result.strip():
-                company = result.strip()
-                break
+        if complete or len(profiles) >= expected_count:
+            break
+    else:
+        budget_exhausted = time.thread_time() >= deadline
+    
+    return {
+        "profiles": profiles,
+        "tier": produced_by[0] if produced_by else None,
+        "tiers_with_results": produced_by,
+        "tiers_run": tiers_run,
+        "cpu_ms": round((time.thread_time() - started) * 1000, 3),
+        "budget_exhausted": budget_exhausted
+    }
+
+def extract_sales_nav_profiles(selector: Selector, stats: Optional[SelectorStats] = None) -> List[Dict]:
+    """Extract profiles from Sales Navigator with multiple strategies"""
+    return extract_sales_nav_profiles_tiered(selector, stats=stats)["profiles"]
+
+def first_match(container, chain: str, selectors: List[str], stats: SelectorStats, strip: bool = True) -> str:
+    """Return the first non-empty value from a selector chain in adaptive order"""
+    order = stats.ordered(chain, selectors)
+    for position, sel in enumerate(order):
+        result = container.css(sel).get()
+        if result and (not strip or result.strip()):
+            stats.record_cascade(chain, order, position)
+            return result.strip() if strip else result
+    
+    stats.record_cascade(chain, order, None)
+    return ""
+
+def extract_profile_from_sales_nav_container(container, idx: int, stats: Optional[SelectorStats] = None) -> Dict:
+    """Extract profile from Sales Navigator result container"""
+    stats = stats or SELECTOR_STATS
+    try:
+        name = first_match(container, "working.name", NAME_SELECTORS, stats)
+        title = first_match(container, "working.title", TITLE_SELECTORS, stats)
+        company = first_match(container, "working.company", COMPANY_SELECTORS, stats)
         
         # Profile URL
-        profile_url = ""
-        url_selectors = [
-            'a[href*="/sales/people/"]::attr(href)',
-            'a[href*="/in/"]::attr(href)',
-            'h3 a::attr(href)'
-        ]
-        
-        for sel in url_selectors:
-            result = container.css(sel).get()
-            if result:
-                profile_url = result
-                if not profile_url.startswith('http'):
-                    profile_url = 'https://www.linkedin.com' + profile_url
-                break
+        profile_url = first_match(container, "working.url", URL_SELECTORS, stats, strip=False)
+        if profile_url and not profile_url.startswith('http'):
+            profile_url = 'https://www.linkedin.com' + profile_url
         
         if name:
             return {
@@ -352,7 +401,7 @@ def extract_profile_from_sales_nav_container(container, idx: int) -> Dict:
                 "location": "",
                 "profile_url": profile_url,
                 "source": "sales_nav_container",
-                "index": idx
+                "result_index": idx
             }
     
     except Exception as e:
@@ -386,7 +435,7 @@ def extract_profile_from_link_context(link, idx: int) -> Dict:
                     "location": "",
                     "profile_url": href,
                     "source": "link_context",
-                    "index": idx
+                    "result_index": idx
                 }
     
     except Exception as e:
@@ -398,18 +447,21 @@ def analyze_sales_nav_page(selector: Selector) -> Dict:
     """Analyze what type of Sales Navigator page we received"""
     
     title = selector.css("title::text").get() or ""
-    content = selector.get().lower()
+    content = selector.get()
+    page = classify_page(content)
     
     return {
         "title": title,
-        "has_loading_screen": "loading" in content or "initial-load" in content,
-        "has_subscription_prompt": "upgrade" in content or "premium" in content,
-        "has_search_interface": "search" in content and ("filters" in content or "results" in content),
-        "has_login_prompt": "sign in" in content or "login" in content,
-        "content_type": "loading" if "initial-load" in content else "search" if "search" in content else "unknown",
+        "page_state": page.state.value,
+        "has_loading_screen": page.has("loading") or page.has("loading_hint"),
+        "has_subscription_prompt": page.has("upsell") or page.has("upsell_hint"),
+        "has_search_interface": page.has("search_interface") or page.has("results"),
+        "has_login_prompt": page.has("login") or page.has("login_hint"),
+        "content_type": "loading" if page.state == PageState.LOADING else "search" if page.has("search_interface") or page.has("results") else "unknown",
         "total_links": len(selector.css('a')),
         "profile_links": len(selector.css('a[href*="/in/"], a[href*="/sales/people/"]')),
-        "content_size": len(content)
+        "content_size": len(content),
+        "classify_ms": round(page.elapsed_ms, 3)
     }
 
 async def test_sales_nav_with_subscription():
@@ -427,11 +479,13 @@ async def test_sales_nav_with_subscription():
     
     result = await scrape_sales_navigator_with_subscription(test_url)
     
-    # Save results
-    with open("tmp/sales_nav_subscription_results.json", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    # Append the leads and the page record; earlier runs stay in the file
+    with NDJSONSink("tmp/sales_nav_subscription_results.ndjson") as sink:
+        sink.write_result(result)
+    # Only once the leads are on disk: a lead remembered as seen is skipped by later loads
+    SEEN_LEADS.save()
     
-    print(f"\n💾 Results saved to tmp/sales_nav_subscription_results.json")
+    print(f"\n💾 Results appended to tmp/sales_nav_subscription_results.ndjson")
     
     return result
 
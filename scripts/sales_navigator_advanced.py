@@ -7,14 +7,32 @@ the actual search results to load, not just the initial loading screen.
 """
 
 import os
-import json
 import time
 import asyncio
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlencode, quote_plus, unquote
 from parsel import Selector
 from loguru import logger as log
 from scrapfly import ScrapeConfig, ScrapflyClient, ScrapeApiResponse
+from sales_nav_selector_stats import SELECTOR_STATS, SelectorStats
+from sales_nav_access_guard import ACCOUNT_BREAKER, access_failure, account_key, detect_access_block
+from sales_nav_concurrency import SCRAPFLY_LIMITER, limited_scrape
+from sales_nav_hedging import RENDER_HEDGER, hedge_variant
+from sales_nav_fetch_tiers import url_pattern
+from sales_nav_debug_capture import DEBUG_CAPTURE
+from sales_nav_html_trim import trimmed_selector
+from sales_nav_render_wait import build_wait_script, read_wait_report
+from sales_nav_sink import NDJSONSink
+from sales_nav_identity import SEEN_LEADS, dedupe_leads
+from sales_nav_layout_cache import (
+    PLAN_CACHE,
+    PlanCache,
+    class_inventory,
+    layout_classes,
+    layout_fingerprint,
+    learn_plan,
+    extract_with_plan,
+)
 
 # Initialize ScrapFly client
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
@@ -32,69 +50,10 @@ BASE_CONFIG = {
         "Pragma": "no-cache"
     },
     "render_js": True,
-    # Wait for specific content to appear - this is key for Sales Navigator
-    "js": """
-    // Wait for Sales Navigator search results to load
-    new Promise((resolve) => {
-        const checkForResults = () => {
-            // Check for various possible result containers
-            const resultSelectors = [
-                '[data-x-search-result]',
-                '.search-results__result-item',
-                '.reusable-search__result-container',
-                '.search-results-container',
-                '.artdeco-list__item',
-                '[data-test-id*="result"]',
-                '.result-lockup'
-            ];
-            
-            for (let selector of resultSelectors) {
-                const elements = document.querySelectorAll(selector);
-                if (elements.length > 0) {
-                    console.log(`Found ${elements.length} results with selector: ${selector}`);
-                    resolve(true);
-                    return;
-                }
-            }
-            
-            // Check if we're still on loading screen
-            const loadingElements = document.querySelectorAll('.initial-loading-state, .loading-bar, .salesnav-image');
-            if (loadingElements.length > 0) {
-                console.log('Still on loading screen, waiting...');
-                setTimeout(checkForResults, 2000);
-                return;
-            }
-            
-            // Check for error states
-            const errorElements = document.querySelectorAll('.error-state, .empty-state, .no-results');
-            if (errorElements.length > 0) {
-                console.log('Found error or empty state');
-                resolve(true);
-                return;
-            }
-            
-            // Check if page has loaded but no results (could be valid empty results)
-            const bodyText = document.body.innerText.toLowerCase();
-            if (bodyText.includes('search results') || bodyText.includes('people') || bodyText.includes('no results')) {
-                console.log('Page loaded with search context');
-                resolve(true);
-                return;
-            }
-            
-            // Continue waiting if none of the above conditions are met
-            setTimeout(checkForResults, 2000);
-        };
-        
-        // Start checking after initial delay
-        setTimeout(checkForResults, 3000);
-        
-        // Max timeout of 30 seconds
-        setTimeout(() => {
-            console.log('Timeout reached, resolving anyway');
-            resolve(true);
-        }, 30000);
-    });
-    """,
+    # Wait for specific content to appear - this is key for Sales Navigator;
+    # scroll the lazily rendered list until all 25 cards are hydrated, then
+    # resolve (or immediately on a login wall / upsell)
+    "js": build_wait_script(max_ms=30000, harvest=True),
     "proxy_pool": "public_residential_pool",
     "cache": False,
     "session": "linkedin_advanced_session"
@@ -118,52 +77,156 @@ def build_linkedin_cookies() -> Dict[str, str]:
     
     return cookies
 
-def extract_profiles_comprehensive(selector: Selector) -> List[Dict]:
+# Result container selectors, tried in order
+CONTAINER_SELECTORS = [
+    '[data-x-search-result]',
+    '.search-results__result-item',
+    '.reusable-search__result-container li',
+    '.search-results-container li',
+    '.artdeco-list__item',
+    '[data-test-id*="result"]',
+    '.result-lockup'
+]
+
+# Container selectors that only match result cards; the generic ones can
+# also match a sidebar or a partial list, so the scan continues past them
+RESULT_CARD_SELECTORS = {
+    '[data-x-search-result]',
+    '.search-results__result-item',
+    '.reusable-search__result-container li',
+    '.result-lockup'
+}
+
+# Sales Navigator shows 25 leads per result page
+EXPECTED_PAGE_SIZE = 25
+
+# Per-field fallback chains used inside a result container
+NAME_SELECTORS = [
+    '[data-anonymize="person-name"] span::text',
+    '.result-lockup__name::text',
+    '.result-lockup__name a::text',
+    'h3 a::text',
+    'h3::text',
+    '.name::text',
+    'a[data-control-name*="profile"]::text',
+    'span[aria-hidden="true"]::text'
+]
+
+TITLE_SELECTORS = [
+    '[data-anonymize="person-title"]::text',
+    '.result-lockup__highlight-keyword::text',
+    '.result-lockup__position::text',
+    '.member-insights__reason::text',
+    '.subline::text',
+    '.headline::text'
+]
+
+COMPANY_SELECTORS = [
+    '[data-anonymize="company-name"]::text',
+    '.result-lockup__position-company a::text',
+    '.result-lockup__position-company::text',
+    'a[data-control-name*="company"]::text'
+]
+
+LOCATION_SELECTORS = [
+    '[data-anonymize="person-location"]::text',
+    '.result-lockup__misc-item::text',
+    '.member-insights__location::text',
+    '.location::text'
+]
+
+URL_SELECTORS = [
+    'a[href*="/in/"]::attr(href)',
+    'a[href*="/sales/people/"]::attr(href)',
+    'a[data-control-name*="profile"]::attr(href)'
+]
+
+def extract_profiles_comprehensive(selector: Selector, stats: Optional[SelectorStats] = None) -> List[Dict]:
     """Comprehensive profile extraction using multiple strategies"""
+    stats = stats or SELECTOR_STATS
     profiles = []
     
-    # Strategy 1: Try modern Sales Navigator selectors
+    # Strategy 1: Try modern Sales Navigator selectors, most productive first
     log.info("Trying modern Sales Navigator selectors...")
     
-    # Multiple container selectors to try
-    container_selectors = [
-        '[data-x-search-result]',
-        '.search-results__result-item',
-        '.reusable-search__result-container li',
-        '.search-results-container li',
-        '.artdeco-list__item',
-        '[data-test-id*="result"]',
-        '.result-lockup'
-    ]
-    
-    for container_selector in container_selectors:
+    order = stats.ordered("advanced.container", CONTAINER_SELECTORS)
+    tried, yields = [], []
+    for container_selector in order:
         containers = selector.css(container_selector)
         log.info(f"Found {len(containers)} containers with selector: {container_selector}")
         
-        if len(containers) > 0:
-            for idx, container in enumerate(containers):
-                profile = extract_profile_from_container(container, idx, container_selector)
-                if profile:
-                    profiles.append(profile)
+        found = 0
+        for idx, container in enumerate(containers):
+            profile = extract_profile_from_container(container, idx, container_selector, stats)
+            if profile:
+                profiles.append(profile)
+                found += 1
+        tried.append(container_selector)
+        yields.append(found)
+        
+        # Stop once a result-card selector matched or the page is full
+        if found and (container_selector in RESULT_CARD_SELECTORS or len(dedupe_leads(profiles)) >= EXPECTED_PAGE_SIZE):
+            break
     
-    # Strategy 2: Try generic person/profile selectors
+    stats.record_scan("advanced.container", tried, yields)
+    stats.finish_run()
+    
+    # Strategies 2 and 3 only run when the containers yielded nothing
     if not profiles:
-        log.info("Trying generic person/profile selectors...")
-        person_selectors = [
-            '[data-anonymize="person-name"]',
-            '.result-lockup__name',
-            '[data-control-name*="profile"]',
-            'a[href*="/in/"]'
-        ]
+        profiles = extract_profiles_fallback(selector)
+    
+    return dedupe_leads(profiles)
+
+def extract_profiles_planned(selector: Selector, cache: Optional[PlanCache] = None) -> Tuple[List[Dict], Dict]:
+    """Use the cached plan for a known layout, else run the cascade and learn one"""
+    cache = cache or PLAN_CACHE
+    fingerprint = layout_fingerprint(selector)
+    plan = cache.get(fingerprint)
+    
+    if plan:
+        profiles = dedupe_leads(extract_with_plan(selector, plan))
+        if profiles:
+            cache.record_hit(fingerprint)
+            log.info(f"⚡ Layout {fingerprint} known, used cached plan ({plan['container']})")
+            return profiles, {"fingerprint": fingerprint, "plan_cache": "hit", "plan": plan}
+        
+        log.warning(f"Cached plan for layout {fingerprint} found nothing, relearning")
+        cache.invalidate(fingerprint)
+    
+    profiles = extract_profiles_comprehensive(selector)
+    
+    # Only container-based results can be replayed as a plan
+    methods = [p.get("extraction_method", "") for p in profiles]
+    container_methods = [m for m in methods if m.startswith("container_")]
+    learned = None
+    if container_methods:
+        learned = learn_plan(selector, container_methods[0][len("container_"):], FIELD_CHAINS)
+        if learned:
+            cache.put(fingerprint, learned)
+    
+    return profiles, {"fingerprint": fingerprint, "plan_cache": "stale" if plan else "miss", "plan": learned}
+
+def extract_profiles_fallback(selector: Selector) -> List[Dict]:
+    """Element and link based strategies for pages without result containers"""
+    profiles = []
+    
+    # Strategy 2: Try generic person/profile selectors
+    log.info("Trying generic person/profile selectors...")
+    person_selectors = [
+        '[data-anonymize="person-name"]',
+        '.result-lockup__name',
+        '[data-control-name*="profile"]',
+        'a[href*="/in/"]'
+    ]
+    
+    for selector_name in person_selectors:
+        elements = selector.css(selector_name)
+        log.info(f"Found {len(elements)} elements with selector: {selector_name}")
         
-        for selector_name in person_selectors:
-            elements = selector.css(selector_name)
-            log.info(f"Found {len(elements)} elements with selector: {selector_name}")
-            
-            for idx, element in enumerate(elements):
-                profile = extract_profile_from_element(element, idx, selector_name)
-                if profile:
-                    profiles.append(profile)
+        for idx, element in enumerate(elements):
+            profile = extract_profile_from_element(element, idx, selector_name)
+            if profile:
+                profiles.append(profile)
     
     # Strategy 3: Try to find any LinkedIn profile links and extract around them
     if not profiles:
@@ -176,110 +239,49 @@ def extract_profiles_comprehensive(selector: Selector) -> List[Dict]:
             if profile:
                 profiles.append(profile)
     
-    # Remove duplicates based on name or profile URL
-    unique_profiles = []
-    seen_identifiers = set()
-    
-    for profile in profiles:
-        identifier = profile.get('name', '') + profile.get('profile_url', '')
-        if identifier and identifier not in seen_identifiers:
-            seen_identifiers.add(identifier)
-            unique_profiles.append(profile)
-    
-    return unique_profiles
+    return profiles
 
-def extract_profile_from_container(container, idx: int, selector_used: str) -> Optional[Dict]:
+# Field name -> stats chain and selector fallback chain
+FIELD_CHAINS = [
+    ("name", "advanced.name", NAME_SELECTORS),
+    ("title", "advanced.title", TITLE_SELECTORS),
+    ("company", "advanced.company", COMPANY_SELECTORS),
+    ("location", "advanced.location", LOCATION_SELECTORS),
+    ("profile_url", "advanced.url", URL_SELECTORS),
+]
+
+def first_match(container, chain: str, selectors: List[str], stats: SelectorStats, strip: bool = True) -> str:
+    """Return the first non-empty value from a selector chain in adaptive order"""
+    order = stats.ordered(chain, selectors)
+    for position, css in enumerate(order):
+        result = container.css(css).get()
+        if result and (not strip or result.strip()):
+            stats.record_cascade(chain, order, position)
+            return result.strip() if strip else result
+    
+    stats.record_cascade(chain, order, None)
+    return ""
+
+def extract_profile_from_container(container, idx: int, selector_used: str, stats: Optional[SelectorStats] = None) -> Optional[Dict]:
     """Extract profile data from a container element"""
+    stats = stats or SELECTOR_STATS
     try:
-        # Try multiple name extraction strategies
-        name = ""
-        name_selectors = [
-            '[data-anonymize="person-name"] span::text',
-            '.result-lockup__name::text',
-            '.result-lockup__name a::text',
-            'h3 a::text',
-            'h3::text',
-            '.name::text',
-            'a[data-control-name*="profile"]::text',
-            'span[aria-hidden="true"]::text'
-        ]
-        
-        for name_sel in name_selectors:
-            name_result = container.css(name_sel).get()
-            if name_result and name_result.strip():
-                name = name_result.strip()
-                break
-        
-        # Try multiple title extraction strategies
-        title = ""
-        title_selectors = [
-            '[data-anonymize="person-title"]::text',
-            '.result-lockup__highlight-keyword::text',
-            '.result-lockup__position::text',
-            '.member-insights__reason::text',
-            '.subline::text',
-            '.headline::text'
-        ]
-        
-        for title_sel in title_selectors:
-            title_result = container.css(title_sel).get()
-            if title_result and title_result.strip():
-                title = title_result.strip()
-                break
-        
-        # Try company extraction
-        company = ""
-        company_selectors = [
-            '[data-anonymize="company-name"]::text',
-            '.result-lockup__position-company a::text',
-            '.result-lockup__position-company::text',
-            'a[data-control-name*="company"]::text'
-        ]
-        
-        for company_sel in company_selectors:
-            company_result = container.css(company_sel).get()
-            if company_result and company_result.strip():
-                company = company_result.strip()
-                break
+        # Try each field's selector chain, most productive selector first
+        fields = {}
+        for field, chain, selectors in FIELD_CHAINS:
+            fields[field] = first_match(container, chain, selectors, stats, strip=field != "profile_url")
         
-        # Try location extraction
-        location = ""
-        location_selectors = [
-            '[data-anonymize="person-location"]::text',
-            '.result-lockup__misc-item::text',
-            '.member-insights__location::text',
-            '.location::text'
-        ]
-        
-        for location_sel in location_selectors:
-            location_result = container.css(location_sel).get()
-            if location_result and location_result.strip():
-                location = location_result.strip()
-                break
-        
-        # Try profile URL extraction
-        profile_url = ""
-        url_selectors = [
-            'a[href*="/in/"]::attr(href)',
-            'a[href*="/sales/people/"]::attr(href)',
-            'a[data-control-name*="profile"]::attr(href)'
-        ]
-        
-        for url_sel in url_selectors:
-            url_result = container.css(url_sel).get()
-            if url_result:
-                profile_url = url_result
-                if not profile_url.startswith('http'):
-                    profile_url = 'https://www.linkedin.com' + profile_url
-                break
+        profile_url = fields["profile_url"]
+        if profile_url and not profile_url.startswith('http'):
+            profile_url = 'https://www.linkedin.com' + profile_url
         
         # Only return if we have at least a name
-        if name:
+        if fields["name"]:
             return {
-                "name": name,
-                "title": title,
-                "company": company,
-                "location": location,
+                "name": fields["name"],
+                "title": fields["title"],
+                "company": fields["company"],
+                "location": fields["location"],
                 "profile_url": profile_url,
                 "extraction_method": f"container_{selector_used}",
                 "result_index": idx
@@ -368,37 +370,58 @@ async def scrape_sales_navigator_advanced(url: str) -> Dict:
     """Advanced Sales Navigator scraping with proper wait conditions"""
     try:
         cookies = build_linkedin_cookies()
+        account = account_key(cookies)
         
-        config = ScrapeConfig(
-            url,
-            cookies=cookies,
-            **BASE_CONFIG
-        )
+        # Fail fast while this account's circuit is open
+        blocked = ACCOUNT_BREAKER.blocked_state(account)
+        if blocked:
+            log.warning(f"🔌 Skipping {url}: circuit open for account {account} ({blocked.value})")
+            return access_failure(url, blocked, account, from_circuit=True)
         
         log.info(f"🚀 Starting advanced scrape of: {url}")
         log.info(f"🔐 Using cookies: {list(cookies.keys())}")
         
-        # Perform the scrape with advanced JavaScript handling
-        response = await SCRAPFLY.async_scrape(config)
+        # Perform the scrape with advanced JavaScript handling; with a hedge
+        # budget, a render slower than the usual p95 races a second session
+        response = await RENDER_HEDGER.run(url_pattern(url), lambda attempt: limited_scrape(
+            SCRAPFLY, ScrapeConfig(url, cookies=cookies, **hedge_variant(BASE_CONFIG, attempt))
+        ))
+        SCRAPFLY_LIMITER.save()
+        RENDER_HEDGER.save()
         
         log.info(f"📄 Response status: {response.status_code}")
         log.info(f"📊 Response size: {len(response.content)} bytes")
-        
-        # Save the final HTML for debugging
-        os.makedirs("tmp/debug", exist_ok=True)
-        with open("tmp/debug/final_page.html", "w", encoding="utf-8") as f:
-            f.write(response.content)
-        
-        # Parse the response
-        selector = response.selector
-        
-        # Extract profiles using comprehensive strategy
-        profiles = extract_profiles_comprehensive(selector)
-        
-        # Additional debugging: save page analysis
-        page_analysis = analyze_final_page(selector)
-        with open("tmp/debug/final_analysis.json", "w", encoding="utf-8") as f:
-            json.dump(page_analysis, f, indent=2, ensure_ascii=False)
+        render_wait = read_wait_report(response)
+        if render_wait:
+            log.info(
+                f"⏱️ Render wait: {render_wait.get('outcome')} after {render_wait.get('time_to_results_ms')} ms, "
+                f"{render_wait.get('hydrated', render_wait.get('results'))}/{render_wait.get('page_size', '?')} cards "
+                f"in {render_wait.get('scrolls', 0)} scrolls"
+            )
+        
+        # A login wall or upsell page will not contain profiles; open the account circuit
+        blocked = detect_access_block(response.content)
+        if blocked:
+            log.error(f"🚫 Access blocked ({blocked.value}) - skipping extraction")
+            ACCOUNT_BREAKER.open(account, blocked, url)
+            ACCOUNT_BREAKER.save()
+            result = access_failure(url, blocked, account)
+            result["response_status"] = response.status_code
+            result["debug_capture"] = DEBUG_CAPTURE.capture(
+                "advanced", response.content, meta={"url": url, "page_state": blocked.value}, failed=True
+            )
+            return result
+        
+        # Parse the response, trimmed to the result list and data blocks
+        selector, trim_info = trimmed_selector(response.content)
+        
+        # Extract profiles, taking the direct path for known layouts
+        profiles, plan_info = extract_profiles_planned(selector)
+        SELECTOR_STATS.save()
+        PLAN_CACHE.save()
+        
+        # Without profiles the whole page is analyzed; prompts and banners live outside the result list
+        page_analysis = analyze_final_page(selector if profiles or trim_info["mode"] == "off" else response.selector)
         
         result = {
             "success": len(profiles) > 0,
@@ -408,15 +431,29 @@ async def scrape_sales_navigator_advanced(url: str) -> Dict:
             "scraped_at": time.time(),
             "response_status": response.status_code,
             "response_size": len(response.content),
+            "layout_fingerprint": plan_info["fingerprint"],
+            "plan_cache": plan_info["plan_cache"],
+            "render_wait": render_wait,
+            "html_trim": trim_info,
             "page_analysis": page_analysis
         }
+        # Leads recorded in an earlier run are flagged `known_lead`
+        result["new_leads"] = SEEN_LEADS.mark(profiles)
+        
+        # Every page without profiles, plus a sample of the rest, is kept for debugging
+        result["debug_capture"] = DEBUG_CAPTURE.capture(
+            "advanced",
+            response.content,
+            meta={"url": url, "total_found": len(profiles), "render_wait": render_wait, "page_analysis": page_analysis},
+            failed=not profiles
+        )
         
         if len(profiles) > 0:
-            log.success(f"🎉 Successfully extracted {len(profiles)} profiles!")
+            log.success(f"🎉 Successfully extracted {len(profiles)} profiles ({result['new_leads']} new)!")
             for i, profile in enumerate(profiles[:3]):
                 log.info(f"👤 Profile {i+1}: {profile['name']} - {profile['title']}")
         else:
-            log.warning("⚠️ No profiles extracted - check debug files for analysis")
+            log.warning(f"⚠️ No profiles extracted - page captured to {result['debug_capture']}")
         
         return result
         
@@ -446,13 +483,8 @@ def analyze_final_page(selector: Selector) -> Dict:
     result_containers = len(selector.css('[data-x-search-result], .search-results__result-item, .result-lockup'))
     
     # Get all class names
-    all_classes = []
-    for element in selector.css("*[class]"):
-        classes = element.css("::attr(class)").get()
-        if classes:
-            all_classes.extend(classes.split())
-    
-    interesting_classes = [c for c in set(all_classes) if any(keyword in c.lower() for keyword in ['result', 'search', 'person', 'profile', 'member', 'lockup'])]
+    all_classes = class_inventory(selector)
+    interesting_classes = layout_classes(all_classes)
     
     # Check page text content
     body_text = selector.css('body').get() or ""
@@ -466,7 +498,8 @@ def analyze_final_page(selector: Selector) -> Dict:
         "total_links": total_links,
         "linkedin_links": linkedin_links,
         "result_containers": result_containers,
-        "interesting_classes": sorted(interesting_classes),
+        "interesting_classes": interesting_classes,
+        "layout_fingerprint": layout_fingerprint(selector, all_classes),
         "has_sales_nav_content": has_sales_nav_content,
         "page_size": len(body_text),
         "element_count": len(selector.css("*"))
@@ -487,11 +520,13 @@ async def test_advanced_scraper():
     result = await scrape_sales_navigator_advanced(test_url)
     
     # Save results
-    output_file = "tmp/advanced_scraper_results.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    output_file = "tmp/advanced_scraper_results.ndjson"
+    with NDJSONSink(output_file) as sink:
+        sink.write_result(result)
+    # Only once the leads are on disk: a lead remembered as seen is skipped by later loads
+    SEEN_LEADS.save()
     
-    log.info(f"💾 Results saved to: {output_file}")
+    log.info(f"💾 Results appended to: {output_file}")
     
     # Print summary
     if result["success"]:
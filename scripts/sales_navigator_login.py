@@ -4,28 +4,31 @@ Sales Navigator scraper with login capability
 """
 
 import os
-import json
 import time
 import asyncio
 from typing import Dict, List, Optional
 from scrapfly import ScrapeConfig, ScrapflyClient
+from sales_nav_render_wait import build_wait_expression, build_wait_script, read_wait_report
+from sales_nav_access_guard import ACCESS_GUARD_JS, detect_access_block
+from sales_nav_session_pool import SessionPool, SessionWarmError, scrapfly_health_check
+from sales_nav_debug_capture import DEBUG_CAPTURE, is_failure
+from sales_nav_sink import NDJSONSink
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
 
-async def linkedin_login_and_scrape(target_url: str) -> Dict:
-    """Login to LinkedIn and then scrape Sales Navigator"""
-    
-    print("🔑 Step 1: Attempting LinkedIn login...")
-    
-    # First, try to login to LinkedIn
-    login_config = ScrapeConfig(
+# Inline errors the login form shows when the credentials are rejected
+LOGIN_ERROR_SELECTORS = ['#error-for-username:not(.hidden)', '#error-for-password:not(.hidden)', '.alert-content']
+
+def build_login_config(session: str) -> ScrapeConfig:
+    """Render of the login form that fills in and submits the credentials"""
+    return ScrapeConfig(
         "https://www.linkedin.com/login",
         asp=True,
         country="US",
         render_js=True,
-        js=f"""
-        // Wait for login page to load
-        await new Promise(resolve => setTimeout(resolve, 3000));
+        js=ACCESS_GUARD_JS + f"""
+        // Wait until the login form is rendered (the guard would stop on the login page itself)
+        await {build_wait_expression(result_selectors=['#username'], empty_selectors=[], quiet_ms=300, max_ms=10000, guard=False)}
         
         // Fill in login credentials
         const emailField = document.querySelector('#username');
@@ -35,79 +38,73 @@ async def linkedin_login_and_scrape(target_url: str) -> Dict:
         if (emailField && passwordField && submitButton) {{
             emailField.value = '{os.environ.get("LINKEDIN_EMAIL", "")}';
             passwordField.value = '{os.environ.get("LINKEDIN_PASSWORD", "")}';
-            
-            // Wait a bit then submit
-            await new Promise(resolve => setTimeout(resolve, 1000));
             submitButton.click();
             
-            // Wait for redirect after login
-            await new Promise(resolve => setTimeout(resolve, 5000));
+            // A successful login navigates away and ends this script; a rejected one
+            // shows an inline error, which resolves the wait right away
+            await {build_wait_expression(result_selectors=LOGIN_ERROR_SELECTORS, empty_selectors=[], quiet_ms=300, max_ms=10000, guard=False)}
         }}
         """,
-        session="linkedin_login_session"
+        session=session
     )
+
+async def login_session(session: str) -> bool:
+    """Pool warm-up: log the session in once per session lifetime"""
+    print(f"🔑 Logging in session {session}...")
+    login_response = await SCRAPFLY.async_scrape(build_login_config(session))
+    print(f"✅ Login response: {login_response.status_code}")
+    # A failed login stays on the login form (or lands on a checkpoint)
+    return login_response.status_code == 200 and detect_access_block(login_response.content) is None
+
+# Logged-in sessions reused across target URLs; one by default since parallel
+# logins of the same account tend to trigger checkpoints
+LOGIN_POOL = SessionPool(
+    warm=login_session,
+    health_check=scrapfly_health_check(SCRAPFLY),
+    size=int(os.environ.get("LINKEDIN_LOGIN_POOL_SIZE", "1")),
+    prefix="linkedin_login_session"
+)
+
+async def linkedin_login_and_scrape(target_url: str, pool: SessionPool = None) -> Dict:
+    """Scrape Sales Navigator in a logged-in session leased from the pool"""
+    pool = pool or LOGIN_POOL
     
     try:
-        login_response = await SCRAPFLY.async_scrape(login_config)
-        print(f"✅ Login response: {login_response.status_code}")
-        
-        # Now try to access Sales Navigator with the same session
-        print("🎯 Step 2: Accessing Sales Navigator...")
+        async with pool.lease() as session:
+            result = await scrape_logged_in(target_url, session)
+            if result.get("access_blocked"):
+                pool.mark_unhealthy(session)
+            return result
+    except SessionWarmError as e:
+        print(f"❌ Login failed: {e}")
+        return {
+            "success": False,
+            "error": f"login failed: {e}",
+            "url": target_url
+        }
+
+async def scrape_logged_in(target_url: str, session: str) -> Dict:
+    """Scrape Sales Navigator in an already logged-in session"""
+    
+    try:
+        print(f"🎯 Accessing Sales Navigator in session {session}...")
         
         sales_nav_config = ScrapeConfig(
             target_url,
             asp=True,
             country="US", 
             render_js=True,
-            js="""
-            // Wait for Sales Navigator to load
-            new Promise((resolve) => {
-                const checkForContent = () => {
-                    // Check for search results
-                    const results = document.querySelectorAll('[data-x-search-result], .search-results__result-item, .result-lockup');
-                    if (results.length > 0) {
-                        console.log('Found search results!');
-                        resolve(true);
-                        return;
-                    }
-                    
-                    // Check for loading screen
-                    const loading = document.querySelector('.initial-loading-state');
-                    if (loading) {
-                        console.log('Still loading...');
-                        setTimeout(checkForContent, 3000);
-                        return;
-                    }
-                    
-                    // Check for any content
-                    const bodyText = document.body.innerText.toLowerCase();
-                    if (bodyText.includes('people') || bodyText.includes('results') || bodyText.includes('search')) {
-                        console.log('Found some search-related content');
-                        resolve(true);
-                        return;
-                    }
-                    
-                    setTimeout(checkForContent, 3000);
-                };
-                
-                setTimeout(checkForContent, 2000);
-                
-                // Max timeout
-                setTimeout(() => resolve(true), 20000);
-            });
-            """,
-            session="linkedin_login_session"  # Use same session
+            js=build_wait_script(max_ms=20000, harvest=True),
+            session=session  # Use the logged-in session
         )
         
         sales_response = await SCRAPFLY.async_scrape(sales_nav_config)
         
         print(f"📄 Sales Navigator response: {sales_response.status_code}")
         print(f"📊 Content size: {len(sales_response.content)} bytes")
-        
-        # Save the response for analysis
-        os.makedirs("tmp/debug", exist_ok=True)
-        with open("tmp/debug/sales_nav_after_login.html", "w", encoding="utf-8") as f:
-            f.write(sales_response.content)
+        render_wait = read_wait_report(sales_response)
+        if render_wait:
+            print(f"⏱️ Render wait: {render_wait.get('outcome')} after {render_wait.get('time_to_results_ms')} ms")
         
         # Analyze the content
         selector = sales_response.selector
@@ -148,7 +145,7 @@ async def linkedin_login_and_scrape(target_url: str) -> Dict:
         
         result = {
             "success": len(profiles) > 0,
-            "login_status": login_response.status_code,
+            "session": session,
             "sales_nav_status": sales_response.status_code,
             "title": title,
             "profiles": profiles,
@@ -156,9 +153,17 @@ async def linkedin_login_and_scrape(target_url: str) -> Dict:
             "has_search_results": len(search_results) > 0,
             "has_loading": len(loading_elements) > 0,
             "content_size": len(sales_response.content),
+            "render_wait": render_wait,
+            "access_blocked": detect_access_block(sales_response.content) is not None,
             "url": target_url
         }
         
+        # Save the response for analysis when nothing was found, and a sample of the rest
+        result["debug_capture"] = DEBUG_CAPTURE.capture(
+            "after_login", sales_response.content, meta={"url": target_url, "session": session, "title": title},
+            failed=is_failure(result)
+        )
+        
         return result
         
     except Exception as e:
@@ -189,12 +194,13 @@ async def test_sales_navigator_with_login():
     print(f"🎯 Target URL: {target_url}")
     
     result = await linkedin_login_and_scrape(target_url)
+    LOGIN_POOL.close()
     
-    # Save results
-    with open("tmp/sales_nav_login_results.json", "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    # Append the leads and the page record; earlier runs stay in the file
+    with NDJSONSink("tmp/sales_nav_login_results.ndjson") as sink:
+        sink.write_result(result)
     
-    print(f"\n💾 Results saved to tmp/sales_nav_login_results.json")
+    print(f"\n💾 Results appended to tmp/sales_nav_login_results.ndjson")
     
     # Print summary
     if result.get("success"):
@@ -17,14 +17,21 @@ Environment variables required:
 """
 
 import os
-import json
 import time
 import asyncio
 from typing import Dict, List, Optional
-from urllib.parse import urlencode, quote_plus, unquote
+from urllib.parse import urlencode, quote_plus
 from parsel import Selector
 from loguru import logger as log
 from scrapfly import ScrapeConfig, ScrapflyClient, ScrapeApiResponse
+from sales_nav_embedded_json import extract_embedded_leads
+from sales_nav_access_guard import ACCOUNT_BREAKER, access_failure, account_key, detect_access_block
+from sales_nav_concurrency import SCRAPFLY_LIMITER, limited_scrape
+from sales_nav_pipeline import parse_off_loop
+from sales_nav_html_trim import trimmed_selector
+from sales_nav_sink import NDJSONSink
+from sales_nav_identity import SEEN_LEADS, dedupe_leads
+from sales_nav_query import SalesNavQuery, canonical_url
 
 # Initialize ScrapFly client
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
@@ -53,23 +60,10 @@ BASE_CONFIG = {
 def extract_company_id_from_url(url: str) -> Optional[str]:
     """Extract company ID from Sales Navigator URL"""
     try:
-        # Decode URL and extract company ID from filters
-        decoded = unquote(url)
-        if "id%3A" in url:
-            # Extract from encoded URL
-            start = url.find("id%3A") + 5
-            end = url.find("%2C", start)
-            if end == -1:
-                end = url.find(")", start)
-            return url[start:end]
-        elif "id:" in decoded:
-            # Extract from decoded URL
-            start = decoded.find("id:") + 3
-            end = decoded.find(",", start)
-            if end == -1:
-                end = decoded.find(")", start)
-            return decoded[start:end]
-    except Exception as e:
+        # First included CURRENT_COMPANY value; organization URNs give their numeric ID
+        company_ids = SalesNavQuery.from_url(url).company_ids()
+        return company_ids[0] if company_ids else None
+    except ValueError as e:
         log.error(f"Failed to extract company ID from URL: {e}")
     return None
 
@@ -96,7 +90,7 @@ def build_linkedin_cookies() -> Dict[str, str]:
 
 def parse_sales_navigator_search(response: ScrapeApiResponse) -> Dict:
     """Parse Sales Navigator search results"""
-    selector = response.selector
+    selector, _ = trimmed_selector(response.content)
     results = []
     
     try:
@@ -125,14 +119,8 @@ def parse_sales_navigator_search(response: ScrapeApiResponse) -> Dict:
         if json_results:
             results.extend(json_results)
         
-        # Remove duplicates based on name
-        seen_names = set()
-        unique_results = []
-        for result in results:
-            name = result.get("name", "").strip()
-            if name and name not in seen_names:
-                seen_names.add(name)
-                unique_results.append(result)
+        # Remove duplicates by member URN / profile token / public ID, else by name
+        unique_results = dedupe_leads(results)
         
         return {
             "results": unique_results,
@@ -208,26 +196,25 @@ def extract_profile_from_result(result_element, idx: int) -> Optional[Dict]:
     return None
 
 def extract_from_json_data(selector: Selector) -> List[Dict]:
-    """Try to extract data from JSON embedded in the page"""
+    """Extract profiles from the JSON data blocks embedded in the page"""
     results = []
     
     try:
-        # Look for JSON data in script tags
-        scripts = selector.css("script::text").getall()
+        for idx, lead in enumerate(extract_embedded_leads(selector)):
+            results.append({
+                "name": lead["name"],
+                "title": lead["title"],
+                "company": lead["company"],
+                "location": lead["location"],
+                "profile_url": lead["profile_url"],
+                "member_urn": lead["member_urn"],
+                "public_identifier": lead["public_identifier"],
+                "result_index": idx,
+                "source": "embedded_json"
+            })
         
-        for script in scripts:
-            if "searchResults" in script or "people" in script:
-                try:
-                    # Try to extract JSON data
-                    start = script.find("{")
-                    end = script.rfind("}") + 1
-                    if start != -1 and end > start:
-                        json_data = json.loads(script[start:end])
-                        # Process JSON data to extract profiles
-                        # This would need to be adapted based on the actual JSON structure
-                        log.info("Found JSON data in script, but parsing not implemented yet")
-                except:
-                    continue
+        if results:
+            log.info(f"Found {len(results)} profiles in embedded JSON data")
     
     except Exception as e:
         log.debug(f"Failed to extract from JSON data: {e}")
@@ -239,6 +226,13 @@ async def scrape_sales_navigator_url(url: str) -> Dict:
     try:
         # Build cookies for authentication
         cookies = build_linkedin_cookies()
+        account = account_key(cookies)
+        
+        # Fail fast while this account's circuit is open
+        blocked = ACCOUNT_BREAKER.blocked_state(account)
+        if blocked:
+            log.warning(f"Skipping {url}: circuit open for account {account} ({blocked.value})")
+            return access_failure(url, blocked, account, from_circuit=True)
         
         # Create scrape configuration
         config = ScrapeConfig(
@@ -251,20 +245,33 @@ async def scrape_sales_navigator_url(url: str) -> Dict:
         log.info(f"Using cookies: {list(cookies.keys())}")
         
         # Perform the scrape
-        response = await SCRAPFLY.async_scrape(config)
+        response = await limited_scrape(SCRAPFLY, config)
+        SCRAPFLY_LIMITER.save()
         
-        # Parse the results
-        parsed_data = parse_sales_navigator_search(response)
+        # Don't run the extractors over a login wall or upsell page
+        blocked = detect_access_block(response.content)
+        if blocked:
+            log.error(f"Access blocked ({blocked.value}), skipping extraction")
+            ACCOUNT_BREAKER.open(account, blocked, url)
+            ACCOUNT_BREAKER.save()
+            return access_failure(url, blocked, account)
+        
+        # Parse the results in the process pool so concurrent scrapes keep fetching
+        parsed_data = await parse_off_loop(parse_sales_navigator_search, response)
         
         # Add metadata
         parsed_data.update({
             "scraped_at": time.time(),
             "company_id": extract_company_id_from_url(url),
+            # Same search, any session: the key for caching and deduping searches
+            "canonical_url": canonical_url(url),
             "response_status": response.status_code,
             "response_size": len(response.content)
         })
+        # Marked here, not in the parse worker, so the seen-set stays in this process
+        parsed_data["new_leads"] = SEEN_LEADS.mark(parsed_data["results"])
         
-        log.success(f"Successfully scraped {parsed_data['total_found']} profiles")
+        log.success(f"Successfully scraped {parsed_data['total_found']} profiles ({parsed_data['new_leads']} new)")
         return parsed_data
         
     except Exception as e:
@@ -299,13 +306,13 @@ async def test_sales_navigator_scraper():
     result = await scrape_sales_navigator_url(test_url)
     
     # Save results
-    output_file = "tmp/sales_navigator_results.json"
-    os.makedirs("tmp", exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    output_file = "tmp/sales_navigator_results.ndjson"
+    with NDJSONSink(output_file) as sink:
+        sink.write_result(result)
+    # Only once the leads are on disk: a lead remembered as seen is skipped by later loads
+    SEEN_LEADS.save()
     
-    log.info(f"Results saved to: {output_file}")
+    log.info(f"Results appended to: {output_file}")
     
     # Print summary
     if result["success"]:
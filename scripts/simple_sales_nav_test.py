@@ -6,6 +6,9 @@ Simple Sales Navigator test - try basic URLs first
 import os
 import asyncio
 from scrapfly import ScrapeConfig, ScrapflyClient
+from sales_nav_page_state import classify_page
+from sales_nav_render_wait import build_wait_script, read_wait_report
+from sales_nav_debug_capture import DEBUG_CAPTURE
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
 
@@ -31,31 +34,26 @@ async def test_simple_urls():
                 asp=True,
                 country="US",
                 render_js=True,
-                js="""
-                // Simple wait for page load
-                new Promise(resolve => {
-                    setTimeout(() => {
-                        console.log('Page loaded, checking content...');
-                        resolve(true);
-                    }, 8000);
-                });
-                """
+                js=build_wait_script(result_selectors=[], max_ms=8000)
             )
             
             response = await SCRAPFLY.async_scrape(config)
             
             title = response.selector.css("title::text").get() or "No title"
-            content = response.content.lower()
+            page = classify_page(response.content)
             
             # Check for key indicators
-            has_loading = "loading" in content or "initial-load" in content
-            has_login_prompt = "sign in" in content or "login" in content
-            has_sales_nav = "sales navigator" in content
-            has_subscription_prompt = "upgrade" in content or "premium" in content
-            has_search_results = "search" in content and "results" in content
+            has_loading = page.has("loading") or page.has("loading_hint")
+            has_login_prompt = page.has("login") or page.has("login_hint")
+            has_sales_nav = page.has("sales_nav")
+            has_subscription_prompt = page.has("upsell") or page.has("upsell_hint")
+            has_search_results = page.has("results")
             
             print(f"  Status: {response.status_code}")
             print(f"  Title: {title}")
+            render_wait = read_wait_report(response) or {}
+            print(f"  Render Wait: {render_wait.get('outcome', 'n/a')} after {render_wait.get('time_to_results_ms', '?')} ms")
+            print(f"  Page State: {page.state.value} ({page.elapsed_ms:.2f} ms)")
             print(f"  Has Loading: {has_loading}")
             print(f"  Has Login Prompt: {has_login_prompt}")
             print(f"  Has Sales Nav Content: {has_sales_nav}")
@@ -63,15 +61,13 @@ async def test_simple_urls():
             print(f"  Has Search Results: {has_search_results}")
             print(f"  Content Size: {len(response.content)} bytes")
             
-            # Save content for this URL
-            filename = url.replace("https://", "").replace("/", "_") + ".html"
-            with open(f"tmp/debug/{filename}", "w", encoding="utf-8") as f:
-                f.write(response.content)
-            print(f"  Saved to: tmp/debug/{filename}")
+            # Save content for this URL; this is a diagnostic run, so always
+            name = url.replace("https://", "").replace("/", "_")
+            path = DEBUG_CAPTURE.capture(name, response.content, meta={"url": url, "page_state": page.state.value}, force=True)
+            print(f"  Saved to: {path}")
             
         except Exception as e:
             print(f"  ❌ Error: {e}")
 
 if __name__ == "__main__":
-    os.makedirs("tmp/debug", exist_ok=True)
     asyncio.run(test_simple_urls())
\ No newline at end of file
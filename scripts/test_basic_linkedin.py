@@ -8,10 +8,16 @@ import os
 import json
 import asyncio
 from typing import Dict, List
-from scrapfly import ScrapeConfig, ScrapflyClient
+from scrapfly import ScrapflyClient
 from parsel import Selector
+from sales_nav_fetch_tiers import FETCH_TIER_STATS, tiered_pipeline
+from sales_nav_fetch_backends import FetchBackend, ScrapflyBackend, plain_tier_backend
+from sales_nav_concurrency import SCRAPFLY_LIMITER
+from sales_nav_hedging import RENDER_HEDGER
+from sales_nav_sink import NDJSONSink
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
+SCRAPFLY_BACKEND = ScrapflyBackend(SCRAPFLY, limiter=SCRAPFLY_LIMITER)
 
 # Base configuration based on ScrapFly LinkedIn scraper
 BASE_CONFIG = {
@@ -24,6 +30,11 @@ BASE_CONFIG = {
     "proxy_pool": "public_residential_pool"
 }
 
+RESULTS_PATH = "tmp/basic_linkedin_test.ndjson"
+
+# Per-stage pipeline reports of the last profile / company scrape
+PIPELINE_REPORTS: Dict[str, Dict] = {}
+
 def parse_profile(response) -> Dict:
     """Parse LinkedIn profile page - based on ScrapFly example"""
     selector = response.selector
@@ -129,37 +140,61 @@ def parse_company(response) -> Dict:
             "url": str(response.context["url"])
         }
 
-async def scrape_profiles(urls: List[str]) -> List[Dict]:
-    """Scrape LinkedIn profile pages"""
-    to_scrape = [ScrapeConfig(url, **BASE_CONFIG) for url in urls]
-    data = []
-    
-    async for response in SCRAPFLY.concurrent_scrape(to_scrape):
-        try:
-            profile_data = parse_profile(response)
-            data.append(profile_data)
-            print(f"✅ Profile: {profile_data.get('name', 'Unknown')} - {profile_data.get('title', 'No title')}")
-        except Exception as e:
-            print(f"❌ Failed to parse profile: {e}")
-            data.append({"success": False, "error": str(e)})
-    
-    return data
+def _counter() -> Dict[str, int]:
+    return {"successful": 0, "total": 0, "escalations": 0}
+
+def _count(counts: Dict[str, int], result: Dict) -> str:
+    """Tally a streamed result; returns the tier it was fetched at"""
+    counts["total"] += 1
+    counts["successful"] += bool(result.get("success"))
+    counts["escalations"] += bool(result["fetch_tier"].get("escalated"))
+    return result["fetch_tier"].get("tier", "failed")
 
-async def scrape_companies(urls: List[str]) -> List[Dict]:
-    """Scrape LinkedIn company pages"""
-    to_scrape = [ScrapeConfig(url, **BASE_CONFIG) for url in urls]
-    data = []
+async def scrape_profiles(urls: List[str], sink: NDJSONSink, plain_backend: FetchBackend) -> Dict[str, int]:
+    """Scrape LinkedIn profile pages, parsing off the event loop and rendering JS only when needed;
+    each profile is written to the sink as soon as it is parsed"""
+    counts = _counter()
+
+    def emit(job, profile_data: Dict) -> None:
+        tier = _count(counts, profile_data)
+        sink.write("profile", profile_data)
+        if profile_data.get("success"):
+            print(f"✅ Profile ({tier}): {profile_data.get('name', 'Unknown')} - {profile_data.get('title', 'No title')}")
+        else:
+            print(f"❌ Failed to parse profile: {profile_data.get('error', 'no data')}")
+
+    pipeline = tiered_pipeline(SCRAPFLY_BACKEND, parse_profile, BASE_CONFIG, sink=emit, keep_results=False,
+                               plain_backend=plain_backend)
+    await pipeline.run(urls)
+    PIPELINE_REPORTS["profiles"] = pipeline.report()
     
-    async for response in SCRAPFLY.concurrent_scrape(to_scrape):
-        try:
-            company_data = parse_company(response)
-            data.append(company_data)
-            print(f"✅ Company: {company_data.get('name', 'Unknown')} - {company_data.get('description', 'No description')[:50]}...")
-        except Exception as e:
-            print(f"❌ Failed to parse company: {e}")
-            data.append({"success": False, "error": str(e)})
+    pipeline.print_report()
+    FETCH_TIER_STATS.save()
+    SCRAPFLY_LIMITER.save()
+    return counts
+
+async def scrape_companies(urls: List[str], sink: NDJSONSink, plain_backend: FetchBackend) -> Dict[str, int]:
+    """Scrape LinkedIn company pages, parsing off the event loop and rendering JS only when needed;
+    each company is written to the sink as soon as it is parsed"""
+    counts = _counter()
+
+    def emit(job, company_data: Dict) -> None:
+        tier = _count(counts, company_data)
+        sink.write("company", company_data)
+        if company_data.get("success"):
+            print(f"✅ Company ({tier}): {company_data.get('name', 'Unknown')} - {company_data.get('description', 'No description')[:50]}...")
+        else:
+            print(f"❌ Failed to parse company: {company_data.get('error', 'no data')}")
+
+    pipeline = tiered_pipeline(SCRAPFLY_BACKEND, parse_company, BASE_CONFIG, sink=emit, keep_results=False,
+                               plain_backend=plain_backend)
+    await pipeline.run(urls)
+    PIPELINE_REPORTS["companies"] = pipeline.report()
     
-    return data
+    pipeline.print_report()
+    FETCH_TIER_STATS.save()
+    SCRAPFLY_LIMITER.save()
+    return counts
 
 async def test_basic_linkedin_scraping():
     """Test basic LinkedIn scraping functionality"""
@@ -178,48 +213,55 @@ async def test_basic_linkedin_scraping():
         "https://www.linkedin.com/in/satyanadella",   # Satya Nadella - should be public
     ]
     
-    profile_results = await scrape_profiles(profile_urls)
+    # FETCH_BACKEND=http fetches the plain tier without Scrapfly
+    plain_backend = plain_tier_backend(SCRAPFLY_BACKEND)
+    print(f"🔌 Plain tier via {plain_backend.name}")
     
-    # Test company scraping  
-    print("\n🏢 Testing Company Scraping:")
-    company_urls = [
-        "https://linkedin.com/company/microsoft",
-        "https://linkedin.com/company/google"
-    ]
-    
-    company_results = await scrape_companies(company_urls)
-    
-    # Save results
-    os.makedirs("tmp", exist_ok=True)
-    
-    results = {
-        "profiles": profile_results,
-        "companies": company_results,
-        "summary": {
-            "successful_profiles": sum(1 for p in profile_results if p.get("success")),
-            "total_profiles": len(profile_results),
-            "successful_companies": sum(1 for c in company_results if c.get("success")),
-            "total_companies": len(company_results)
+    # Records are appended as they are parsed; tail the file to follow the run
+    with NDJSONSink(RESULTS_PATH) as sink:
+        profile_counts = await scrape_profiles(profile_urls, sink, plain_backend)
+        
+        # Test company scraping  
+        print("\n🏢 Testing Company Scraping:")
+        company_urls = [
+            "https://linkedin.com/company/microsoft",
+            "https://linkedin.com/company/google"
+        ]
+        
+        company_counts = await scrape_companies(company_urls, sink, plain_backend)
+        await plain_backend.close()
+        
+        # Let losing hedge attempts finish so the hedging report has every primary's latency
+        await RENDER_HEDGER.drain()
+        
+        summary = {
+            "successful_profiles": profile_counts["successful"],
+            "total_profiles": profile_counts["total"],
+            "successful_companies": company_counts["successful"],
+            "total_companies": company_counts["total"],
+            "escalations": profile_counts["escalations"] + company_counts["escalations"],
+            "fetch_tiers": FETCH_TIER_STATS.summary(),
+            "pipeline": PIPELINE_REPORTS,
+            "concurrency": SCRAPFLY_LIMITER.metrics(),
+            "hedging": RENDER_HEDGER.report()
         }
-    }
-    
-    with open("tmp/basic_linkedin_test.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+        sink.write("summary", summary)
     
-    print(f"\n💾 Results saved to tmp/basic_linkedin_test.json")
+    print(f"\n💾 Results streamed to {RESULTS_PATH}")
     
     # Print summary
     print(f"\n📊 SUMMARY:")
-    print(f"✅ Profiles: {results['summary']['successful_profiles']}/{results['summary']['total_profiles']}")
-    print(f"✅ Companies: {results['summary']['successful_companies']}/{results['summary']['total_companies']}")
+    print(f"✅ Profiles: {summary['successful_profiles']}/{summary['total_profiles']}")
+    print(f"✅ Companies: {summary['successful_companies']}/{summary['total_companies']}")
+    print(f"🎚️ Concurrency limit: {SCRAPFLY_LIMITER.limit} (peak in flight {SCRAPFLY_LIMITER.peak_in_flight})")
     
-    if results['summary']['successful_profiles'] > 0 or results['summary']['successful_companies'] > 0:
+    if summary['successful_profiles'] > 0 or summary['successful_companies'] > 0:
         print(f"\n🎉 Basic LinkedIn scraping is WORKING!")
         print(f"Now we can proceed to Sales Navigator with confidence.")
     else:
         print(f"\n⚠️ Basic LinkedIn scraping failed - need to fix setup first")
     
-    return results
+    return summary
 
 if __name__ == "__main__":
     asyncio.run(test_basic_linkedin_scraping())
\ No newline at end of file
@@ -4,9 +4,10 @@ Test LinkedIn access to verify authentication and subscription status
 """
 
 import os
-import json
 import asyncio
 from scrapfly import ScrapeConfig, ScrapflyClient
+from sales_nav_page_state import PageState, classify_page
+from sales_nav_sink import NDJSONSink
 
 SCRAPFLY = ScrapflyClient(key=os.environ.get("SCRAPFLY_API_KEY"))
 
@@ -41,6 +42,8 @@ async def test_linkedin_access():
     ]
     
     results = []
+    # Each check is appended as soon as it completes
+    sink = NDJSONSink("tmp/linkedin_access_test.ndjson")
     
     for test in test_urls:
         print(f"\n🔍 Testing: {test['name']}")
@@ -59,19 +62,20 @@ async def test_linkedin_access():
             response = await SCRAPFLY.async_scrape(config)
             
             title = response.selector.css("title::text").get() or "No title"
-            body_text = response.content[:1000].lower()
+            page = classify_page(response.content)
             
             # Check for various indicators
-            is_authenticated = "sign in" not in body_text and "sign up" not in body_text
-            has_sales_nav = "sales navigator" in body_text
-            has_premium = "premium" in body_text
-            has_error = "error" in body_text or "not found" in body_text
+            is_authenticated = page.state not in (PageState.LOGIN_WALL, PageState.CHALLENGE)
+            has_sales_nav = page.has("sales_nav")
+            has_premium = page.has("upsell") or page.has("upsell_hint")
+            has_error = page.has("error") or page.has("access_denied")
             
             result = {
                 "name": test['name'],
                 "url": test['url'],
                 "status_code": response.status_code,
                 "title": title,
+                "page_state": page.state.value,
                 "is_authenticated": is_authenticated,
                 "has_sales_nav_content": has_sales_nav,
                 "has_premium_content": has_premium,
@@ -80,9 +84,11 @@ async def test_linkedin_access():
             }
             
             results.append(result)
+            sink.write("access_check", result)
             
             print(f"✅ Status: {response.status_code}")
             print(f"📄 Title: {title}")
+            print(f"🧭 Page State: {page.state.value}")
             print(f"🔐 Authenticated: {is_authenticated}")
             print(f"💼 Sales Nav Content: {has_sales_nav}")
             print(f"⭐ Premium Content: {has_premium}")
@@ -95,13 +101,10 @@ async def test_linkedin_access():
                 "url": test['url'],
                 "error": str(e)
             })
+            sink.write("access_check", results[-1])
     
-    # Save results
-    os.makedirs("tmp", exist_ok=True)
-    with open("tmp/linkedin_access_test.json", "w") as f:
-        json.dump(results, f, indent=2)
-    
-    print(f"\n💾 Results saved to tmp/linkedin_access_test.json")
+    sink.close()
+    print(f"\n💾 Results appended to tmp/linkedin_access_test.ndjson")
     
     # Summary
     print(f"\n📊 SUMMARY:")
@@ -0,0 +1,26 @@
+"""
+Shared setup for the scraper script tests
+
+The scripts import each other by bare module name (they are run from
+scripts/), so the tests put scripts/ on the path the same way.
+
+Usage:
+    python -m pytest -q scripts/tests
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+def result_cards(count: int = 25) -> str:
+    """Sales Navigator result list markup with `count` lead cards"""
+    cards = "".join(
+        f'<li class="artdeco-list__item" data-x-search-result="LEAD">'
+        f'<a href="/sales/lead/ACwAAA{i:08d}x,NAME_SEARCH"><span data-anonymize="person-name">Person {i}</span></a>'
+        f'</li>'
+        for i in range(count)
+    )
+    return f'<ol class="artdeco-list">{cards}</ol>'
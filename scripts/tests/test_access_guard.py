@@ -0,0 +1,32 @@
+from conftest import result_cards
+from sales_nav_access_guard import PAGE_STATE_ATTR, AccountCircuitBreaker, detect_access_block
+from sales_nav_page_state import PageState
+
+RECAPTCHA = '<script src="https://www.google.com/recaptcha/api.js"></script>'
+
+def test_result_cards_with_recaptcha_are_not_blocked():
+    html = f"<html><head>{RECAPTCHA}</head><body>{result_cards()}</body></html>"
+    assert detect_access_block(html) is None
+
+def test_result_cards_with_login_link_and_upsell_banner_are_not_blocked():
+    html = (f"<html><body><div>Start your free trial</div>{result_cards()}"
+            f'<a href="/uas/login?session_redirect=%2Fsales">Sign in</a></body></html>')
+    assert detect_access_block(html) is None
+
+def test_login_wall_without_results_is_blocked():
+    html = f'<html><head>{RECAPTCHA}</head><body><form class="login-form"><input name="session_key"></form></body></html>'
+    assert detect_access_block(html) == PageState.LOGIN_WALL
+
+def test_guard_marker_is_trusted():
+    html = f'<html {PAGE_STATE_ATTR}="challenge"><body></body></html>'
+    assert detect_access_block(html) == PageState.CHALLENGE
+
+def test_circuit_opens_and_expires(tmp_path):
+    breaker = AccountCircuitBreaker(path=str(tmp_path / "circuits.json"))
+    breaker.open("acct", PageState.CHALLENGE, url="https://www.linkedin.com/sales/search/people")
+    assert breaker.blocked_state("acct") == PageState.CHALLENGE
+
+    breaker.save()
+    reloaded = AccountCircuitBreaker.load(breaker.path)
+    reloaded.circuits["acct"]["until"] = 0
+    assert reloaded.blocked_state("acct") is None
@@ -0,0 +1,29 @@
+import pytest
+from parsel import Selector
+
+from conftest import result_cards
+from sales_nav_compiled_extractor import CompiledProfileExtractor
+from sales_nav_selector_stats import SelectorStats
+from sales_navigator_advanced import extract_profiles_comprehensive
+
+LOCKUP_CARD = (
+    '<li class="search-results__result-item"><div class="result-lockup">'
+    '<span data-anonymize="person-name"><span>Person {i}</span></span>'
+    '<span data-anonymize="person-title">Engineer</span>'
+    '<span data-anonymize="company-name">Acme</span>'
+    '<span data-anonymize="person-location">Berlin</span>'
+    '<a href="/sales/lead/ACwAAA{i:08d},NAME_SEARCH">profile</a></div></li>'
+)
+
+PAGES = {
+    "artdeco cards": result_cards(5),
+    "lockup cards": "<ol>" + "".join(LOCKUP_CARD.format(i=i) for i in range(5)) + "</ol>",
+    "no containers": '<div><a href="/in/ada-lovelace">Ada Lovelace</a></div>',
+}
+
+@pytest.mark.parametrize("body", PAGES.values(), ids=PAGES.keys())
+def test_compiled_matches_the_parsel_cascade(body):
+    selector = Selector(f"<html><body>{body}</body></html>")
+    cascade = extract_profiles_comprehensive(selector, SelectorStats(path=None))
+    compiled = CompiledProfileExtractor(stats=SelectorStats(path=None)).extract(selector)
+    assert cascade and compiled == cascade
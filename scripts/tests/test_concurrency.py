@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from scrapfly.errors import QuotaLimitReached, TooManyConcurrentRequest
+
+from sales_nav_concurrency import ERROR, NEUTRAL, SUCCESS, THROTTLE, AIMDLimiter, classify_error
+
+def test_successes_raise_the_limit_additively():
+    limiter = AIMDLimiter(initial=2, max_limit=32, path=None)
+    for _ in range(5):
+        limiter.record(SUCCESS, time.monotonic())
+    # +1 per window of `limit` successes: 2 -> ~3.9 after five
+    assert limiter.limit == 3
+
+def test_burst_of_throttles_cuts_once():
+    limiter = AIMDLimiter(initial=8, path=None)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.record(THROTTLE, started)
+    assert limiter.limit == 4
+    assert limiter.decisions["decrease"] == 1
+    assert limiter.decisions["suppressed"] == 4
+
+def test_limit_stays_within_bounds():
+    limiter = AIMDLimiter(initial=2, min_limit=2, max_limit=3, path=None)
+    for _ in range(3):
+        limiter.record(ERROR, time.monotonic() + 1)
+    assert limiter.limit == 2
+    for _ in range(50):
+        limiter.record(SUCCESS, time.monotonic())
+    assert limiter.limit == 3
+
+def scrapfly_error(cls, code: str, status: int):
+    return cls(request=None, message=code, code=code, http_status_code=status)
+
+def test_error_classification():
+    assert classify_error(scrapfly_error(TooManyConcurrentRequest, "ERR::SCRAPE::TOO_MANY_CONCURRENT_REQUEST", 429)) == THROTTLE
+    assert classify_error(scrapfly_error(QuotaLimitReached, "ERR::ACCOUNT::QUOTA_LIMIT_REACHED", 429)) == NEUTRAL
+    assert classify_error(asyncio.TimeoutError()) == ERROR
+    assert classify_error(ValueError("bad config")) == NEUTRAL
+
+def test_acquire_caps_calls_in_flight():
+    limiter = AIMDLimiter(initial=2, max_limit=2, path=None)
+
+    async def call():
+        async with limiter.acquire():
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert limiter.peak_in_flight == 2
+    assert limiter.in_flight == 0
+    assert limiter.signals[SUCCESS] == 6
@@ -0,0 +1,64 @@
+import time
+
+from parsel import Selector
+
+from sales_nav_compiled_extractor import CompiledProfileExtractor
+from sales_nav_selector_stats import SelectorStats
+from sales_nav_working import extract_from_containers
+from sales_navigator_advanced import extract_profiles_comprehensive
+
+def card(tag_class: str, i: int, prefix: str = "Person") -> str:
+    return f'<li class="{tag_class}"><h3><a href="/sales/people/ACwAAA{prefix}{i:04d},NAME">{prefix} {i}</a></h3></li>'
+
+def page(sidebar: str, results: str) -> Selector:
+    return Selector(f"<html><body><aside>{sidebar}</aside><main>{results}</main></body></html>")
+
+def stats_preferring(chain: str, container: str) -> SelectorStats:
+    stats = SelectorStats(path=None)
+    for _ in range(5):
+        stats.record(chain, container, True)
+    stats.finish_run()
+    return stats
+
+# A generic selector that won on earlier pages now only matches a two-lead sidebar
+ADVANCED_PAGE = page(
+    "<ul>" + "".join(card("artdeco-list__item", i, "Side") for i in range(2)) + "</ul>",
+    "<ol>" + "".join(card("search-results__result-item", i) for i in range(25)) + "</ol>",
+)
+
+def test_partial_generic_match_does_not_stop_the_scan():
+    stats = stats_preferring("advanced.container", ".artdeco-list__item")
+    assert stats.ordered("advanced.container", [".result-lockup", ".artdeco-list__item"])[0] == ".artdeco-list__item"
+
+    profiles = extract_profiles_comprehensive(ADVANCED_PAGE, stats=stats)
+
+    names = {p["name"] for p in profiles}
+    assert {f"Person {i}" for i in range(25)} <= names
+    # The sidebar selector is credited with a miss, the result-card selector with the hit
+    entries = stats.chains["advanced.container"]
+    assert entries[".search-results__result-item"]["last_hit_run"] is not None
+    assert entries[".artdeco-list__item"]["last_hit_run"] == 0
+
+def test_compiled_extractor_scans_the_same_way():
+    stats = stats_preferring("advanced.container", ".artdeco-list__item")
+    profiles = CompiledProfileExtractor(stats=stats).extract(ADVANCED_PAGE)
+    assert len([p for p in profiles if p["name"].startswith("Person")]) == 25
+
+def test_full_page_from_first_selector_stops_the_scan():
+    full = page("", "<ol>" + "".join(card("artdeco-list__item", i) for i in range(25)) + "</ol>")
+    stats = stats_preferring("advanced.container", ".artdeco-list__item")
+
+    assert len(extract_profiles_comprehensive(full, stats=stats)) == 25
+    assert list(stats.chains["advanced.container"]) == [".artdeco-list__item"]
+
+def test_working_container_tier_keeps_scanning_past_a_sidebar():
+    stats = stats_preferring("working.container", ".artdeco-list li")
+    selector = page(
+        '<ul class="artdeco-list">' + "".join(card("", i, "Side") for i in range(2)) + "</ul>",
+        "<ol>" + "".join(card("result-lockup", i) for i in range(25)) + "</ol>",
+    )
+
+    profiles, complete = extract_from_containers(selector, stats, deadline=time.thread_time() + 10)
+
+    assert {f"Person {i}" for i in range(25)} <= {p["name"] for p in profiles}
+    assert complete
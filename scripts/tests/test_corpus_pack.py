@@ -0,0 +1,39 @@
+import os
+
+from sales_nav_corpus_pack import PackReader, PackWriter
+
+PAGES = {f"page_{i:03d}": f"<html><body>Page {i} æøå {'x' * i * 100}</body></html>" for i in range(5)}
+
+def write_pack(path):
+    with PackWriter(path) as pack:
+        for key, html in PAGES.items():
+            pack.append(key, html, {"url": f"https://www.linkedin.com/sales/search/people?page={key}"})
+
+def test_random_access_and_iteration(tmp_path):
+    path = str(tmp_path / "corpus.pack")
+    write_pack(path)
+
+    reader = PackReader(path)
+    assert len(reader) == 5
+    assert reader.get("page_003") == PAGES["page_003"]
+    assert reader.meta("page_001")["url"].endswith("page=page_001")
+    assert [(key, html) for key, _, html in reader.iter_records()] == list(PAGES.items())
+    reader.close()
+
+def test_missing_index_and_torn_tail_are_recovered(tmp_path):
+    path = str(tmp_path / "corpus.pack")
+    write_pack(path)
+    os.remove(f"{path}.idx")
+    with open(path, "ab") as f:
+        f.write(b"\x00partial record")
+
+    reader = PackReader(path)
+    assert reader.keys() == list(PAGES)
+    reader.close()
+
+    # The next writer drops the torn record and keeps appending
+    with PackWriter(path) as pack:
+        pack.append("page_005", "<html>five</html>")
+    reader = PackReader(path)
+    assert reader.get("page_005") == "<html>five</html>" and len(reader) == 6
+    reader.close()
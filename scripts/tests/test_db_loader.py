@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from sales_nav_db_loader import LeadLoader, normalize_profile_url
+
+@pytest.mark.parametrize("url, expected", [
+    ("linkedin.com/in/kari-nordmann/", "https://www.linkedin.com/in/kari-nordmann"),
+    ("http://www.linkedin.com/in/kari-nordmann?trk=search#top", "https://www.linkedin.com/in/kari-nordmann"),
+    ("  https://www.linkedin.com/sales/lead/ACwAAA0000000000000001,NAME_SEARCH,x1  ",
+     "https://www.linkedin.com/sales/lead/ACwAAA0000000000000001"),
+    ("https://no.linkedin.com/in/kari-nordmann", "https://no.linkedin.com/in/kari-nordmann"),
+    ("https://example.com/in/kari-nordmann", None),
+    ("", None),
+    (None, None),
+])
+def test_normalize_matches_person_normalize_linkedin_url(url, expected):
+    assert normalize_profile_url(url) == expected
+
+def people(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return {row["profile_url"]: dict(row) for row in conn.execute("SELECT * FROM people")}
+    finally:
+        conn.close()
+
+def test_upsert_last_lead_wins_and_missing_fields_keep_existing_values(tmp_path):
+    path = str(tmp_path / "leads.sqlite3")
+    search = "https://www.linkedin.com/sales/search/people?query=(keywords%3Acto)&sessionId=abc"
+
+    with LeadLoader(f"sqlite:///{path}", import_tag="first") as loader:
+        loader.write_leads([
+            {"name": "Kari Nordmann", "title": "CTO", "location": "Oslo", "profile_url": "https://linkedin.com/in/kari-nordmann/"},
+            {"name": "Ola Hansen", "title": "CEO", "profile_url": "https://www.linkedin.com/in/ola-hansen"},
+            {"name": "No Url"},
+        ], search_url=search)
+    rows = people(path)
+    assert set(rows) == {"https://www.linkedin.com/in/kari-nordmann", "https://www.linkedin.com/in/ola-hansen"}
+    assert rows["https://www.linkedin.com/in/kari-nordmann"]["query"] == \
+        "https://www.linkedin.com/sales/search/people?query=(keywords%3Acto)"
+
+    with LeadLoader(f"sqlite:///{path}", import_tag="second") as loader:
+        # Same person under two URL forms in one batch: the later lead wins
+        loader.write_leads([
+            {"name": "Kari Nordmann", "title": "VP Engineering", "profile_url": "http://www.linkedin.com/in/kari-nordmann?trk=x"},
+            {"name": "Kari Nordmann", "title": "CTO, Acme", "profile_url": "https://www.linkedin.com/in/kari-nordmann"},
+            {"name": "Ola Hansen", "profile_url": "https://www.linkedin.com/in/ola-hansen/", "known_lead": True},
+        ])
+    rows = people(path)
+    assert len(rows) == 2
+    kari = rows["https://www.linkedin.com/in/kari-nordmann"]
+    assert kari["title"] == "CTO, Acme"
+    # Not in the new leads: COALESCE keeps what was stored
+    assert kari["location"] == "Oslo"
+    assert kari["query"] == "https://www.linkedin.com/sales/search/people?query=(keywords%3Acto)"
+    assert kari["import_tag"] == "second"
+    # Known leads are skipped by default
+    assert rows["https://www.linkedin.com/in/ola-hansen"]["import_tag"] == "first"
@@ -0,0 +1,22 @@
+import html
+import json
+
+from sales_nav_embedded_json import extract_embedded_leads_from_html
+
+def test_records_of_one_person_merge_and_bad_blocks_are_skipped():
+    payload = {"included": [
+        {"entityUrn": "urn:li:fs_salesProfile:(ACwAAA0000000000000001,NAME_SEARCH,abc)",
+         "firstName": "Kari", "lastName": "Nordmann"},
+        {"entityUrn": "urn:li:fs_miniProfile:ACwAAA0000000000000001",
+         "firstName": "Kari", "lastName": "Nordmann", "publicIdentifier": "kari-nordmann", "occupation": "CTO at Acme"},
+    ]}
+    page = (f'<html><code style="display: none">{html.escape(json.dumps(payload))}</code>'
+            f'<code>{{not json, firstName</code></html>')
+
+    leads = extract_embedded_leads_from_html(page)
+
+    assert len(leads) == 1
+    assert leads[0]["name"] == "Kari Nordmann"
+    assert leads[0]["title"] == "CTO at Acme"
+    assert leads[0]["public_identifier"] == "kari-nordmann"
+    assert leads[0]["profile_id"] == "ACwAAA0000000000000001"
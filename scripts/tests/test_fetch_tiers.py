@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sales_nav_concurrency import AIMDLimiter
+from sales_nav_fetch_backends import FetchBackend, FetchResponse
+from sales_nav_fetch_tiers import PLAIN, RENDER, TierStats, fetch_tiered, tiered_pipeline
+from sales_nav_hedging import Hedger
+from sales_nav_response import PageResponse
+
+class FakeClient:
+    def __init__(self):
+        self.async_executor = ThreadPoolExecutor(max_workers=1)
+        self.configs = []
+
+    async def async_scrape(self, config):
+        self.configs.append(config)
+        response = PageResponse("<html>rendered</html>" if config.render_js else "<html></html>", url=config.url)
+        response.headers, response.scrape_result = {}, {}
+        return response
+
+class FakeBackend(FetchBackend):
+    name = "fake"
+
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = []
+
+    async def fetch(self, url, **options):
+        self.calls.append(options)
+        return FetchResponse(self.content, url=url, status_code=200, backend=self.name, elapsed_ms=1.0)
+
+def parse(response):
+    return {"success": "rendered" in response.content, "url": response.url}
+
+def test_fetch_tiered_goes_through_limiter_and_hedger():
+    client = FakeClient()
+    limiter = AIMDLimiter(path=None)
+    hedger = Hedger(path=None)
+    stats = TierStats(path=None)
+
+    parsed, info = asyncio.run(fetch_tiered(client, "https://www.linkedin.com/company/example", parse, {},
+                                            stats=stats, limiter=limiter, hedger=hedger))
+
+    assert parsed["success"] is True
+    assert info["start_tier"] == PLAIN and info["tier"] == RENDER and info["escalated"]
+    assert [config.render_js for config in client.configs] == [False, True]
+    # Both requests held a limiter slot; only the render went through the hedger
+    assert sum(limiter.signals.values()) == 2
+    assert hedger.primaries == 1
+
+def test_plain_backend_serves_only_the_plain_tier():
+    client = FakeClient()
+    plain = FakeBackend("<html></html>")
+
+    parsed, info = asyncio.run(fetch_tiered(client, "https://www.linkedin.com/company/example", parse,
+                                            {"asp": True, "rendering_wait": 2000}, stats=TierStats(path=None),
+                                            limiter=AIMDLimiter(path=None), hedger=Hedger(path=None),
+                                            plain_backend=plain))
+
+    assert parsed["success"] is True and info["escalated"]
+    assert plain.calls == [{"asp": True, "render_js": False}]
+    assert [config.render_js for config in client.configs] == [True]
+
+def test_tiered_pipeline_runs_on_a_backend():
+    backend = FakeBackend("<html>rendered</html>")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pipeline = tiered_pipeline(backend, parse, {}, stats=TierStats(path=None), concurrency=2,
+                                   limiter=AIMDLimiter(path=None), hedger=Hedger(path=None))
+        pipeline.executor = executor
+        results = asyncio.run(pipeline.run(["https://www.linkedin.com/company/a", "https://www.linkedin.com/company/b"]))
+
+    assert [r["fetch_tier"]["tier"] for r in results] == [PLAIN, PLAIN]
+    assert [call["render_js"] for call in backend.calls] == [False, False]
@@ -0,0 +1,27 @@
+import asyncio
+
+import sales_nav_hedging
+from sales_nav_hedging import Hedger
+
+def test_outcomes_stay_bounded(monkeypatch):
+    monkeypatch.setattr(sales_nav_hedging, "OUTCOME_WINDOW", 10)
+    hedger = Hedger(path=None)
+
+    async def attempt(n):
+        return n
+
+    async def scenario():
+        for _ in range(50):
+            assert await hedger.run("linkedin.com/company/*", attempt) == 0
+        await hedger.drain()
+
+    asyncio.run(scenario())
+    assert hedger.primaries == 50
+    assert len(hedger.outcomes) == 10
+    assert hedger.report()["requests"] == 50
+
+def test_no_p99_change_reports_zero():
+    hedger = Hedger(path=None)
+    hedger.outcomes.extend({"ms": 100.0001, "primary_ms": 100.0} for _ in range(5))
+    reduction = hedger.report()["p99_reduction_pct"]
+    assert reduction == 0.0 and str(reduction) == "0.0"
@@ -0,0 +1,45 @@
+from conftest import result_cards
+from sales_nav_html_trim import MODE_NOISE, MODE_OFF, MODE_RESULTS, find_result_list, trim_html
+
+PERSON_JSON = '<code id="bpr-guid-1">{&quot;firstName&quot;:&quot;Ada&quot;}</code>'
+
+def page(body: str) -> str:
+    return (
+        "<html><head><title>Sales Navigator</title><style>.a{}</style>"
+        "<script>window.app = {};</script></head>"
+        f"<body><nav><ul><li>Home</li></ul></nav>{body}{PERSON_JSON}</body></html>"
+    )
+
+def test_result_list_span_covers_every_card():
+    html = page(result_cards(3))
+    start, end = find_result_list(html)
+    assert html[start:end].startswith('<ol class="artdeco-list">')
+    assert html[start:end].endswith("</ol>")
+    assert html[start:end].count("data-x-search-result") == 3
+
+def test_cards_split_across_lists_fall_back_to_off():
+    html = page(result_cards(2) + "<aside>Ad</aside>" + result_cards(2))
+    assert find_result_list(html) is None
+    assert trim_html(html, MODE_RESULTS) == (html, MODE_OFF)
+
+def test_page_without_cards_is_left_alone():
+    html = page('<div class="search-no-results">No leads found</div>')
+    assert find_result_list(html) is None
+    assert trim_html(html, MODE_RESULTS) == (html, MODE_OFF)
+
+def test_results_mode_keeps_title_list_and_person_data():
+    html = page(result_cards(3))
+    trimmed, mode = trim_html(html, MODE_RESULTS)
+    assert mode == MODE_RESULTS
+    assert "<title>Sales Navigator</title>" in trimmed
+    assert trimmed.count("data-x-search-result") == 3
+    assert PERSON_JSON in trimmed
+    assert "<nav>" not in trimmed and "window.app" not in trimmed and "<style>" not in trimmed
+
+def test_noise_mode_keeps_json_scripts():
+    json_script = '<script type="application/ld+json">{"@type": "Person"}</script>'
+    html = page(result_cards(1) + json_script + "<!-- <script>x</script> -->")
+    trimmed, mode = trim_html(html, MODE_NOISE)
+    assert mode == MODE_NOISE
+    assert json_script in trimmed
+    assert "window.app" not in trimmed and "<!--" not in trimmed and "<style>" not in trimmed
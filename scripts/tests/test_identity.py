@@ -0,0 +1,45 @@
+from sales_nav_identity import SeenStore, dedupe_leads, lead_identities
+
+def test_url_forms_of_one_member_share_an_identity():
+    sales = {"name": "Kari Nordmann", "profile_url": "https://www.linkedin.com/sales/lead/ACwAAA0000000000000001,NAME_SEARCH,x1"}
+    people = {"name": "Kari Nordmann", "profile_url": "https://www.linkedin.com/sales/people/ACwAAA0000000000000001,name?trk=s"}
+    assert set(lead_identities(sales)) & set(lead_identities(people))
+
+def test_dedupe_keeps_first_and_fills_in_fields():
+    leads = [
+        {"name": "Kari Nordmann", "title": "CTO", "profile_url": "https://www.linkedin.com/sales/lead/ACwAAA0000000000000001,NAME_SEARCH,x1"},
+        {"name": "Kari Nordmann", "company": "Acme", "profile_url": "https://www.linkedin.com/sales/people/ACwAAA0000000000000001,name"},
+        {"name": "Ola Hansen", "profile_url": "https://www.linkedin.com/in/ola-hansen/"},
+        {"name": "Ola Hansen", "profile_url": "https://www.linkedin.com/in/Ola-Hansen?miniProfileUrn=x"},
+    ]
+    deduped = dedupe_leads(leads)
+    assert [lead["name"] for lead in deduped] == ["Kari Nordmann", "Ola Hansen"]
+    assert deduped[0]["title"] == "CTO" and deduped[0]["company"] == "Acme"
+
+def test_namesakes_with_different_urls_stay_separate():
+    leads = [
+        {"name": "Ola Hansen", "profile_url": "https://www.linkedin.com/in/ola-hansen-1"},
+        {"name": "Ola Hansen", "profile_url": "https://www.linkedin.com/in/ola-hansen-2"},
+    ]
+    assert len(dedupe_leads(leads)) == 2
+
+def test_seen_store_marks_known_leads_across_runs(tmp_path):
+    path = str(tmp_path / "seen.bin")
+    first = SeenStore.load(path)
+    run1 = [{"name": "Kari Nordmann", "profile_url": "https://www.linkedin.com/in/kari-nordmann"},
+            {"name": "Ola Hansen", "profile_url": "https://www.linkedin.com/in/ola-hansen"}]
+    assert first.mark(run1) == 2
+    assert not any(lead.get("known_lead") for lead in run1)
+    first.save()
+
+    second = SeenStore.load(path)
+    assert len(second) == 2
+    run2 = [{"name": "Kari Nordmann", "profile_url": "https://www.linkedin.com/in/Kari-Nordmann/?trk=x"},
+            {"name": "Per Larsen", "profile_url": "https://www.linkedin.com/in/per-larsen"}]
+    assert second.mark(run2) == 1
+    assert run2[0]["known_lead"] is True and "known_lead" not in run2[1]
+
+def test_unsaved_marks_are_not_remembered(tmp_path):
+    path = str(tmp_path / "seen.bin")
+    SeenStore.load(path).mark([{"name": "Kari Nordmann", "profile_url": "https://www.linkedin.com/in/kari-nordmann"}])
+    assert len(SeenStore.load(path)) == 0
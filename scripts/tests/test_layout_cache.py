@@ -0,0 +1,43 @@
+from parsel import Selector
+
+from sales_nav_layout_cache import PlanCache, layout_fingerprint
+from sales_navigator_advanced import extract_profiles_planned
+
+CARD = (
+    '<li class="search-results__result-item"><div class="result-lockup">'
+    '<span data-anonymize="person-name"><span>{name}</span></span>'
+    '<span data-anonymize="person-title">{title}</span></div></li>'
+)
+
+def results_page(people, list_class: str = "search-results__list") -> Selector:
+    cards = "".join(CARD.format(name=name, title=title) for name, title in people)
+    return Selector(f'<html><body><ol class="{list_class}">{cards}</ol></body></html>')
+
+PEOPLE = [("Ada Lovelace", "Analyst"), ("Grace Hopper", "Admiral")]
+
+def test_fingerprint_follows_layout_not_content():
+    same_layout = results_page([("Alan Turing", "Mathematician")])
+    assert layout_fingerprint(results_page(PEOPLE)) == layout_fingerprint(same_layout)
+    assert layout_fingerprint(results_page(PEOPLE)) != layout_fingerprint(results_page(PEOPLE, "search-results__grid"))
+
+def test_plan_is_learned_then_reused():
+    cache = PlanCache(path=None)
+
+    first, info = extract_profiles_planned(results_page(PEOPLE), cache)
+    assert info["plan_cache"] == "miss" and info["plan"]["container"]
+
+    second, info = extract_profiles_planned(results_page(PEOPLE), cache)
+    assert info["plan_cache"] == "hit"
+    assert [(p["name"], p["title"]) for p in second] == [(p["name"], p["title"]) for p in first] == PEOPLE
+
+def test_stale_plan_is_relearned():
+    cache = PlanCache(path=None)
+    page = results_page(PEOPLE)
+    fingerprint = layout_fingerprint(page)
+    cache.put(fingerprint, {"container": ".member-result", "fields": {"name": "h3::text"}})
+
+    profiles, info = extract_profiles_planned(page, cache)
+
+    assert info["plan_cache"] == "stale"
+    assert [p["name"] for p in profiles] == ["Ada Lovelace", "Grace Hopper"]
+    assert cache.get(fingerprint)["container"] != ".member-result"
@@ -0,0 +1,43 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPTS_DIR
+from sales_nav_leads import Lead, LeadTable, pyarrow
+from sales_nav_sink import NDJSONSink
+
+def test_lead_reads_like_a_dict_and_is_unhashable():
+    lead = Lead.from_dict({"name": "Kari Nordmann", "title": "CTO", "offset": 12})
+    assert lead["name"] == "Kari Nordmann" and lead.get("company") is None and lead["offset"] == 12
+    assert lead == Lead.from_dict(lead.to_dict())
+    with pytest.raises(TypeError):
+        hash(lead)
+
+def test_table_round_trips_rows():
+    table = LeadTable()
+    table.extend([{"name": "Kari Nordmann", "title": "CTO", "result_index": 0}, {"name": "Ola Hansen", "title": "CTO"}],
+                 search_url="https://www.linkedin.com/sales/search/people", scraped_at=1.5)
+    rows = list(table.rows())
+    assert rows[0] == {"name": "Kari Nordmann", "title": "CTO", "result_index": 0,
+                       "search_url": "https://www.linkedin.com/sales/search/people", "scraped_at": 1.5}
+    assert rows[1]["title"] == "CTO" and "result_index" not in rows[1]
+
+@pytest.mark.skipif(pyarrow is None, reason="pyarrow is not installed")
+def test_convert_reads_driver_ndjson(tmp_path):
+    source = str(tmp_path / "results.ndjson")
+    with NDJSONSink(source) as sink:
+        sink.write_result({"url": "https://www.linkedin.com/sales/search/people", "success": True,
+                           "results": [{"name": "Kari Nordmann", "known_lead": True}, {"name": "Ola Hansen"}]})
+        sink.write("summary", {"pages": 1})
+
+    output = str(tmp_path / "leads.arrow")
+    subprocess.run([sys.executable, "sales_nav_leads.py", "convert", source, "-o", output],
+                   cwd=SCRIPTS_DIR, check=True, capture_output=True)
+
+    with pyarrow.OSFile(output, "rb") as f:
+        rows = pyarrow.ipc.open_file(f).read_all().to_pylist()
+    assert [row["name"] for row in rows] == ["Kari Nordmann", "Ola Hansen"]
+    assert rows[0]["search_url"] == "https://www.linkedin.com/sales/search/people"
+    assert json.loads(rows[0]["extra"]) == {"known_lead": True}
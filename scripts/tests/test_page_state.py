@@ -0,0 +1,54 @@
+import pytest
+
+import sales_nav_page_state
+from conftest import result_cards
+from parsel import Selector
+from sales_nav_page_state import INDICATORS, PageState, classify_page, match_phrases
+
+def page(body: str, head: str = "") -> str:
+    return f"<html><head>{head}</head><body>{body}</body></html>"
+
+def test_result_cards_with_recaptcha_script_are_results():
+    html = page(result_cards(), head='<script src="https://www.google.com/recaptcha/api.js"></script>')
+    result = classify_page(html)
+    assert result.state == PageState.RESULTS
+
+def test_result_cards_with_login_footer_link_are_results():
+    footer = '<footer><a href="https://www.linkedin.com/uas/login?session_redirect=%2Fsales">Sign in</a></footer>'
+    assert classify_page(page(result_cards() + footer)).state == PageState.RESULTS
+
+def test_login_form_is_login_wall():
+    html = page('<form class="login-form"><input name="session_key"><a href="/premium">Try Premium</a></form>')
+    assert classify_page(html).state == PageState.LOGIN_WALL
+
+def test_login_form_with_recaptcha_is_login_wall():
+    html = page('<form class="login-form"><input name="session_key"></form>',
+                head='<script src="https://www.google.com/recaptcha/api.js"></script>')
+    assert classify_page(html).state == PageState.LOGIN_WALL
+
+def test_captcha_iframe_is_challenge():
+    assert classify_page(page('<iframe id="captcha-internal" src="/checkpoint/rp/captcha"></iframe>')).state == PageState.CHALLENGE
+
+def test_checkpoint_is_challenge():
+    html = page('<iframe src="/checkpoint/challenge/verify"></iframe><h1>Quick security check</h1>')
+    assert classify_page(html).state == PageState.CHALLENGE
+
+def test_upsell_empty_loading_and_unknown():
+    assert classify_page(page("<h1>Your subscription has expired</h1>")).state == PageState.SUBSCRIPTION_UPSELL
+    assert classify_page(page('<div class="search-no-results">No leads found</div>')).state == PageState.EMPTY
+    assert classify_page(page('<div class="initial-load"></div>')).state == PageState.LOADING
+    assert classify_page(page("<p>Hello</p>")).state == PageState.UNKNOWN
+
+def test_substring_fallback_matches_the_automaton(monkeypatch):
+    if sales_nav_page_state._AUTOMATON is None:
+        pytest.skip("pyahocorasick not installed")
+    # Every phrase, including ones nested in longer phrases ("login" in "login-form")
+    lowered = " ".join(INDICATORS) + result_cards(3).lower()
+    expected = match_phrases(lowered)
+    monkeypatch.setattr(sales_nav_page_state, "_AUTOMATON", None)
+    assert match_phrases(lowered) == expected == sorted(INDICATORS)
+
+def test_debug_keywords_ignore_case():
+    from debug_sales_navigator import analyze_page_structure
+    analysis = analyze_page_structure(Selector(page("<h1>People</h1>", head="<title>Leads</title>")))
+    assert analysis["has_sales_nav_elements"]
@@ -0,0 +1,28 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sales_nav_response import PageResponse
+from sales_nav_pipeline import Pipeline
+
+async def fetch(job):
+    return PageResponse(f"<html>{job.index}</html>", url=job.url)
+
+def parse(response):
+    return {"success": True, "url": response.url}
+
+def test_failing_on_parsed_does_not_hang_run():
+    def on_parsed(job, result):
+        if job.index == 1:
+            raise RuntimeError("boom")
+        return None
+
+    sunk = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pipeline = Pipeline(fetch=fetch, parse=parse, sink=lambda job, result: sunk.append(job.index),
+                            on_parsed=on_parsed, parse_workers=2, executor=executor)
+        urls = [f"https://example.test/{i}" for i in range(3)]
+        results = asyncio.run(asyncio.wait_for(pipeline.run(urls), timeout=5))
+
+    assert [r["url"] for r in results] == urls
+    assert sorted(sunk) == [0, 1, 2]
+    assert pipeline.stats["parse"].errors == 1
@@ -0,0 +1,42 @@
+import pytest
+
+from sales_nav_query import SalesNavQuery, cache_key, canonical_url, company_search_url
+
+COMPANY_SEARCH = ("https://www.linkedin.com/sales/search/people?query=(filters%3AList((type%3ACURRENT_COMPANY%2C"
+                  "values%3AList((id%3A3341537%2CselectionType%3AINCLUDED)))))&sessionId=cWxbdzEXSJSyuYKPOUjGtw%3D%3D")
+
+def test_restli_round_trip_is_exact():
+    assert SalesNavQuery.from_url(COMPANY_SEARCH).to_url() == COMPANY_SEARCH
+
+def test_company_ids_and_filter_editing():
+    query = SalesNavQuery.from_url(COMPANY_SEARCH)
+    assert query.company_ids() == ["3341537"]
+
+    query.add_filter_value("CURRENT_COMPANY", "urn:li:organization:42")
+    assert query.company_ids() == ["3341537", "42"]
+    assert SalesNavQuery.from_url(query.to_url()).company_ids() == ["3341537", "42"]
+
+def test_company_search_url_parses_back():
+    assert SalesNavQuery.from_url(company_search_url(["1", "2"])).company_ids() == ["1", "2"]
+
+def test_canonical_form_ignores_session_and_order():
+    other_session = COMPANY_SEARCH.replace("cWxbdzEXSJSyuYKPOUjGtw%3D%3D", "b3RoZXI%3D")
+    assert cache_key(COMPANY_SEARCH) == cache_key(other_session)
+    assert "sessionId" not in canonical_url(COMPANY_SEARCH)
+
+    a = SalesNavQuery().add_filter_value("CURRENT_COMPANY", "1").add_filter_value("CURRENT_COMPANY", "2")
+    b = SalesNavQuery().add_filter_value("CURRENT_COMPANY", "2").add_filter_value("CURRENT_COMPANY", "1")
+    assert canonical_url(a.to_url()) == canonical_url(b.to_url())
+
+def test_host_is_kept():
+    assert canonical_url("https://example.com/x?a=b") == "https://example.com/x?a=b"
+    assert SalesNavQuery.from_url("https://fr.linkedin.com/sales/search/people?query=(keywords%3Acto)").to_url() \
+        == "https://fr.linkedin.com/sales/search/people?query=(keywords%3Acto)"
+    assert canonical_url("http://linkedin.com/sales/search/people?query=(keywords%3Acto)") \
+        == "https://www.linkedin.com/sales/search/people?query=(keywords%3Acto)"
+
+def test_malformed_query_raises_and_canonical_url_passes_it_through():
+    broken = "https://www.linkedin.com/sales/search/people?query=(filters%3AList((type"
+    with pytest.raises(ValueError):
+        SalesNavQuery.from_url(broken)
+    assert canonical_url(broken) == broken
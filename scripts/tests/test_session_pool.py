@@ -0,0 +1,36 @@
+import asyncio
+
+from sales_nav_access_guard import blocked_url_state
+from sales_nav_page_state import PageState
+from sales_nav_session_pool import SessionPool
+
+def test_lease_waits_for_running_health_probe():
+    events = []
+
+    async def warm(name: str) -> bool:
+        return True
+
+    async def health_check(name: str) -> bool:
+        events.append(("probe start", name))
+        await asyncio.sleep(0.05)
+        events.append(("probe end", name))
+        return True
+
+    async def scenario():
+        pool = SessionPool(warm=warm, health_check=health_check, size=1, health_interval=0.01, path=None)
+        await pool.start()
+        # Let the health loop start probing the idle session
+        while not events:
+            await asyncio.sleep(0.005)
+        async with pool.lease() as name:
+            events.append(("leased", name))
+        pool.close()
+
+    asyncio.run(scenario())
+    assert [kind for kind, _ in events[:3]] == ["probe start", "probe end", "leased"]
+
+def test_blocked_url_state_uses_the_path():
+    assert blocked_url_state("https://www.linkedin.com/authwall?trk=x") == PageState.LOGIN_WALL
+    assert blocked_url_state("https://www.linkedin.com/uas/login?session_redirect=%2Fsales") == PageState.LOGIN_WALL
+    assert blocked_url_state("https://www.linkedin.com/checkpoint/challenge/abc") == PageState.CHALLENGE
+    assert blocked_url_state("https://www.linkedin.com/sales/home?redirect=%2Flogin") is None
@@ -0,0 +1,29 @@
+from sales_nav_sink import NDJSONSink, read_ndjson
+
+def test_gz_is_readable_while_writing_and_across_appended_runs(tmp_path):
+    path = str(tmp_path / "results.ndjson.gz")
+
+    sink = NDJSONSink(path, run_id="first")
+    sink.write_result({"url": "https://www.linkedin.com/sales/search/people", "success": True,
+                       "results": [{"name": "Kari Nordmann"}, {"name": "Ola Hansen"}]})
+    # Still open: no gzip trailer yet, every record so far must be readable
+    records = list(read_ndjson(path))
+    assert [r["type"] for r in records] == ["lead", "lead", "page"]
+    assert records[0]["search_url"] == "https://www.linkedin.com/sales/search/people"
+    assert records[2]["lead_count"] == 2 and "results" not in records[2]
+    sink.close()
+
+    with NDJSONSink(path, run_id="second") as second:
+        second.write("summary", {"pages": 1})
+
+    records = list(read_ndjson(path))
+    assert [(r["run_id"], r["seq"]) for r in records] == [("first", 1), ("first", 2), ("first", 3), ("second", 1)]
+
+def test_partial_last_line_is_skipped(tmp_path):
+    path = str(tmp_path / "results.ndjson")
+    with NDJSONSink(path) as sink:
+        sink.write("page", {"url": "a"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "page", "url": "b"')
+
+    assert [r["url"] for r in read_ndjson(path)] == ["a"]
@@ -0,0 +1,45 @@
+import json
+
+from sales_nav_token_scanner import legacy_scan, scan_profile_records
+
+def names(profiles):
+    return [p["name"] for p in profiles if "name" in p]
+
+def test_missing_last_name_does_not_shift_later_records():
+    payload = json.dumps({"included": [
+        {"firstName": "Ada", "lastName": "Lovelace", "publicIdentifier": "ada-lovelace"},
+        {"firstName": "Alan", "publicIdentifier": "alan-turing"},
+        {"firstName": "Grace", "lastName": "Hopper", "publicIdentifier": "grace-hopper"},
+    ]})
+    html = f"<style>.a {{ color: red }}</style><script>{payload}</script>"
+
+    profiles = scan_profile_records(html)
+
+    assert names(profiles) == ["Ada Lovelace", "Grace Hopper"]
+    assert [p["linkedin_id"] for p in profiles] == ["ada-lovelace", "grace-hopper"]
+    # zip() paired Alan with Hopper
+    assert "Alan Hopper" in names(legacy_scan(html))
+
+def test_nested_object_between_first_and_last_name():
+    html = ('<script>{"firstName": "Ada", "currentPosition": {"companyName": "Analytical Engines", '
+            '"dates": {"start": {"year": 1843}}}, "lastName": "Lovelace", "publicIdentifier": "ada-lovelace", '
+            '"email": "ada@example.com"}</script>')
+
+    profiles = scan_profile_records(html)
+
+    assert len(profiles) == 1
+    assert profiles[0]["name"] == "Ada Lovelace"
+    assert profiles[0]["linkedin_id"] == "ada-lovelace"
+    assert profiles[0]["email"] == "ada@example.com"
+
+def test_html_escaped_code_block():
+    payload = json.dumps({"elements": [
+        {"firstName": "Grace", "lastName": "Hopper", "publicIdentifier": "grace-hopper"},
+        {"firstName": "Edsger", "lastName": "Dijkstra"},
+    ]}).replace('"', "&quot;")
+    html = f'<code style="display: none" id="bpr-guid-1">{payload}</code>'
+
+    profiles = scan_profile_records(html)
+
+    assert names(profiles) == ["Grace Hopper", "Edsger Dijkstra"]
+    assert profiles[0]["profile_url"] == "https://www.linkedin.com/in/grace-hopper"
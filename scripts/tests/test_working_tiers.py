@@ -0,0 +1,31 @@
+import time
+
+from parsel import Selector
+
+from sales_nav_selector_stats import SelectorStats
+from sales_nav_working import extract_from_containers, extract_sales_nav_profiles_tiered
+
+def lockup_page(count: int = 25) -> Selector:
+    cards = "".join(
+        f'<li><div class="result-lockup__name"><a href="/sales/people/ACwAAA{i:08d},NAME">Person {i}</a></div>'
+        f'<span class="result-lockup__highlight-keyword">Engineer</span></li>'
+        for i in range(count)
+    )
+    return Selector(f'<html><body><ol class="search-results__list">{cards}</ol></body></html>')
+
+def test_first_tier_covers_the_page():
+    result = extract_sales_nav_profiles_tiered(lockup_page(), stats=SelectorStats(path=None))
+    assert len(result["profiles"]) == 25
+    assert [tier["tier"] for tier in result["tiers_run"]] == ["containers"]
+    assert [lead["result_index"] for lead in result["profiles"]] == list(range(25))
+    assert not result["budget_exhausted"]
+
+def test_container_tier_stops_at_the_deadline():
+    profiles, complete = extract_from_containers(lockup_page(), SelectorStats(path=None), deadline=time.thread_time())
+    assert profiles == [] and not complete
+
+def test_spent_budget_runs_no_tier():
+    result = extract_sales_nav_profiles_tiered(lockup_page(), cpu_budget_ms=0, stats=SelectorStats(path=None))
+    assert result["profiles"] == []
+    assert result["budget_exhausted"]
+    assert [tier["tier"] for tier in result["tiers_run"]] == []